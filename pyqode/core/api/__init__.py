@@ -5,11 +5,14 @@ functions.
 """
 from .code_edit import CodeEdit
 from .decoration import TextDecoration
+from .decoration import TextRanges
+from .decoration import ViewportDecorations
 from .encodings import ENCODINGS_MAP, convert_to_codec_key
 from .manager import Manager
 from .mode import Mode
 from .panel import Panel
 from .syntax_highlighter import ColorScheme
+from .syntax_highlighter import FormatTable
 from .syntax_highlighter import PYGMENTS_STYLES
 from .syntax_highlighter import SyntaxHighlighter
 from .syntax_highlighter import TextBlockUserData
@@ -31,6 +34,7 @@ __all__ = [
     'DelayJobRunner',
     'ENCODINGS_MAP',
     'FoldDetector',
+    'FormatTable',
     'IndentFoldDetector',
     'FoldScope',
     'Manager',
@@ -41,5 +45,7 @@ __all__ = [
     'TextBlockUserData',
     'TextDecoration',
     'TextHelper',
-    'TextBlockHelper'
+    'TextBlockHelper',
+    'TextRanges',
+    'ViewportDecorations',
 ]
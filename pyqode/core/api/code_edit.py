@@ -1004,10 +1004,10 @@ class CodeEdit(QtWidgets.QPlainTextEdit):
         self.mouse_pressed.emit(event)
         if event.button() == QtCore.Qt.LeftButton:
             cursor = self.cursorForPosition(event.pos())
-            for sel in self.decorations:
+            for sel in self.decorations.at_position(cursor.position()):
                 if sel.cursor.blockNumber() == cursor.blockNumber():
                     if sel.contains_cursor(cursor):
-                        sel.signals.clicked.emit(sel)
+                        self.decorations.clicked.emit(sel)
         if not event.isAccepted():
             event.setAccepted(initial_state)
             super(CodeEdit, self).mousePressEvent(event)
@@ -1048,7 +1048,7 @@ class CodeEdit(QtWidgets.QPlainTextEdit):
         cursor = self.cursorForPosition(event.pos())
         self._last_mouse_pos = event.pos()
         block_found = False
-        for sel in self.decorations:
+        for sel in self.decorations.at_position(cursor.position()):
             if sel.contains_cursor(cursor) and sel.tooltip:
                 if (self._prev_tooltip_block_nbr != cursor.blockNumber() or
                         not QtWidgets.QToolTip.isVisible()):
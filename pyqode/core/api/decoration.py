@@ -2,7 +2,11 @@
 This module contains the text decoration API.
 
 """
+import bisect
+from array import array
+
 from pyqode.qt import QtWidgets, QtCore, QtGui
+from pyqode.core.api.utils import TextHelper
 
 
 class TextDecoration(QtWidgets.QTextEdit.ExtraSelection):
@@ -13,16 +17,20 @@ class TextDecoration(QtWidgets.QTextEdit.ExtraSelection):
     In addition to the helper methods, a tooltip can be added to a decoration.
     (useful for errors markers and so on...)
 
-    Text decoration expose a **clicked** signal stored in a separate QObject:
-        :attr:`pyqode.core.api.TextDecoration.Signals`
+    Clicks on decorations are reported by the **clicked** signal of the
+    editor's decorations manager, which is shared by all the decorations:
+        :attr:`pyqode.core.managers.TextDecorationsManager.clicked`
 
     .. code-block:: python
 
-        deco = TextDecoration()
-        deco.signals.clicked.connect(a_slot)
+        editor.decorations.clicked.connect(a_slot)
 
         def a_slot(decoration):
             print(decoration)
+
+    A decoration also exposes its own **clicked** signal, stored in a
+    separate QObject (:attr:`pyqode.core.api.TextDecoration.Signals`) that
+    is only created when :attr:`signals` is first accessed.
     """
     class Signals(QtCore.QObject):
         """
@@ -58,7 +66,7 @@ class TextDecoration(QtWidgets.QTextEdit.ExtraSelection):
         .. note:: Use the cursor selection if startPos and endPos are none.
         """
         super(TextDecoration, self).__init__()
-        self.signals = self.Signals()
+        self._signals = None
         self.draw_order = draw_order
         self.tooltip = tooltip
         self.cursor = QtGui.QTextCursor(cursor_or_bloc_or_doc)
@@ -69,12 +77,32 @@ class TextDecoration(QtWidgets.QTextEdit.ExtraSelection):
         if end_pos is not None:
             self.cursor.setPosition(end_pos, QtGui.QTextCursor.KeepAnchor)
         if start_line is not None:
-            self.cursor.movePosition(self.cursor.Start, self.cursor.MoveAnchor)
-            self.cursor.movePosition(self.cursor.Down, self.cursor.MoveAnchor,
-                                     start_line)
+            self.cursor.setPosition(self._line_position(start_line))
         if end_line is not None:
-            self.cursor.movePosition(self.cursor.Down, self.cursor.KeepAnchor,
-                                     end_line - start_line)
+            self.cursor.setPosition(self._line_position(end_line),
+                                    QtGui.QTextCursor.KeepAnchor)
+
+    @property
+    def signals(self):
+        """
+        Signals of the decoration (:class:`TextDecoration.Signals`), created on
+        first access. Prefer the shared signal of the decorations manager
+        (``editor.decorations.clicked``) when creating many decorations.
+        """
+        if self._signals is None:
+            self._signals = self.Signals()
+        return self._signals
+
+    def _line_position(self, line):
+        """
+        Gets the position of the start of a line, the start of the last line
+        is returned if the line does not exist.
+        """
+        doc = self.cursor.document()
+        block = doc.findBlockByNumber(line)
+        if not block.isValid():
+            block = doc.lastBlock()
+        return block.position()
 
     def contains_cursor(self, cursor):
         """
@@ -189,3 +217,220 @@ class TextDecoration(QtWidgets.QTextEdit.ExtraSelection):
         self.format.setUnderlineStyle(
             QtGui.QTextCharFormat.WaveUnderline)
         self.format.setUnderlineColor(color)
+
+
+class TextRanges(object):
+    """
+    Compact collection of text ranges, sorted by start position.
+
+    The ranges are stored in two integer arrays instead of a list of tuples,
+    which keeps the memory cost of hundreds of thousands of search results
+    down to a few bytes per range.
+
+    The collection behaves like a read-only sequence of ``(start, end)``
+    tuples.
+    """
+    def __init__(self, ranges=()):
+        """
+        :param ranges: iterable of (start, end) tuples, sorted by start
+            position.
+        """
+        self._starts = array('l')
+        self._ends = array('l')
+        for start, end in ranges:
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        return self._starts[index], self._ends[index]
+
+    def __iter__(self):
+        return zip(self._starts, self._ends)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self))
+
+    def index_after(self, position):
+        """
+        Returns the index of the first range that ends after ``position``,
+        or ``len(self)`` if there is no such range.
+
+        :param position: text position
+        """
+        return bisect.bisect_right(self._ends, position)
+
+    def intersecting(self, start, end):
+        """
+        Returns the range of indices of the text ranges that intersect the
+        ``[start, end]`` span.
+
+        :param start: span start position
+        :param end: span end position
+        :rtype: range
+        """
+        first = bisect.bisect_left(self._ends, start)
+        last = bisect.bisect_right(self._starts, end)
+        return range(first, max(first, last))
+
+    def between(self, start, end):
+        """
+        Yields the ``(start, end)`` text ranges that intersect the
+        ``[start, end]`` span.
+
+        :param start: span start position
+        :param end: span end position
+        """
+        for i in self.intersecting(start, end):
+            yield self._starts[i], self._ends[i]
+
+    def remove(self, index, offset=0):
+        """
+        Removes the range at ``index`` and shifts the following ranges by
+        ``offset`` characters.
+
+        :param index: index of the range to remove
+        :param offset: number of characters to add to the positions of the
+            following ranges.
+        """
+        self._starts.pop(index)
+        self._ends.pop(index)
+        if offset:
+            for i in range(index, len(self._starts)):
+                self._starts[i] += offset
+                self._ends[i] += offset
+
+
+class ViewportDecorations(object):
+    """
+    Lazily creates the text decorations of a (potentially huge) collection of
+    :class:`TextRanges`.
+
+    Only the ranges that intersect the visible blocks, plus ``margin`` blocks
+    above and below, are turned into a :class:`TextDecoration` and appended
+    to the editor decorations. The decorations are refreshed as soon as the
+    editor is scrolled or resized outside of the materialized area, so the
+    paint and memory costs are proportional to the viewport size instead of
+    the number of ranges.
+
+    ::
+
+        def factory(start, end):
+            deco = TextDecoration(editor.document(), start, end)
+            deco.set_background(QtGui.QBrush(QtGui.QColor('yellow')))
+            return deco
+
+        decorations = ViewportDecorations(editor, factory)
+        decorations.set_ranges([(0, 5), (10, 15)])
+    """
+    @property
+    def ranges(self):
+        """
+        The collection of ranges to decorate.
+
+        :type: TextRanges (or any object with ``__len__`` and ``between``)
+        """
+        return self._ranges
+
+    @property
+    def decorations(self):
+        """
+        The list of decorations that are currently materialized.
+        """
+        return self._decorations
+
+    def __init__(self, editor, factory, margin=50):
+        """
+        :param editor: CodeEdit instance
+        :param factory: callable that takes a start and an end position and
+            returns a TextDecoration (or None to skip the range).
+        :param margin: number of blocks, above and below the visible blocks,
+            for which decorations are created.
+        """
+        self.editor = editor
+        self.factory = factory
+        self.margin = margin
+        self._ranges = TextRanges()
+        self._decorations = []
+        self._window = None
+        self._connected = False
+
+    def set_ranges(self, ranges):
+        """
+        Replaces the collection of decorated ranges.
+
+        :param ranges: TextRanges or iterable of (start, end) tuples. Any
+            object that has the ``__len__`` and ``between`` methods of
+            :class:`TextRanges` can also be used, e.g. to compute the ranges
+            from positions that follow the text.
+        """
+        if not hasattr(ranges, 'between'):
+            ranges = TextRanges(ranges)
+        self._ranges = ranges
+        if ranges and not self._connected:
+            self.editor.updateRequest.connect(self._on_update_request)
+            self._connected = True
+        elif not ranges and self._connected:
+            self._disconnect()
+        self.refresh(force=True)
+
+    def clear(self):
+        """
+        Removes every decoration and forgets about the ranges.
+        """
+        self._remove_decorations()
+        self._ranges = TextRanges()
+        if self._connected:
+            self._disconnect()
+
+    def refresh(self, force=False):
+        """
+        Materializes the decorations of the ranges that are close to the
+        visible blocks.
+
+        :param force: True to recreate the decorations even if the visible
+            blocks are still within the materialized area.
+        """
+        first, last = TextHelper(self.editor).visible_line_range()
+        if (not force and self._window is not None and
+                self._window[0] <= first and last <= self._window[1]):
+            return
+        with self.editor.decorations.batch():
+            self._remove_decorations()
+            if not self._ranges:
+                return
+            doc = self.editor.document()
+            first = max(0, first - self.margin)
+            last = min(doc.blockCount() - 1, last + self.margin)
+            self._window = first, last
+            start = doc.findBlockByNumber(first).position()
+            block = doc.findBlockByNumber(last)
+            end = block.position() + block.length()
+            for range_start, range_end in self._ranges.between(start, end):
+                deco = self.factory(range_start, range_end)
+                if deco is not None:
+                    self._decorations.append(deco)
+            self.editor.decorations.append_many(self._decorations)
+
+    def _remove_decorations(self):
+        self.editor.decorations.remove_many(self._decorations)
+        self._decorations[:] = []
+        self._window = None
+
+    def _disconnect(self):
+        try:
+            self.editor.updateRequest.disconnect(self._on_update_request)
+        except (RuntimeError, TypeError):
+            pass
+        self._connected = False
+
+    def _on_update_request(self, *args):
+        self.refresh()
@@ -9,7 +9,7 @@ from pygments.styles import get_style_by_name, get_all_styles
 from pygments.token import Token, Punctuation
 from pygments.util import ClassNotFound
 from pyqode.core.api.mode import Mode
-from pyqode.core.api.utils import drift_color
+from pyqode.core.api.utils import drift_color, TextHelper
 from pyqode.qt import QtGui, QtCore, QtWidgets
 
 
@@ -72,85 +72,122 @@ COLOR_SCHEME_KEYS = {
 }
 
 
-class ColorScheme(object):
+class FormatTable(object):
     """
-    Translates a pygments style into a dictionary of colors associated with a
-    style key.
-
-    See :attr:`pyqode.core.api.syntax_highligter.COLOR_SCHEM_KEYS` for the
-    available keys.
-
+    Formats of a pygments style, shared by all the color schemes and syntax
+    highlighters of the process: there is one table per style name, see
+    :meth:`for_style`.
+
+    The formats of the color scheme keys (:attr:`scheme_formats`) are built
+    when the table is created, the formats of the token types are built on
+    demand by :meth:`token_format`. The formats of strings, docstrings and
+    comments (and of their sub types, except :attr:`CODE_TOKENS`) have the
+    ``UserObject`` object type and their color scheme key in the
+    :attr:`KEY_PROPERTY` property, see
+    :meth:`pyqode.core.api.TextHelper.is_comment_or_string`.
+
+    The formats are shared, they must not be modified.
     """
-    @property
-    def name(self):
-        """
-        Name of the color scheme, this is usually the name of the associated
-        pygments style.
+    #: maps style names to format tables
+    _tables = {}
+
+    #: Property of the strings, docstrings and comments formats that holds
+    #: their color scheme key.
+    KEY_PROPERTY = QtGui.QTextFormat.UserProperty
+
+    #: Sub types of strings and comments that contain code (preprocessor
+    #: directives, string interpolations,...), they are not marked as
+    #: strings or comments.
+    CODE_TOKENS = (Token.Comment.Preproc, Token.Comment.PreprocFile,
+                   Token.Comment.Hashbang, Token.Literal.String.Interpol,
+                   Token.Literal.String.Affix)
+
+    @classmethod
+    def for_style(cls, name):
         """
-        return self._name
+        Returns the format table of a style, the table is created the first
+        time.
 
-    @property
-    def background(self):
+        :param name: name of the pygments style
         """
-        Gets the background color.
-        :return:
-        """
-        return self.formats['background'].background().color()
-
-    @property
-    def highlight(self):
-        """
-        Gets the highlight color.
-        :return:
-        """
-        return self.formats['highlight'].background().color()
+        try:
+            return cls._tables[name]
+        except KeyError:
+            table = cls._tables[name] = cls(name)
+            return table
 
-    def __init__(self, style):
+    def __init__(self, name):
         """
-        :param style: name of the pygments style to load
+        :param name: name of the pygments style to load, unknown styles
+            fall back to the qt style.
         """
-        self._name = style
-        self._brushes = {}
-        #: Dictionary of formats colors (keys are the same as for
-        #: :attr:`pyqode.core.api.COLOR_SCHEME_KEYS`
-        self.formats = {}
         try:
-            style = get_style_by_name(style)
+            style = get_style_by_name(name)
         except ClassNotFound:
-            if style == 'darcula':
+            if name == 'darcula':
                 from pyqode.core.styles.darcula import DarculaStyle
                 style = DarculaStyle
             else:
                 from pyqode.core.styles.qt import QtStyle
                 style = QtStyle
+        #: Name of the style
+        self.name = name
+        #: The pygments style
+        self.style = style
+        self._brushes = {}
+        self._token_formats = {}
+        #: Formats of the color scheme keys (see
+        #: :attr:`pyqode.core.api.COLOR_SCHEME_KEYS`)
+        self.scheme_formats = {}
         self._load_formats_from_style(style)
 
+    def token_format(self, token):
+        """
+        Returns the format of a token type.
+
+        :param token: pygments token type
+        """
+        try:
+            return self._token_formats[token]
+        except KeyError:
+            try:
+                style = self.style.style_for_token(token)
+            except KeyError:
+                # fallback to plain text
+                style = self.style.style_for_token(Token.Text)
+            result = self._get_format_from_style(token, style)
+            self._token_formats[token] = result
+            return result
+
     def _load_formats_from_style(self, style):
+        formats = self.scheme_formats
         # background
-        self.formats['background'] = self._get_format_from_color(
+        formats['background'] = self._get_format_from_color(
             style.background_color)
         # highlight
-        self.formats['highlight'] = self._get_format_from_color(
+        formats['highlight'] = self._get_format_from_color(
             style.highlight_color)
+        # make sure to use a default visible color for the foreground brush
+        default_color = drift_color(
+            formats['background'].background().color(), 1000).name()
         for key, token in COLOR_SCHEME_KEYS.items():
             if token and key:
-                self.formats[key] = self._get_format_from_style(token, style)
+                formats[key] = self._get_format_from_style(
+                    token, style.style_for_token(token), default_color)
 
     def _get_format_from_color(self, color):
         fmt = QtGui.QTextCharFormat()
         fmt.setBackground(self._get_brush(color))
         return fmt
 
-    def _get_format_from_style(self, token, style):
-        """ Returns a QTextCharFormat for token by reading a Pygments style.
+    def _get_format_from_style(self, token, style, default_color=None):
+        """ Returns a QTextCharFormat for token from a pygments style
+        definition.
         """
         result = QtGui.QTextCharFormat()
-        items = list(style.style_for_token(token).items())
-        for key, value in items:
+        for key, value in list(style.items()):
             if value is None and key == 'color':
-                # make sure to use a default visible color for the foreground
-                # brush
-                value = drift_color(self.background, 1000).name()
+                value = default_color
             if value:
                 if key == 'color':
                     result.setForeground(self._get_brush(value))
@@ -169,10 +206,20 @@ class ColorScheme(object):
                     result.setFontStyleHint(QtGui.QFont.Times)
                 elif key == 'mono':
                     result.setFontStyleHint(QtGui.QFont.TypeWriter)
-        if token in [Token.Literal.String, Token.Literal.String.Doc,
-                     Token.Comment]:
+        if any(token in code_token for code_token in self.CODE_TOKENS):
+            key = None
+        elif token in Token.Literal.String.Doc:
+            key = 'docstring'
+        elif token in Token.Literal.String:
+            key = 'string'
+        elif token in Token.Comment:
+            key = 'comment'
+        else:
+            key = None
+        if key:
             # mark strings, comments and docstrings regions for further queries
             result.setObjectType(result.UserObject)
+            result.setProperty(self.KEY_PROPERTY, key)
         return result
 
     def _get_brush(self, color):
@@ -196,6 +243,59 @@ class ColorScheme(object):
         return qcolor
 
 
+class ColorScheme(object):
+    """
+    Translates a pygments style into a dictionary of colors associated with a
+    style key.
+
+    See :attr:`pyqode.core.api.syntax_highligter.COLOR_SCHEM_KEYS` for the
+    available keys.
+
+    The formats come from the :class:`FormatTable` of the style, which is
+    shared by all the color schemes of the same style.
+    """
+    @property
+    def name(self):
+        """
+        Name of the color scheme, this is usually the name of the associated
+        pygments style.
+        """
+        return self._name
+
+    @property
+    def background(self):
+        """
+        Gets the background color.
+        :return:
+        """
+        return self.formats['background'].background().color()
+
+    @property
+    def highlight(self):
+        """
+        Gets the highlight color.
+        :return:
+        """
+        return self.formats['highlight'].background().color()
+
+    @property
+    def table(self):
+        """
+        The shared :class:`FormatTable` of the style.
+        """
+        return self._table
+
+    def __init__(self, style):
+        """
+        :param style: name of the pygments style to load
+        """
+        self._name = style
+        self._table = FormatTable.for_style(style)
+        #: Dictionary of formats colors (keys are the same as for
+        #: :attr:`pyqode.core.api.COLOR_SCHEME_KEYS`
+        self.formats = dict(self._table.scheme_formats)
+
+
 class SyntaxHighlighter(QtGui.QSyntaxHighlighter, Mode):
     """
     Abstract base class for syntax highlighter modes.
@@ -214,7 +314,27 @@ class SyntaxHighlighter(QtGui.QSyntaxHighlighter, Mode):
         our data in the block user state as a bit-mask. You should always
         use :class:`pyqode.core.api.TextBlockHelper` to retrieve or modify
         those data.
+
+    Documents that have more than :attr:`PROGRESSIVE_THRESHOLD` blocks are
+    highlighted progressively, without blocking the user interface: the
+    visible blocks are highlighted first, then the other blocks, ordered by
+    distance from the viewport, in slices of :attr:`SLICE_DURATION` seconds
+    run when the event loop is idle. The blocks touched by an edit made while
+    a document is being highlighted are queued again (large edits restart
+    the process). Blocks that have not been processed yet keep their previous
+    formats. :attr:`highlighting_progress` is
+    emitted after each slice.
     """
+    #: Number of blocks above which a document is highlighted progressively.
+    PROGRESSIVE_THRESHOLD = 3000
+
+    #: Maximum duration (in seconds) of a slice of progressive highlighting.
+    SLICE_DURATION = 0.02
+
+    #: Number of blocks processed at once, by progressive highlighting,
+    #: before moving to the other side of the viewport.
+    CHUNK_SIZE = 200
+
     #: Signal emitted at the start of highlightBlock. Parameters are the
     #: highlighter instance and the current text block
     block_highlight_started = QtCore.Signal(object, object)
@@ -223,6 +343,18 @@ class SyntaxHighlighter(QtGui.QSyntaxHighlighter, Mode):
     #: highlighter instance and the current text block
     block_highlight_finished = QtCore.Signal(object, object)
 
+    #: Signal emitted while a document is highlighted progressively.
+    #: Parameters are the number of blocks highlighted and the number of
+    #: blocks of the document. Both are equal when highlighting finished.
+    highlighting_progress = QtCore.Signal(int, int)
+
+    @property
+    def highlighting(self):
+        """
+        Tells whether the document is being highlighted progressively.
+        """
+        return self._done is not None
+
     @property
     def formats(self):
         """
@@ -289,12 +421,46 @@ class SyntaxHighlighter(QtGui.QSyntaxHighlighter, Mode):
         #: to work. Default is None
         self.fold_detector = None
         self.WHITESPACES = QtCore.QRegExp(r'\s+')
+        # progressive highlighting state:
+        #   - _done: one flag per block, None when not highlighting
+        #   - _ranges: ranges of blocks to process, in reverse order
+        #   - _requeued: blocks to process again because the state of their
+        #     previous block changed
+        #   - _target: numbers of the first and last blocks that may be
+        #     highlighted by the current call to rehighlightBlock (Qt always
+        #     highlights the block that follows the requested block)
+        self._done = None
+        self._nb_done = 0
+        self._ranges = []
+        self._requeued = []
+        self._target = None
+        self._target_changed = False
+        self._slice_timer = QtCore.QTimer()
+        self._slice_timer.setSingleShot(True)
+        self._slice_timer.timeout.connect(self._highlight_slice)
+        self._document = None
 
     def on_state_changed(self, state):
+        self._stop_progressive_highlighting()
+        if self._document is not None:
+            try:
+                self._document.contentsChange.disconnect(
+                    self._on_contents_change)
+            except (RuntimeError, TypeError):
+                # document already deleted
+                pass
+            self._document = None
         if self._on_close:
             return
         if state:
-            self.setDocument(self.editor.document())
+            document = self.editor.document()
+            # connected before calling setDocument so that we are notified
+            # before QSyntaxHighlighter highlights the changed blocks.
+            document.contentsChange.connect(self._on_contents_change)
+            self._document = document
+            self.setDocument(document)
+            if document.blockCount() > self.PROGRESSIVE_THRESHOLD:
+                self._start_progressive_highlighting()
         else:
             self.setDocument(None)
 
@@ -327,6 +493,13 @@ class SyntaxHighlighter(QtGui.QSyntaxHighlighter, Mode):
         if not self.enabled:
             return
         current_block = self.currentBlock()
+        if self._done is not None:
+            number = current_block.blockNumber()
+            if (self._target is None or
+                    not self._target[0] <= number <= self._target[1]):
+                self._defer_block(current_block)
+                return
+            state = self.currentBlockState()
         previous_block = self._find_prev_non_blank_block(current_block)
         if self.editor:
             self.highlight_block(text, current_block)
@@ -336,6 +509,11 @@ class SyntaxHighlighter(QtGui.QSyntaxHighlighter, Mode):
                 self.fold_detector._editor = weakref.ref(self.editor)
                 self.fold_detector.process_block(
                     current_block, previous_block, text)
+        if self._done is not None:
+            self._target_changed = self.currentBlockState() != state
+            if not self._done[number]:
+                self._done[number] = 1
+                self._nb_done += 1
 
     def highlight_block(self, text, block):
         """
@@ -349,7 +527,15 @@ class SyntaxHighlighter(QtGui.QSyntaxHighlighter, Mode):
     def rehighlight(self):
         """
         Rehighlight the entire document, may be slow.
+
+        Documents that have more than :attr:`PROGRESSIVE_THRESHOLD` blocks
+        are highlighted progressively, this method returns immediately.
         """
+        document = self.document()
+        if (document is not None and self.editor is not None and
+                document.blockCount() > self.PROGRESSIVE_THRESHOLD):
+            self._start_progressive_highlighting()
+            return
         start = time.time()
         QtWidgets.QApplication.setOverrideCursor(
             QtGui.QCursor(QtCore.Qt.WaitCursor))
@@ -362,6 +548,156 @@ class SyntaxHighlighter(QtGui.QSyntaxHighlighter, Mode):
         end = time.time()
         _logger().debug('rehighlight duration: %fs' % (end - start))
 
+    def _start_progressive_highlighting(self):
+        """
+        Starts (or restarts) highlighting the document progressively, the
+        visible blocks first.
+        """
+        nb_blocks = self.document().blockCount()
+        self._done = bytearray(nb_blocks)
+        self._nb_done = 0
+        self._requeued = []
+        first, last = TextHelper(self.editor).visible_line_range()
+        last = min(last, nb_blocks - 1)
+        ranges = [(first, last)]
+        below = last + 1
+        above = first - 1
+        while below < nb_blocks or above >= 0:
+            if below < nb_blocks:
+                ranges.append(
+                    (below, min(nb_blocks - 1, below + self.CHUNK_SIZE - 1)))
+                below += self.CHUNK_SIZE
+            if above >= 0:
+                ranges.append((max(0, above - self.CHUNK_SIZE + 1), above))
+                above -= self.CHUNK_SIZE
+        ranges.reverse()
+        self._ranges = ranges
+        self._slice_timer.start(0)
+
+    def _stop_progressive_highlighting(self):
+        self._slice_timer.stop()
+        self._done = None
+        self._ranges = []
+        self._requeued = []
+
+    def _next_block_to_highlight(self):
+        done = self._done
+        while self._requeued:
+            number = self._requeued.pop()
+            if not done[number]:
+                return number
+        while self._ranges:
+            first, last = self._ranges[-1]
+            while first <= last and done[first]:
+                first += 1
+            if first >= last:
+                self._ranges.pop()
+            else:
+                self._ranges[-1] = first + 1, last
+            if first <= last:
+                return first
+        return None
+
+    def _highlight_slice(self):
+        """
+        Highlights blocks until the time budget of the slice is spent.
+        """
+        if self._done is None:
+            return
+        document = self.document()
+        start = time.time()
+        while time.time() - start < self.SLICE_DURATION:
+            number = self._next_block_to_highlight()
+            if number is None:
+                nb_blocks = len(self._done)
+                self._stop_progressive_highlighting()
+                self.highlighting_progress.emit(nb_blocks, nb_blocks)
+                return
+            self._target = number, number + 1
+            self._target_changed = False
+            try:
+                self.rehighlightBlock(document.findBlockByNumber(number))
+            finally:
+                self._target = None
+                self._target_changed = False
+        self.highlighting_progress.emit(self._nb_done, len(self._done))
+        self._slice_timer.start(0)
+
+    def _defer_block(self, block):
+        """
+        Keeps the formats and the state of a block that is not highlighted
+        now, it will be highlighted by a later slice.
+        """
+        layout = block.layout()
+        try:
+            formats = layout.formats()
+        except AttributeError:
+            # Qt < 5.6
+            formats = layout.additionalFormats()
+        for fmt_range in formats:
+            self.setFormat(fmt_range.start, fmt_range.length, fmt_range.format)
+        number = block.blockNumber()
+        if self._target_changed and number < len(self._done) and \
+                self._done[number]:
+            # the state of the previous block changed
+            self._done[number] = 0
+            self._nb_done -= 1
+            self._requeued.append(number)
+
+    def _on_contents_change(self, position, removed, added):
+        if self._done is not None and self._target is None:
+            self._on_edited_while_highlighting(position, added)
+        elif (self._done is None and self.editor is not None and self.enabled
+              and self.document().blockCount() > self.PROGRESSIVE_THRESHOLD):
+            document = self.document()
+            first = document.findBlock(position).blockNumber()
+            last = document.findBlock(position + added).blockNumber()
+            if last == -1:
+                last = document.blockCount() - 1
+            if last - first > self.CHUNK_SIZE:
+                # e.g. setPlainText, large paste
+                self._start_progressive_highlighting()
+
+    def _on_edited_while_highlighting(self, position, added):
+        """
+        Updates the progressive highlighting state after an edit: the flags
+        of the edited blocks are reset, the blocks are queued again and the
+        block numbers that follow the edit are shifted.
+        """
+        document = self.document()
+        nb_blocks = document.blockCount()
+        delta = nb_blocks - len(self._done)
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(position + added).blockNumber()
+        if first == -1:
+            first = nb_blocks - 1
+        if last == -1:
+            last = nb_blocks - 1
+        # last edited block, before the edit
+        old_last = last - delta
+        if (last - first > self.CHUNK_SIZE or abs(delta) > self.CHUNK_SIZE or
+                old_last < first):
+            # e.g. large paste or deletion
+            self._start_progressive_highlighting()
+            return
+        edited = self._done[first:old_last + 1]
+        self._nb_done -= edited.count(b'\x01')
+        self._done[first:old_last + 1] = bytearray(last - first + 1)
+        if delta:
+            def shift(number, edited_number):
+                if number < first:
+                    return number
+                if number > old_last:
+                    return number + delta
+                return edited_number
+            self._ranges = [(shift(start, first), shift(end, last))
+                            for start, end in self._ranges]
+            self._requeued = [shift(number, first)
+                              for number in self._requeued]
+        # highlighted before the blocks that are still queued
+        self._requeued.extend(range(last, first - 1, -1))
+        self._slice_timer.start(0)
+
     def on_install(self, editor):
         super(SyntaxHighlighter, self).on_install(editor)
         self.refresh_editor(self.color_scheme)
@@ -383,3 +719,6 @@ class TextBlockUserData(QtGui.QTextBlockUserData):
         self.messages = []
         #: List of markers draw by a marker panel.
         self.markers = []
+        #: Cached index of the block words: tuple(block revision, index).
+        #: See :func:`pyqode.core.api.utils.get_block_words`.
+        self.words = None
@@ -4,6 +4,7 @@ This module contains utility functions/classes.
 """
 import functools
 import logging
+import re
 import weakref
 
 from pyqode.qt import QtCore, QtGui, QtWidgets
@@ -248,6 +249,22 @@ class TextHelper(object):
         text_cursor = self.word_under_cursor(True, text_cursor)
         return text_cursor
 
+    def visible_line_range(self):
+        """
+        Returns the numbers of the first and last visible lines.
+
+        Unlike :attr:`pyqode.core.api.CodeEdit.visible_blocks`, which is
+        updated when the editor is painted, the range is computed from the
+        current scrollbar position.
+
+        :return: tuple(first_line, last_line)
+        """
+        editor = self._editor
+        first = editor.firstVisibleBlock().blockNumber()
+        bottom = QtCore.QPoint(0, editor.viewport().height())
+        last = editor.cursorForPosition(bottom).blockNumber()
+        return first, max(first, last)
+
     def cursor_position(self):
         """
         Returns the QTextCursor position. The position is a tuple made up of
@@ -687,15 +704,15 @@ class TextHelper(object):
             additional_formats = layout.additionalFormats()
             sh = self._editor.syntax_highlighter
             if sh:
-                ref_formats = sh.color_scheme.formats
+                # the formats of strings and comments hold their color scheme
+                # key, see pyqode.core.api.FormatTable
+                key_property = sh.color_scheme.table.KEY_PROPERTY
                 for r in additional_formats:
                     if r.start <= pos < (r.start + r.length):
-                        for fmt_type in formats:
-                            is_user_obj = (r.format.objectType() ==
-                                           r.format.UserObject)
-                            if (ref_formats[fmt_type] == r.format and
-                                    is_user_obj):
-                                return True
+                        fmt = r.format
+                        if (fmt.objectType() == fmt.UserObject and
+                                fmt.property(key_property) in formats):
+                            return True
         return False
 
     def select_extended_word(self, continuation_chars=('.',)):
@@ -1057,6 +1074,39 @@ def get_block_symbol_data(editor, block):
     return parentheses, square_brackets, braces
 
 
+@memoized
+def _words_regex(separators):
+    return re.compile('[^%s]+' % re.escape(''.join(separators)))
+
+
+def get_block_words(editor, block):
+    """
+    Gets the index of the words of a text block: a dict that maps each word
+    to the list of columns where it appears in the block.
+
+    Words are delimited by :attr:`pyqode.core.api.CodeEdit.word_separators`.
+    The index is cached in the block user data and only rebuilt when the
+    block text changed.
+
+    :param editor: Code edit instance
+    :param block: block to index
+    """
+    from pyqode.core.api.syntax_highlighter import TextBlockUserData
+    usd = block.userData()
+    if usd is None:
+        usd = TextBlockUserData()
+        block.setUserData(usd)
+    cache = getattr(usd, 'words', None)
+    if cache is not None and cache[0] == block.revision():
+        return cache[1]
+    index = {}
+    regex = _words_regex(tuple(editor.word_separators))
+    for match in regex.finditer(block.text()):
+        index.setdefault(match.group(), []).append(match.start())
+    usd.words = (block.revision(), index)
+    return index
+
+
 def keep_tc_pos(func):
     """
     Cache text cursor position and restore it when the wrapped
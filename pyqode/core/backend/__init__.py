@@ -90,6 +90,8 @@ from .server import default_parser
 from .server import serve_forever
 from .workers import CodeCompletionWorker
 from .workers import DocumentWordsProvider
+from .workers import FindInFilesWorker
+from .workers import LintWorker
 from .workers import echo_worker
 
 
@@ -124,6 +126,8 @@ __all__ = [
     'serve_forever',
     'CodeCompletionWorker',
     'DocumentWordsProvider',
+    'FindInFilesWorker',
+    'LintWorker',
     'echo_worker',
     'NotConnected',
     'NotRunning'
@@ -16,10 +16,22 @@ A worker is always tightly coupled with its caller, so are the data.
     python2, which might happen in pyqode.python to support python2 syntax).
 
 """
+import codecs
+import fnmatch
+import hashlib
+import inspect
 import logging
+import os
 import re
 import sys
+import threading
+import time
 import traceback
+from collections import OrderedDict
+
+
+def _logger():
+    return logging.getLogger(__name__)
 
 
 def echo_worker(data):
@@ -200,7 +212,7 @@ def finditer_noregex(string, sub, whole_word):
 
 
 def findalliter(string, sub, regex=False, case_sensitive=False,
-                whole_word=False):
+                whole_word=False, pos=0, endpos=None):
     """
     Generator that finds all occurrences of ``sub`` in  ``string``
     :param string: string to parse
@@ -208,6 +220,10 @@ def findalliter(string, sub, regex=False, case_sensitive=False,
     :param regex: True to search using regex
     :param case_sensitive: True to match case, False to ignore case
     :param whole_word: True to returns only whole words
+    :param pos: position where the search starts (regex only). With a
+        regex, ``string`` can also be a bytes-like object (e.g. a mmap).
+    :param endpos: position where the search stops (regex only), None to
+        search until the end of ``string``.
     :return:
     """
     if not sub:
@@ -216,7 +232,9 @@ def findalliter(string, sub, regex=False, case_sensitive=False,
         flags = re.MULTILINE
         if not case_sensitive:
             flags |= re.IGNORECASE
-        for val in re.finditer(sub, string, flags):
+        if endpos is None:
+            endpos = len(string)
+        for val in re.compile(sub, flags).finditer(string, pos, endpos):
             yield val.span()
     else:
         if not case_sensitive:
@@ -244,3 +262,933 @@ def findall(data):
     return list(findalliter(
         data['string'], data['sub'], regex=data['regex'],
         whole_word=data['whole_word'], case_sensitive=data['case_sensitive']))
+
+
+def find_in_large_file(data):
+    """
+    Worker that finds the occurrences of a string (or regex) in a file,
+    without loading it: the file is memory mapped and searched by
+    :func:`findalliter`. Used by :class:`pyqode.core.widgets.LargeFileViewer`.
+
+    The search works on the encoded text, case insensitive searches only
+    ignore the case of ascii characters. The encoding must be ascii
+    compatible (e.g. utf-16 is not supported).
+
+    :param data: Request data dict::
+        {
+            'path': path of the file
+            'sub': string to search
+            'regex': True to consider sub as a regular expression
+            'whole_word': True to match whole words only.
+            'case_sensitive': True to match case, False to ignore case
+            'encoding': encoding of the file
+            'start': byte offset where the search starts
+            'end': byte offset where the search stops (optional)
+            'max_hits': maximum number of occurrences to return
+            'request_id': id of the request, returned as is
+        }
+    :return: dict with the list of occurrences ('hits', list of (start, end)
+        byte offsets), the offset where the search can be continued
+        ('next', None if the end of the file has been reached) and the
+        'request_id'.
+    """
+    import mmap
+    # the pattern is escaped after being encoded, the encoding must be
+    # ascii compatible (see LargeFileViewer.open)
+    sub = data['sub'].encode(data['encoding'])
+    if not data['regex']:
+        sub = re.escape(sub)
+    if data['whole_word']:
+        sub = br'\b' + sub + br'\b'
+    hits = []
+    next_start = None
+    with open(data['path'], 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return {'hits': hits, 'next': None,
+                    'request_id': data.get('request_id')}
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        matches = findalliter(mm, sub, regex=True, pos=data['start'],
+                              endpos=data.get('end'),
+                              case_sensitive=data['case_sensitive'])
+        try:
+            for start, end in matches:
+                if len(hits) == data['max_hits']:
+                    next_start = start
+                    break
+                hits.append((start, end))
+        finally:
+            # the regex scanner must release the buffer before the mmap is
+            # closed
+            matches.close()
+            del matches
+            mm.close()
+    return {'hits': hits, 'next': next_start,
+            'request_id': data.get('request_id')}
+
+
+def line_hunks(old_lines, new_lines):
+    """
+    Computes the differences between two lists of lines.
+
+    :param old_lines: list of lines
+    :param new_lines: list of lines
+    :return: list of hunks (first, last, lines): the old lines ``first`` to
+        ``last`` (excluded) are replaced by ``lines``. Hunks are sorted by
+        line number and do not overlap.
+    """
+    import difflib
+    # skip the common prefix and suffix, which usually are most of the file
+    # and SequenceMatcher is slow on long sequences
+    end = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < end and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < end - prefix and
+           old_lines[-suffix - 1] == new_lines[-suffix - 1]):
+        suffix += 1
+    old = old_lines[prefix:len(old_lines) - suffix]
+    new = new_lines[prefix:len(new_lines) - suffix]
+    hunks = []
+    if not old or not new:
+        if old or new:
+            hunks.append((prefix, prefix + len(old), new))
+        return hunks
+    matcher = difflib.SequenceMatcher(None, old, new)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            hunks.append((prefix + i1, prefix + i2, new[j1:j2]))
+    return hunks
+
+
+def diff_lines(data):
+    """
+    Worker that computes the line differences between two texts, see
+    :func:`line_hunks`. Used to reload a file that has changed on disk
+    without replacing the whole document.
+
+    :param data: Request data dict::
+        {
+            'old': old text
+            'new': new text
+        }
+    :return: list of hunks (first, last, lines)
+    """
+    return line_hunks(data['old'].split('\n'), data['new'].split('\n'))
+
+
+def worker_name(worker):
+    """
+    Returns the fully qualified name of a worker, as expected by the
+    workers that run other workers (e.g. :func:`run_checkers`).
+
+    :param worker: worker function or class, or its fully qualified name.
+    """
+    if isinstance(worker, str):
+        return worker
+    return '%s.%s' % (worker.__module__, worker.__name__)
+
+
+def run_checkers(data):
+    """
+    Worker that runs several checker workers on the same document, in a
+    single request (see :class:`pyqode.core.modes.CheckerCoordinatorMode`).
+
+    :param data: Request data dict::
+        {
+            'checkers': list of dict(worker=fully qualified name of the
+                        checker function or class, ignore_rules=[...]),
+            'code', 'path', 'encoding', 'max_line_length': common request
+                        data of the checkers,
+            ...: any other key is passed to the checkers
+        }
+    :return: dict(request_id=data['request_id'], results=list of the
+        results of each checker, in the order of the checkers)
+    """
+    from pyqode.core.backend.server import import_class
+    results = []
+    for checker in data['checkers']:
+        checker_data = dict(data)
+        del checker_data['checkers']
+        checker_data['ignore_rules'] = checker['ignore_rules']
+        try:
+            worker = import_class(checker['worker'])
+            if inspect.isclass(worker):
+                worker = worker()
+            ret_val = worker(checker_data)
+        except Exception:
+            _logger().exception('checker %r failed', checker['worker'])
+            ret_val = None
+        results.append(ret_val if ret_val is not None else [])
+    return {'request_id': data.get('request_id'), 'results': results}
+
+
+#: True once the pygments lexers have been patched, see :func:`patch_lexers`
+_lexers_patched = False
+
+
+def replace_pattern(tokens, new_pattern):
+    """ Given a RegexLexer token dictionary 'tokens', replace all patterns that
+        match the token specified in 'new_pattern' with 'new_pattern'.
+    """
+    for state in tokens.values():
+        for index, pattern in enumerate(state):
+            if isinstance(pattern, tuple) and pattern[1] == new_pattern[1]:
+                state[index] = new_pattern
+
+
+def patch_lexers():
+    """
+    Appends a state for multiline comments to the C, C++ and C# lexers.
+
+    Pygments lexes these comments with a single multiline regex, which does
+    not work when a document is lexed line by line (the syntax highlighter
+    lexes the edited lines only). This means that nested multiline comments
+    will appear to be valid C/C++, but this is better than the alternative
+    for now.
+
+    Both the syntax highlighter and :func:`tokenize` patch the lexers, so
+    that the lexer states of the GUI and of the backend are the same. The
+    lexers are patched once.
+    """
+    global _lexers_patched
+    if _lexers_patched:
+        return
+    _lexers_patched = True
+    from pygments.lexers import CLexer, CppLexer, CSharpLexer
+    from pygments.token import Comment
+    comment_start = (r'/\*', Comment.Multiline, 'comment')
+    comment_state = [(r'[^*/]', Comment.Multiline),
+                     (r'/\*', Comment.Multiline, '#push'),
+                     (r'\*/', Comment.Multiline, '#pop'),
+                     (r'[*/]', Comment.Multiline)]
+    # The C and C++ lexers inherit most of their states (comments included)
+    # from a common base class, the C# lexer has one token dictionary per
+    # level.
+    for klass in set(CLexer.__mro__ + CppLexer.__mro__):
+        if 'tokens' in vars(klass):
+            replace_pattern(klass.tokens, comment_start)
+    CLexer.tokens['comment'] = comment_state
+    CppLexer.tokens['comment'] = comment_state
+    for tokens in CSharpLexer.tokens.values():
+        replace_pattern(tokens, comment_start)
+        tokens['comment'] = comment_state
+
+
+def is_regex_lexer(lexer):
+    """
+    Checks if a lexer is a RegexLexer that uses the default lexing loop, the
+    state of such a lexer at the end of each line can be tracked by
+    :func:`tokenize`.
+    """
+    from pygments.lexer import RegexLexer
+    for klass in type(lexer).__mro__:
+        if klass is RegexLexer:
+            return True
+        if 'get_tokens_unprocessed' in vars(klass):
+            return False
+    return False
+
+
+def _lex_regex(lexer, text, stack, line_states):
+    """
+    Same as RegexLexer.get_tokens_unprocessed but appends the state stack at
+    the end of each line to ``line_states``.
+    """
+    from pygments.lexer import _TokenType
+    from pygments.token import Error, Whitespace
+    pos = 0
+    tokendefs = lexer._tokens
+    statestack = list(stack)
+    statetokens = tokendefs[statestack[-1]]
+    while 1:
+        for rexmatch, action, new_state in statetokens:
+            m = rexmatch(text, pos)
+            if m:
+                if action is not None:
+                    if type(action) is _TokenType:
+                        yield pos, action, m.group()
+                    else:
+                        for item in action(lexer, m):
+                            yield item
+                pos = m.end()
+                if new_state is not None:
+                    # state transition
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == '#pop':
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif state == '#push':
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(state)
+                    elif isinstance(new_state, int):
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == '#push':
+                        statestack.append(statestack[-1])
+                    else:
+                        assert False, "wrong state def: %r" % new_state
+                    statetokens = tokendefs[statestack[-1]]
+                line_states.extend([tuple(statestack)] * m.group().count('\n'))
+                break
+        else:
+            try:
+                if text[pos] == '\n':
+                    # at EOL, reset state to "root"
+                    statestack = ['root']
+                    statetokens = tokendefs['root']
+                    yield pos, Whitespace, '\n'
+                    line_states.append(('root',))
+                    pos += 1
+                    continue
+                yield pos, Error, text[pos]
+                pos += 1
+            except IndexError:
+                break
+    line_states.append(tuple(statestack))
+
+
+def tokenize(data):
+    """
+    Worker that lexes a document, or the end of a document, with a pygments
+    lexer in a single pass (see
+    :attr:`pyqode.core.modes.PygmentsSH.backend_lexing`).
+
+    Tokens are returned as runs, one list per line::
+
+        [length, token type index, length, token type index, ...]
+
+    :param data: Request data dict::
+        {
+            'code': text to lex, lines are separated by '\n'
+            'lexer': fully qualified name of the pygments lexer class
+            'stack': state stack of the lexer at the start of the text
+            'request_id', 'first_line': returned as is
+        }
+    :return: dict(request_id, first_line,
+        token_types=list of token type names (e.g. 'Literal.String'),
+        runs=list of runs (one per line),
+        stacks=list of the distinct lexer state stacks,
+        states=index of the state stack at the end of each line, None if the
+        lexer states cannot be tracked (not a RegexLexer))
+    """
+    from pyqode.core.backend.server import import_class
+    patch_lexers()
+    lexer = import_class(data['lexer'])()
+    text = data['code']
+    if is_regex_lexer(lexer):
+        line_states = []
+        tokens = _lex_regex(lexer, text, data.get('stack') or ['root'],
+                            line_states)
+    else:
+        line_states = None
+        tokens = lexer.get_tokens_unprocessed(text)
+    token_types = []
+    token_ids = {}
+    runs = [[]]
+    line_runs = runs[0]
+    for _, token, value in tokens:
+        try:
+            token_id = token_ids[token]
+        except KeyError:
+            token_id = token_ids[token] = len(token_types)
+            token_types.append('.'.join(token))
+        for i, part in enumerate(value.split('\n')):
+            if i:
+                line_runs = []
+                runs.append(line_runs)
+            if part:
+                if line_runs and line_runs[-1] == token_id:
+                    line_runs[-2] += len(part)
+                else:
+                    line_runs.append(len(part))
+                    line_runs.append(token_id)
+    stacks = None
+    states = None
+    if line_states is not None:
+        stacks = []
+        stack_ids = {}
+        states = []
+        for stack in line_states:
+            try:
+                states.append(stack_ids[stack])
+            except KeyError:
+                states.append(stack_ids.setdefault(stack, len(stacks)))
+                stacks.append(list(stack))
+    return {
+        'request_id': data.get('request_id'),
+        'first_line': data.get('first_line', 0),
+        'token_types': token_types,
+        'runs': runs,
+        'stacks': stacks,
+        'states': states
+    }
+
+
+def is_ignored(name, ignore_patterns):
+    """
+    Checks if a file or directory name matches one of the ignore patterns.
+
+    Ignore patterns are Unix shell-style wildcards, the same as the one used
+    by :meth:`pyqode.core.widgets.FileSystemTreeView.add_ignore_patterns`.
+
+    :param name: file or directory name (not a full path).
+    :param ignore_patterns: list of patterns.
+    """
+    for ptrn in ignore_patterns:
+        if fnmatch.fnmatch(name, ptrn):
+            return True
+    return False
+
+
+def walk_files(root, ignore_patterns=()):
+    """
+    Generator that yields the path of the files found recursively under
+    ``root``, skipping the files and directories that match one of the
+    ``ignore_patterns``.
+
+    :param root: root directory
+    :param ignore_patterns: list of Unix shell-style wildcards.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames
+                             if not is_ignored(d, ignore_patterns))
+        for name in sorted(filenames):
+            if not is_ignored(name, ignore_patterns):
+                yield os.path.join(dirpath, name)
+
+
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def read_text_file(path, encodings=('utf-8',), max_size=None):
+    """
+    Reads the content of a text file, cheaply detecting its encoding.
+
+    The encoding is detected from the byte order mark, if there is one.
+    Otherwise ``encodings`` are tried in order and we fallback to latin-1
+    (which never fails). Files that contains null bytes are considered as
+    binary files and are skipped.
+
+    :param path: path of the file to read.
+    :param encodings: list of encodings to try.
+    :param max_size: files that are bigger than max_size (in bytes) are
+        skipped.
+
+    :returns: the decoded text or None if the file is binary, too big or
+        cannot be read.
+    """
+    try:
+        if max_size and os.path.getsize(path) > max_size:
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+    except (IOError, OSError):
+        return None
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return data.decode(encoding, 'replace')
+    if b'\0' in data[:8192]:
+        return None
+    for encoding in encodings:
+        try:
+            return data.decode(encoding)
+        except (UnicodeDecodeError, LookupError):
+            pass
+    return data.decode('latin-1')
+
+
+def find_in_file(args):
+    """
+    Searches all occurrences of a string (or regex) in a file.
+
+    This function runs in the process pool of :class:`FindInFilesWorker`.
+
+    :param args: tuple(path, options) where options is the search request
+        data dict (see :class:`FindInFilesWorker`).
+
+    :returns: tuple(path, hits) where hits is a list of
+        (line, column, preview) tuples. Line and column are 0 based.
+    """
+    path, options = args
+    hits = []
+    text = read_text_file(path, options.get('encodings', ['utf-8']),
+                          options.get('max_file_size'))
+    if not text:
+        return path, hits
+    sub = options['sub']
+    regex = options['regex']
+    case_sensitive = options['case_sensitive']
+    whole_word = options['whole_word']
+    # quickly skip files that do not contain any occurrence
+    if not regex:
+        if case_sensitive and sub not in text:
+            return path, hits
+        if not case_sensitive and sub.lower() not in text.lower():
+            return path, hits
+    # split lines like the editor does: str.splitlines also splits on form
+    # feeds and other control characters, which would shift line numbers
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    for i, line in enumerate(text.split('\n')):
+        for start, end in findalliter(
+                line, sub, regex=regex, case_sensitive=case_sensitive,
+                whole_word=whole_word):
+            hits.append((i, start, line[:FindInFilesWorker.PREVIEW_LENGTH]))
+    return path, hits
+
+
+def lint_file(args):
+    """
+    Runs checker workers on a file.
+
+    This function runs in the process pool of :class:`LintWorker`.
+
+    :param args: tuple(path, options, known_hash) where options is the
+        request data dict (see :class:`LintWorker`) and known_hash the hash of
+        the file content the last time it was checked (or None).
+
+    :returns: tuple(path, content_hash, messages) where messages is None if
+        the content hash did not change (the file has not been checked), or a
+        list of (description, status, line, col, icon, color, path) tuples.
+    """
+    from pyqode.core.backend.server import import_class
+    path, options, known_hash = args
+    text = read_text_file(path, options.get('encodings', ['utf-8']),
+                          options.get('max_file_size'))
+    if text is None:
+        return path, None, []
+    content_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
+    if content_hash == known_hash:
+        return path, content_hash, None
+    messages = []
+    data = {
+        'code': text,
+        'path': path,
+        'encoding': 'utf-8',
+        'ignore_rules': options.get('ignore_rules', []),
+        'max_line_length': options.get('max_line_length', 79)
+    }
+    for checker in options['checkers']:
+        try:
+            worker = import_class(checker)
+            if inspect.isclass(worker):
+                worker = worker()
+            results = worker(dict(data)) or []
+        except Exception:
+            _logger().exception('checker %r failed on %r', checker, path)
+            continue
+        for msg in results:
+            # (description, status, line, [col], [icon], [color], [path])
+            msg = list(msg) + [None] * (7 - len(msg))
+            msg[6] = path
+            messages.append(tuple(msg))
+    return path, content_hash, messages
+
+
+class _PoolJob(object):
+    """
+    A job running in a background thread of the backend process, that maps
+    a function over a list of arguments using a pool of processes.
+
+    Subclasses implement :meth:`iter_args` and :meth:`process_result`.
+    """
+    #: function mapped over the arguments (must be a module level function)
+    function = None
+
+    def __init__(self, options):
+        self.options = options
+        self.nb_files = 0
+        self.finished = False
+        self.cancelled = False
+        self.lock = threading.Lock()
+        self.pool = None
+        #: time of the last poll request (or of the creation of the job)
+        self.last_poll = time.time()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+
+    def iter_args(self):
+        """ Returns an iterable of arguments for :attr:`function` """
+        raise NotImplementedError()
+
+    def process_result(self, result):
+        """ Processes a result, called with :attr:`lock` acquired """
+        raise NotImplementedError()
+
+    def run(self):
+        function = self.__class__.function
+        args = self.iter_args()
+        processes = self.options.get('processes')
+        results = None
+        if processes != 0:
+            try:
+                import multiprocessing
+                self.pool = multiprocessing.Pool(processes)
+            except (ImportError, OSError, NotImplementedError):
+                _logger().exception('failed to create process pool, '
+                                    'falling back to the backend process')
+                self.pool = None
+            else:
+                results = self.pool.imap_unordered(function, args,
+                                                   chunksize=8)
+        if results is None:
+            results = (function(arg) for arg in args)
+        try:
+            for result in results:
+                if self.cancelled:
+                    break
+                with self.lock:
+                    self.nb_files += 1
+                    self.process_result(result)
+        except Exception:
+            _logger().exception('%s failed', self.__class__.__name__)
+        finally:
+            if self.pool is not None:
+                self.pool.terminate()
+                self.pool = None
+            with self.lock:
+                self.finished = True
+
+
+class _FindInFilesJob(_PoolJob):
+    """
+    A find in files search running in a background thread of the backend
+    process.
+    """
+    function = staticmethod(find_in_file)
+
+    def __init__(self, options):
+        super(_FindInFilesJob, self).__init__(options)
+        self.hits = []
+
+    def iter_args(self):
+        options = self.options
+        paths = walk_files(options['root'], options.get('ignore_patterns', []))
+        return ((path, options) for path in paths)
+
+    def process_result(self, result):
+        path, hits = result
+        self.hits += [(path, l, c, p) for l, c, p in hits]
+
+    def pop_hits(self, max_hits):
+        with self.lock:
+            hits = self.hits[:max_hits]
+            del self.hits[:max_hits]
+            return hits, self.nb_files, self.finished and not self.hits
+
+
+class _PoolJobWorker(object):
+    """
+    Base class of the workers that run :class:`_PoolJob` instances, the
+    client polls the job for new results until it is finished.
+
+    A job that is not polled anymore (e.g. the client went away) is
+    cancelled and forgotten after :attr:`JOB_TIMEOUT` seconds.
+    """
+    #: Jobs that have not been polled for this number of seconds are
+    #: cancelled and their results are dropped.
+    JOB_TIMEOUT = 60
+
+    #: running jobs, maps the job identifiers to the jobs (subclasses have
+    #: their own dict)
+    _jobs = {}
+
+    def _start_job(self, job_id, job):
+        self._expire_jobs()
+        self.cancel(job_id)
+        self._jobs[job_id] = job
+        job.thread.start()
+
+    def _get_job(self, job_id):
+        self._expire_jobs()
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.last_poll = time.time()
+        return job
+
+    def _expire_jobs(self):
+        deadline = time.time() - self.JOB_TIMEOUT
+        for job_id, job in list(self._jobs.items()):
+            if job.last_poll < deadline:
+                _logger().debug('%s: job %s expired', self.__class__.__name__,
+                                job_id)
+                self.cancel(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancels a running job.
+
+        :param job_id: identifier of the job to cancel.
+        """
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job.cancelled = True
+
+
+class FindInFilesWorker(_PoolJobWorker):
+    """
+    Worker that searches a string (or a regex) in all the files of a
+    directory.
+
+    The search runs in a background thread of the backend process and files
+    are scanned in parallel by a pool of processes. Results are streamed back
+    to the client in batches: the client first starts a search and then
+    polls for new results until the search is finished. Searches that are
+    not polled for :attr:`JOB_TIMEOUT` seconds are cancelled.
+
+    Request data::
+
+        {
+            'action': 'start', 'poll' or 'cancel'
+            'search_id': unique search identifier (chosen by the client)
+
+            # start parameters:
+            'client_id': identifier of the client (optional), starting a
+                search cancels the other searches of the same client
+            'root': root directory
+            'sub': text to search
+            'regex': True to consider sub as a regular expression
+            'whole_word': True to match whole words only
+            'case_sensitive': True to match case
+            'ignore_patterns': list of Unix shell-style wildcards
+            'encodings': list of encodings to try (optional)
+            'max_file_size': size limit in bytes (optional)
+            'processes': size of the process pool, None to use the number
+                of cpu, 0 to search in the backend process (optional)
+        }
+
+    Results::
+
+        {
+            'search_id': the search identifier,
+            'hits': list of (path, line, column, preview),
+            'nb_files': number of files scanned so far,
+            'finished': True when the search is finished and all hits have
+                been sent.
+        }
+    """
+    #: Maximum number of hits sent back to the client per poll request.
+    BATCH_SIZE = 1000
+    #: Maximum length of the line preview of a hit
+    PREVIEW_LENGTH = 200
+
+    _jobs = {}
+
+    def __call__(self, data):
+        action = data.get('action', 'start')
+        search_id = data['search_id']
+        hits, nb_files, finished = [], 0, True
+        job = None if action != 'poll' else self._get_job(search_id)
+        if action == 'start':
+            client_id = data.get('client_id')
+            if client_id is not None:
+                for job_id, other in list(self._jobs.items()):
+                    if other.options.get('client_id') == client_id:
+                        self.cancel(job_id)
+            self._start_job(search_id, _FindInFilesJob(data))
+            finished = False
+        elif job is not None:
+            hits, nb_files, finished = job.pop_hits(self.BATCH_SIZE)
+            if finished:
+                self._jobs.pop(search_id, None)
+        else:
+            self.cancel(search_id)
+        return {'search_id': search_id, 'hits': hits, 'nb_files': nb_files,
+                'finished': finished}
+
+
+class _LintCache(object):
+    """
+    Cache of the messages of the files checked by :class:`LintWorker`, maps
+    (path, checkers, ignore_rules) to ((mtime, size), content_hash,
+    messages).
+
+    The cache is shared by the lint jobs (it is thread safe) and only keeps
+    the ``max_size`` most recently used entries.
+    """
+    def __init__(self, max_size):
+        #: Maximum number of entries.
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Returns the entry of ``key`` (and marks it as recently used), or
+        None.
+        """
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                return None
+            self._entries[key] = value
+            return value
+
+
+class _LintJob(_PoolJob):
+    """
+    A project wide analysis running in a background thread of the backend
+    process.
+    """
+    function = staticmethod(lint_file)
+
+    def __init__(self, options, cache):
+        super(_LintJob, self).__init__(options)
+        self.cache = cache
+        self.results = []
+        self.nb_messages = 0
+        self._stats = {}
+
+    def _cache_key(self, path):
+        return (path, tuple(self.options['checkers']),
+                tuple(self.options.get('ignore_rules', [])))
+
+    def iter_args(self):
+        options = self.options
+        if options.get('paths') is not None:
+            paths = options['paths']
+        else:
+            paths = walk_files(options['root'],
+                               options.get('ignore_patterns', []))
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stat = (stat.st_mtime, stat.st_size)
+            cached = self.cache.get(self._cache_key(path))
+            if cached is not None and cached[0] == stat:
+                # unchanged file, reuse the cached messages
+                with self.lock:
+                    self.nb_files += 1
+                    self.results.append((path, cached[2]))
+                continue
+            self._stats[path] = stat, cached
+            yield path, options, cached[1] if cached else None
+
+    def process_result(self, result):
+        path, content_hash, messages = result
+        stat, cached = self._stats.pop(path, (None, None))
+        if messages is None:
+            # content did not change (e.g. the file has been touched)
+            messages = cached[2]
+        self.cache[self._cache_key(path)] = (stat, content_hash, messages)
+        self.results.append((path, messages))
+
+    def pop_results(self, max_messages):
+        with self.lock:
+            count = nb_messages = 0
+            while count < len(self.results) and nb_messages < max_messages:
+                nb_messages += len(self.results[count][1])
+                count += 1
+            results = self.results[:count]
+            del self.results[:count]
+            return (results, self.nb_files,
+                    self.finished and not self.results)
+
+
+class LintWorker(_PoolJobWorker):
+    """
+    Worker that runs checkers on all the files of a project (or on a list of
+    files), e.g. to fill an :class:`pyqode.core.widgets.ErrorsTable` with all
+    the errors of a project.
+
+    The analysis runs in a background thread of the backend process and files
+    are checked in parallel by a pool of processes. The messages of the files
+    whose modification time, size and content did not change since the last
+    analysis (with the same checkers) are taken from a cache, which keeps the
+    results of the 10000 most recently checked files.
+
+    Like :class:`FindInFilesWorker`, results are streamed back to the
+    client: the client first starts an analysis and then polls for new
+    results until the analysis is finished.
+
+    Request data::
+
+        {
+            'action': 'start', 'poll' or 'cancel'
+            'lint_id': unique analysis identifier (chosen by the client)
+
+            # start parameters:
+            'checkers': list of fully qualified names of checker workers
+                (functions or classes, see
+                :class:`pyqode.core.modes.CheckerMode`)
+            'paths': list of files to check, or None to check all files
+                found under root
+            'root': root directory
+            'ignore_patterns': list of Unix shell-style wildcards
+            'ignore_rules': ignore rules passed to the checkers (optional)
+            'max_line_length': passed to the checkers (optional)
+            'encodings': list of encodings to try (optional)
+            'max_file_size': size limit in bytes (optional)
+            'processes': size of the process pool, None to use the number
+                of cpu, 0 to check files in the backend process (optional)
+        }
+
+    Results::
+
+        {
+            'lint_id': the analysis identifier,
+            'results': list of (path, messages) where messages is the list
+                of (description, status, line, col, icon, color, path) of
+                the file (suitable for
+                :class:`pyqode.core.modes.CheckerMessage`),
+            'nb_files': number of files checked so far,
+            'finished': True when the analysis is finished and all results
+                have been sent.
+        }
+    """
+    #: Approximate maximum number of messages sent back per poll request.
+    BATCH_SIZE = 5000
+
+    _jobs = {}
+    #: messages of the most recently checked files
+    _cache = _LintCache(max_size=10000)
+
+    def __call__(self, data):
+        action = data.get('action', 'start')
+        lint_id = data['lint_id']
+        results, nb_files, finished = [], 0, True
+        job = None if action != 'poll' else self._get_job(lint_id)
+        if action == 'start':
+            self._start_job(lint_id, _LintJob(data, self._cache))
+            finished = False
+        elif job is not None:
+            results, nb_files, finished = job.pop_results(self.BATCH_SIZE)
+            if finished:
+                self._jobs.pop(lint_id, None)
+        else:
+            self.cancel(lint_id)
+        return {'lint_id': lint_id, 'results': results, 'nb_files': nb_files,
+                'finished': finished}
@@ -16,10 +16,18 @@ for a specific file path)
 We do not store editor styles and settings here. Those kind of settings are
 better handled at the application level.
 
+This module also contains the on-disk cache of the highlighting of files
+(:class:`HighlightCache`).
+
 """
+import hashlib
 import json
 import locale
 import logging
+import os
+import re
+import tempfile
+import zlib
 from pyqode.qt import QtCore
 
 try:
@@ -151,5 +159,149 @@ class Cache(object):
         self._settings.setValue('cachedCursorPosition', json.dumps(map))
 
 
+class HighlightCache(object):
+    """
+    On-disk cache of the highlighting of files: token runs and fold levels
+    of each block, see
+    :attr:`pyqode.core.managers.FileManager.highlight_cache`.
+
+    Each entry is stored in its own (compressed) file, named after a hash of
+    the file content and of the highlighter id (lexer, fold detector and
+    highlighter version). When the size of the cache directory exceeds
+    :attr:`max_size`, the least recently used entries are removed.
+    """
+    #: names of the entries (sha1 hex digests, see :meth:`key`)
+    _KEY_REGEX = re.compile(r'^[0-9a-f]{40}$')
+
+    def __init__(self, directory=None, max_size=50 * 1024 * 1024):
+        """
+        :param directory: cache directory. Default is a ``highlight``
+            directory in the user cache directory.
+        :param max_size: maximum size of the cache directory (in bytes).
+        """
+        if directory is None:
+            directory = self.default_directory()
+        #: Cache directory
+        self.directory = directory
+        #: Maximum size of the cache directory (in bytes).
+        self.max_size = max_size
+
+    @staticmethod
+    def default_directory():
+        """
+        Returns the default cache directory.
+        """
+        try:
+            root = QtCore.QStandardPaths.writableLocation(
+                QtCore.QStandardPaths.CacheLocation)
+        except AttributeError:
+            # PyQt4
+            root = os.path.join(os.path.expanduser('~'), '.cache', 'pyqode')
+        return os.path.join(root, 'highlight')
+
+    @staticmethod
+    def key(content, highlighter_id):
+        """
+        Computes the key of the entry of a file.
+
+        :param content: file content
+        :param highlighter_id: id of the highlighter, see
+            :meth:`pyqode.core.modes.PygmentsSH.highlighter_id`
+        """
+        sha = hashlib.sha1(content.encode('utf-8', 'replace'))
+        sha.update(highlighter_id.encode('utf-8'))
+        return sha.hexdigest()
+
+    def get(self, key):
+        """
+        Gets an entry, returns None if there is no entry for the key.
+
+        :param key: entry key, see :meth:`key`.
+        """
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            entry = json.loads(zlib.decompress(data).decode('utf-8'))
+        except (IOError, OSError, ValueError, zlib.error):
+            return None
+        try:
+            # the entry is now the most recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry
+
+    def set(self, key, entry):
+        """
+        Stores an entry, then removes the least recently used entries if the
+        cache is too big.
+
+        :param key: entry key, see :meth:`key`.
+        :param entry: entry, a dict that can be serialized to json.
+        """
+        data = zlib.compress(json.dumps(entry).encode('utf-8'))
+        try:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory,
+                                            suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            path = os.path.join(self.directory, key)
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            _logger().exception('failed to write highlight cache entry')
+            return
+        self._shrink()
+
+    def clear(self):
+        """
+        Removes all the entries. The other files of the cache directory are
+        kept.
+        """
+        for name, _, _ in self._entries():
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _entries(self):
+        """
+        Lists the cache entries. Only the files named after a key are
+        entries: the other files of the directory (e.g. the temporary files
+        that another process is writing) are left untouched.
+        """
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not self._KEY_REGEX.match(name):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((name, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _shrink(self):
+        entries = self._entries()
+        size = sum(entry[2] for entry in entries)
+        entries.sort(key=lambda entry: entry[1])
+        for name, _, entry_size in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            size -= entry_size
+
+
 def _logger():
     return logging.getLogger(__name__)
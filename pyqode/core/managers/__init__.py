@@ -14,7 +14,7 @@ A manager is class that takes care of a specific aspect of CodeEdit:
 """
 from .backend import BackendManager
 from .decorations import TextDecorationsManager
-from .file import FileManager
+from .file import FileManager, SizeTier
 from .modes import ModesManager
 from .panels import PanelsManager
 
@@ -24,5 +24,6 @@ __all__ = [
     'FileManager',
     'ModesManager',
     'PanelsManager',
+    'SizeTier',
     'TextDecorationsManager',
 ]
@@ -1,22 +1,249 @@
 """
 Contains the text decorations manager
 """
+import bisect
+import contextlib
 import logging
+from collections import OrderedDict
+
+from pyqode.core.api.decoration import TextDecoration
 from pyqode.core.api.manager import Manager
+from pyqode.core.api.utils import TextHelper
+from pyqode.qt import QtGui
 
 
 def _logger():
     return logging.getLogger(__name__)
 
 
+def _start(decoration):
+    return decoration.cursor.selectionStart()
+
+
+def _end(decoration):
+    return decoration.cursor.selectionEnd()
+
+
+def _bisect(items, value, key, right=True):
+    """ bisect.bisect_left/right on ``[key(item) for item in items]`` """
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        item_value = key(items[mid])
+        if value < item_value or (not right and value == item_value):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class _IntervalNode(object):
+    __slots__ = ('center', 'left', 'right', 'by_start', 'by_end')
+
+    def __init__(self, document, position):
+        #: text cursor, the center follows the text changes
+        self.center = QtGui.QTextCursor(document)
+        self.center.setPosition(position)
+        self.left = None
+        self.right = None
+        #: decorations that contain the center, sorted by start
+        self.by_start = []
+        #: the same decorations, sorted by end
+        self.by_end = []
+
+
+class _IntervalTree(object):
+    """
+    Centered interval tree of text decorations.
+
+    The centers of the nodes are text cursors and the bounds of the
+    decorations are read from their cursors. Text changes move all of them
+    the same way (the order of the positions is kept), so the tree does not
+    need to be updated when the text changes.
+    """
+    def __init__(self, document, decorations):
+        self._document = document
+        #: maps a decoration to the node that holds it
+        self._nodes = {}
+        #: depth of the deepest node
+        self.depth = 0
+        self._root = self._build(sorted(decorations, key=_start), 1)
+
+    def _build(self, decorations, depth):
+        """ Builds a sub tree, ``decorations`` are sorted by start. """
+        if not decorations:
+            return None
+        self.depth = max(self.depth, depth)
+        center = _start(decorations[len(decorations) // 2])
+        node = _IntervalNode(self._document, center)
+        left = []
+        right = []
+        for deco in decorations:
+            if _end(deco) < center:
+                left.append(deco)
+            elif _start(deco) > center:
+                right.append(deco)
+            else:
+                node.by_start.append(deco)
+                self._nodes[deco] = node
+        node.by_end = sorted(node.by_start, key=_end)
+        node.left = self._build(left, depth + 1)
+        node.right = self._build(right, depth + 1)
+        return node
+
+    def insert(self, decoration):
+        start, end = _start(decoration), _end(decoration)
+        parent = None
+        node = self._root
+        depth = 1
+        while node is not None:
+            center = node.center.position()
+            if end < center:
+                parent, node = node, node.left
+            elif start > center:
+                parent, node = node, node.right
+            else:
+                node.by_start.insert(
+                    _bisect(node.by_start, start, _start), decoration)
+                node.by_end.insert(
+                    _bisect(node.by_end, end, _end), decoration)
+                self._nodes[decoration] = node
+                return
+            depth += 1
+        node = _IntervalNode(self._document, start)
+        node.by_start.append(decoration)
+        node.by_end.append(decoration)
+        self._nodes[decoration] = node
+        self.depth = max(self.depth, depth)
+        if parent is None:
+            self._root = node
+        elif end < parent.center.position():
+            parent.left = node
+        else:
+            parent.right = node
+
+    def remove(self, decoration):
+        node = self._nodes.pop(decoration)
+        for items, key in ((node.by_start, _start), (node.by_end, _end)):
+            i = _bisect(items, key(decoration), key, right=False)
+            while items[i] is not decoration:
+                i += 1
+            del items[i]
+
+    def intersecting(self, start, end):
+        """
+        Returns the decorations that intersect the [start, end] interval, in
+        no particular order.
+        """
+        found = []
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            center = node.center.position()
+            if end < center:
+                for deco in node.by_start:
+                    if _start(deco) > end:
+                        break
+                    if _end(deco) >= start:
+                        found.append(deco)
+            elif start > center:
+                for deco in reversed(node.by_end):
+                    if _end(deco) < start:
+                        break
+                    if _start(deco) <= end:
+                        found.append(deco)
+            else:
+                found.extend(deco for deco in node.by_start
+                             if _start(deco) <= end and _end(deco) >= start)
+            if start <= center:
+                nodes.append(node.left)
+            if end >= center:
+                nodes.append(node.right)
+        return found
+
+
 class TextDecorationsManager(Manager):
     """
     Manages the collection of TextDecoration that have been set on the editor
     widget.
+
+    Decorations are stored in buckets, one per draw order, so that adding,
+    removing and looking up a decoration does not require to sort or scan the
+    whole collection. Decorations of the same draw order are kept in insertion
+    order.
+
+    Use :meth:`append_many`, :meth:`remove_many` or :meth:`batch` to change
+    many decorations at once: the extra selections of the editor are then
+    updated only once::
+
+        with editor.decorations.batch():
+            for deco in decorations:
+                editor.decorations.append(deco)
+
+    Decorations found at a given position, or in a range of lines, are
+    looked up in an interval tree (see :meth:`at_position` and
+    :meth:`intersecting`). The tree is built the first time it is needed
+    and then updated when decorations are added or removed. It follows the
+    text changes by itself, since the bounds of the decorations are text
+    cursors: a decoration must not be moved while it is in the manager,
+    remove it and add it again instead.
+
+    When there are more than :attr:`CULLING_THRESHOLD` decorations, only the
+    decorations that intersect the visible lines, plus :attr:`margin` lines,
+    are given to the editor (QPlainTextEdit goes through every extra
+    selection each time it paints). The extra selections are updated when
+    the editor is scrolled or resized out of that area and when lines are
+    added or removed.
     """
+    #: Number of decorations above which only the decorations that are close
+    #: to the viewport are set as extra selections.
+    CULLING_THRESHOLD = 500
+
+    @property
+    def clicked(self):
+        """
+        Signal emitted when a decoration has been clicked, the decoration is
+        passed as parameter.
+        """
+        return self._signals.clicked
+
     def __init__(self, editor):
         super(TextDecorationsManager, self).__init__(editor)
-        self._decorations = []
+        #: maps a draw order to an ordered set of decorations
+        self._buckets = {}
+        #: sorted list of the draw orders that have a bucket
+        self._draw_orders = []
+        #: maps a decoration to the draw order it was added with
+        self._orders = {}
+        #: maps a decoration to its insertion rank (for sorting)
+        self._ranks = {}
+        self._next_rank = 0
+        #: sorted list of decorations, None when it needs to be rebuilt
+        self._sorted = []
+        #: True if the extra selections must be updated at the end of the
+        #: current batch
+        self._dirty = False
+        self._batch_level = 0
+        #: interval tree, None when it needs to be rebuilt
+        self._tree = None
+        #: Number of lines, above and below the visible lines, whose
+        #: decorations are set as extra selections when culling is active.
+        self.margin = 100
+        #: range of lines whose decorations have been set on the editor, None
+        #: if all decorations have been set
+        self._window = None
+        self._signals = TextDecoration.Signals()
+        self._signals.clicked.connect(self._on_decoration_clicked)
+        try:
+            editor.updateRequest.connect(self._on_update_request)
+            editor.blockCountChanged.connect(self._on_block_count_changed)
+        except AttributeError:
+            # QTextEdit, decorations are never culled
+            self._culling = False
+        else:
+            self._culling = True
 
     def append(self, decoration):
         """
@@ -25,14 +252,26 @@ class TextDecorationsManager(Manager):
         :param decoration: Text decoration to add
         :type decoration: pyqode.core.api.TextDecoration
         """
-        if decoration not in self._decorations:
-            self._decorations.append(decoration)
-            self._decorations = sorted(
-                self._decorations, key=lambda sel: sel.draw_order)
-            self.editor.setExtraSelections(self._decorations)
+        if self._add(decoration):
+            self._update()
             return True
         return False
 
+    def append_many(self, decorations):
+        """
+        Adds a list of text decorations, the editor is updated only once.
+
+        :param decorations: Text decorations to add
+        :return: the number of decorations that were added
+        """
+        count = 0
+        for decoration in decorations:
+            if self._add(decoration):
+                count += 1
+        if count:
+            self._update()
+        return count
+
     def remove(self, decoration):
         """
         Removes a text decoration from the editor.
@@ -40,26 +279,184 @@ class TextDecorationsManager(Manager):
         :param decoration: Text decoration to remove
         :type decoration: pyqode.core.api.TextDecoration
         """
-        try:
-            self._decorations.remove(decoration)
-            self.editor.setExtraSelections(self._decorations)
+        if self._remove(decoration):
+            self._update()
             return True
-        except ValueError:
-            return False
+        return False
+
+    def remove_many(self, decorations):
+        """
+        Removes a list of text decorations, the editor is updated only once.
+
+        :param decorations: Text decorations to remove
+        :return: the number of decorations that were removed
+        """
+        count = 0
+        for decoration in decorations:
+            if self._remove(decoration):
+                count += 1
+        if count:
+            self._update()
+        return count
 
     def clear(self):
         """
         Removes all text decoration from the editor.
 
         """
-        self._decorations[:] = []
+        self._buckets.clear()
+        self._draw_orders[:] = []
+        self._orders.clear()
+        self._ranks.clear()
+        self._sorted = []
+        self._tree = None
+        self._window = None
+        if self._batch_level:
+            self._dirty = True
+            return
         try:
-            self.editor.setExtraSelections(self._decorations)
+            self.editor.setExtraSelections(self._sorted)
         except RuntimeError:
             pass
 
+    def at_position(self, position):
+        """
+        Returns the decorations whose selection contains ``position``, sorted
+        by draw order.
+
+        :param position: text position
+        """
+        return self.intersecting(position, position)
+
+    def intersecting(self, start, end):
+        """
+        Returns the decorations whose selection intersects the
+        [start, end] interval, sorted by draw order.
+
+        :param start: start position
+        :param end: end position
+        """
+        found = self._get_tree().intersecting(start, end)
+        found.sort(key=lambda deco: (self._orders[deco], self._ranks[deco]))
+        return found
+
+    def intersecting_blocks(self, first, last):
+        """
+        Returns the decorations that intersect the lines ``first`` to
+        ``last`` (included), sorted by draw order.
+
+        :param first: first line number
+        :param last: last line number
+        """
+        doc = self.editor.document()
+        start = doc.findBlockByNumber(first).position()
+        block = doc.findBlockByNumber(last)
+        if not block.isValid():
+            block = doc.lastBlock()
+        return self.intersecting(start, block.position() + block.length())
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager that defers the update of the editor's extra
+        selections until the end of the block. Batches can be nested, the
+        editor is updated when the outermost batch ends.
+        """
+        self._batch_level += 1
+        try:
+            yield self
+        finally:
+            self._batch_level -= 1
+            if not self._batch_level and self._dirty:
+                self._update()
+
+    def _add(self, decoration):
+        if decoration in self._orders:
+            return False
+        order = decoration.draw_order
+        try:
+            bucket = self._buckets[order]
+        except KeyError:
+            bucket = self._buckets[order] = OrderedDict()
+            bisect.insort(self._draw_orders, order)
+        bucket[decoration] = None
+        self._orders[decoration] = order
+        self._ranks[decoration] = self._next_rank
+        self._next_rank += 1
+        self._sorted = None
+        if self._tree is not None:
+            self._tree.insert(decoration)
+            if self._tree.depth > 2 * len(self._orders).bit_length() + 8:
+                # unbalanced, rebuild it when needed
+                self._tree = None
+        return True
+
+    def _remove(self, decoration):
+        try:
+            order = self._orders.pop(decoration)
+        except KeyError:
+            return False
+        bucket = self._buckets[order]
+        del bucket[decoration]
+        if not bucket:
+            del self._buckets[order]
+            self._draw_orders.remove(order)
+        del self._ranks[decoration]
+        self._sorted = None
+        if self._tree is not None:
+            self._tree.remove(decoration)
+        return True
+
+    def _decorations(self):
+        if self._sorted is None:
+            self._sorted = [deco for order in self._draw_orders
+                            for deco in self._buckets[order]]
+        return self._sorted
+
+    def _get_tree(self):
+        if self._tree is None:
+            self._tree = _IntervalTree(self.editor.document(), self._orders)
+        return self._tree
+
+    @staticmethod
+    def _on_decoration_clicked(decoration):
+        # forward to the decoration's own signal, if someone connected to it
+        signals = getattr(decoration, '_signals', None)
+        if signals is not None:
+            signals.clicked.emit(decoration)
+
+    def _update(self):
+        if self._batch_level:
+            self._dirty = True
+            return
+        self._dirty = False
+        if not self._culling or len(self._orders) <= self.CULLING_THRESHOLD:
+            self._window = None
+            self.editor.setExtraSelections(self._decorations())
+        else:
+            first, last = TextHelper(self.editor).visible_line_range()
+            self._window = max(0, first - self.margin), last + self.margin
+            self.editor.setExtraSelections(
+                self.intersecting_blocks(*self._window))
+
+    def _on_update_request(self, rect, delta_y):
+        if self._window is None or self._batch_level:
+            return
+        if delta_y or rect.contains(self.editor.viewport().rect()):
+            first, last = TextHelper(self.editor).visible_line_range()
+            if first < self._window[0] or last > self._window[1]:
+                self._update()
+
+    def _on_block_count_changed(self, *args):
+        # decorations that were out of the window might have moved in it
+        if self._window is not None:
+            self._update()
+
+    def __contains__(self, decoration):
+        return decoration in self._orders
+
     def __iter__(self):
-        return iter(self._decorations)
+        return iter(list(self._decorations()))
 
     def __len__(self):
-        return len(self._decorations)
+        return len(self._orders)
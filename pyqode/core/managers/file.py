@@ -13,7 +13,7 @@ import mimetypes
 import os
 from pyqode.core.api.manager import Manager
 from pyqode.core.api.utils import TextHelper
-from pyqode.qt import QtCore, QtWidgets
+from pyqode.qt import QtCore, QtGui, QtWidgets
 from pyqode.core.cache import Cache
 
 
@@ -26,6 +26,44 @@ def _logger():
     return logging.getLogger(__name__)
 
 
+class SizeTier(object):
+    """
+    Degradation profile of the files whose size is at least
+    :attr:`min_size`, see :attr:`FileManager.size_tiers`.
+
+    Modes and panels are designated by their class name, a name also matches
+    the subclasses (e.g. ``'CheckerMode'`` matches all the checkers).
+    """
+    def __init__(self, min_size, keep=None, disable=(), fast_path=False):
+        """
+        :param min_size: minimum file size (in bytes).
+        :param keep: names of the modes and panels that stay enabled, None
+            to keep all of them (except the ones in ``disable``).
+        :param disable: names of the modes and panels that are disabled.
+        :param fast_path: True to load the file as fast as possible: tabs are
+            not replaced and the highlight cache is not used.
+        """
+        #: Minimum file size (in bytes)
+        self.min_size = min_size
+        #: Names of the modes and panels that stay enabled, None for all.
+        self.keep = keep
+        #: Names of the modes and panels that are disabled.
+        self.disable = disable
+        #: Load the file as fast as possible
+        self.fast_path = fast_path
+
+    def is_enabled(self, mode):
+        """
+        Tells whether a mode (or a panel) stays enabled.
+
+        :param mode: mode or panel instance.
+        """
+        names = set(klass.__name__ for klass in type(mode).__mro__)
+        if names.intersection(self.disable):
+            return False
+        return self.keep is None or bool(names.intersection(self.keep))
+
+
 class FileManager(Manager):
     """
     Helps manage file operations:
@@ -135,13 +173,30 @@ class FileManager(Manager):
         is superior to the limit, then we disabled syntax highlighting, code
         folding,... to improve the load time and the runtime performances.
 
+        This is the minimum size of the biggest tier of :attr:`size_tiers`,
+        None if there is no tier. Setting the limit when there is no tier
+        adds a tier that disables all the modes and panels.
+
         Default is 10MB.
         """
-        return self._limit
+        if not self.size_tiers:
+            return None
+        return self.size_tiers[-1].min_size
 
     @file_size_limit.setter
     def file_size_limit(self, value):
-        self._limit = value
+        if self.size_tiers:
+            self.size_tiers[-1].min_size = value
+        else:
+            self.size_tiers.append(SizeTier(value, keep=()))
+
+    @property
+    def size_tier(self):
+        """
+        Returns the :class:`SizeTier` used for the current file, None if the
+        file is smaller than all the tiers.
+        """
+        return self._tier
 
     def _get_icon(self):
         return QtWidgets.QFileIconProvider().icon(QtCore.QFileInfo(self.path))
@@ -153,7 +208,24 @@ class FileManager(Manager):
             load/save.
         """
         super(FileManager, self).__init__(editor)
-        self._limit = 10000000
+        #: Degradation profiles of big files, sorted by size: when a file is
+        #: opened, the modes and panels that are not kept by the tier of the
+        #: file size are disabled (see :class:`SizeTier`). They are enabled
+        #: again when a smaller file is opened.
+        self.size_tiers = [
+            SizeTier(1000000, disable=[
+                'FoldingPanel', 'CheckerMode', 'CheckerPanel',
+                'GlobalCheckerPanel', 'OccurrencesHighlighterMode',
+                'OutlineMode', 'CodeCompletionMode']),
+            SizeTier(10000000, keep=[
+                'LineNumberPanel', 'SearchAndReplacePanel', 'EncodingPanel',
+                'ReadOnlyPanel', 'CaretLineHighlighterMode',
+                'FileWatcherMode', 'ZoomMode'], fast_path=True)
+        ]
+        self._tier = None
+        #: modes and panels disabled by the current tier, with their
+        #: visibility
+        self._tier_disabled = []
         self._path = ''
         #: File mimetype
         self.mimetype = ''
@@ -181,6 +253,20 @@ class FileManager(Manager):
         #: If true, automatically detects file EOL and use it instead of the
         #: preferred EOL when saving files.
         self._autodetect_eol = True
+        #: :class:`pyqode.core.cache.HighlightCache` used to restore the
+        #: highlighting (tokens and fold levels) of the files that have
+        #: already been opened, so that they are colorized and folded
+        #: immediately. None (default) to disable the cache.
+        self.highlight_cache = None
+        #: Number of lines above which the differences between the document
+        #: and the file are computed in the backend process when the file is
+        #: reloaded (see :meth:`reload_changes`).
+        self.backend_diff_threshold = 10000
+        #: path, document revision and callback of the pending reload
+        self._diff_request = None
+        #: Number of bytes of the file read by the last call to :meth:`open`
+        #: or :meth:`reload_changes` (a growing file may be bigger now).
+        self.read_size = 0
 
     @staticmethod
     def get_mimetype(path):
@@ -236,23 +322,11 @@ class FileManager(Manager):
                 pass
             else:
                 encoding = cached_encoding
-        enable_modes = os.path.getsize(path) < self._limit
-        for m in self.editor.modes:
-            if m.enabled:
-                m.enabled = enable_modes
+        tier = self._apply_size_tier(os.path.getsize(path))
+        fast_path = tier is not None and tier.fast_path
         # open file and get its content
         try:
-            with open(path, 'Ur', encoding=encoding) as file:
-                content = file.read()
-                if self.autodetect_eol:
-                    self._eol = file.newlines
-                    if isinstance(self._eol, tuple):
-                        self._eol = self._eol[0]
-                    if self._eol is None:
-                        # empty file has no newlines
-                        self._eol = self.EOL.string(self.preferred_eol)
-                else:
-                    self._eol = self.EOL.string(self.preferred_eol)
+            content = self._read(path, encoding)
         except (UnicodeDecodeError, UnicodeError) as e:
             try:
                 from pyqode.core.panels import EncodingPanel
@@ -266,11 +340,24 @@ class FileManager(Manager):
             settings.set_file_encoding(path, encoding)
             self._encoding = encoding
             # replace tabs by spaces
-            if self.replace_tabs_by_spaces:
-                content = content.replace("\t", " " * self.editor.tab_length)
+            if self.replace_tabs_by_spaces and not fast_path:
+                content = self._replace_tabs(content)
+            if self.highlight_cache is not None and not fast_path:
+                try:
+                    self.editor.syntax_highlighter.use_highlight_cache(
+                        self.highlight_cache)
+                except AttributeError:
+                    # no syntax highlighter, or it does not support the cache
+                    pass
             # set plain text
             self.editor.setPlainText(
                 content, self.get_mimetype(path), self.encoding)
+            try:
+                # the highlighter has not been used (e.g. disabled because
+                # the file is too big)
+                self.editor.syntax_highlighter.use_highlight_cache(None)
+            except AttributeError:
+                pass
             self.editor.setDocumentTitle(self.editor.file.name)
             ret_val = True
             _logger().debug('file open: %s', path)
@@ -280,6 +367,68 @@ class FileManager(Manager):
         self._check_for_readonly()
         return ret_val
 
+    def _read(self, path, encoding):
+        """
+        Reads the content of a file and detects its EOL convention.
+
+        :raises: UnicodeDecodeError
+        """
+        with open(path, 'Ur', encoding=encoding) as file:
+            # size before reading, in case the exact number of bytes read
+            # cannot be known
+            self.read_size = os.fstat(file.fileno()).st_size
+            content = file.read()
+            try:
+                self.read_size = file.buffer.tell()
+            except (AttributeError, IOError, OSError):
+                pass
+            if self.autodetect_eol:
+                self._eol = file.newlines
+                if isinstance(self._eol, tuple):
+                    self._eol = self._eol[0]
+                if self._eol is None:
+                    # empty file has no newlines
+                    self._eol = self.EOL.string(self.preferred_eol)
+            else:
+                self._eol = self.EOL.string(self.preferred_eol)
+        return content
+
+    def _replace_tabs(self, content):
+        return content.replace("\t", " " * self.editor.tab_length)
+
+    def _apply_size_tier(self, size):
+        """
+        Enables the modes and panels disabled by the previous tier, then
+        disables the ones that are not kept by the tier of ``size``.
+
+        :returns: the tier, None if the file is smaller than all the tiers.
+        """
+        for mode, visible in self._tier_disabled:
+            if mode.editor is None:
+                # removed from the editor in the meantime
+                continue
+            mode.enabled = True
+            if visible:
+                mode.setVisible(True)
+        self._tier_disabled[:] = []
+        self._tier = None
+        for tier in self.size_tiers:
+            if size >= tier.min_size:
+                self._tier = tier
+        if self._tier is None:
+            return None
+        _logger().debug('file size: %d, using size tier %d', size,
+                        self._tier.min_size)
+        panels = list(self.editor.panels)
+        for mode in list(self.editor.modes) + panels:
+            if mode.enabled and not self._tier.is_enabled(mode):
+                visible = mode in panels and not mode.isHidden()
+                mode.enabled = False
+                if visible:
+                    mode.setVisible(False)
+                self._tier_disabled.append((mode, visible))
+        return self._tier
+
     def _check_for_readonly(self):
         self.read_only = not os.access(self.path, os.W_OK)
         self.editor.setReadOnly(self.read_only)
@@ -304,6 +453,109 @@ class FileManager(Manager):
         self.open(self.path, encoding=encoding,
                   use_cached_encoding=False)
 
+    def reload_changes(self, callback=None):
+        """
+        Reloads the file after it changed on disk by applying the
+        differences between the document and the file, instead of
+        replacing the whole text: the lines that did not change keep their
+        highlighting, fold state and decorations, and the reload can be
+        undone.
+
+        The differences are computed in the backend process if the document
+        has more than :attr:`backend_diff_threshold` lines (and the backend
+        is running). The file is opened again (see :meth:`open`) if it
+        cannot be decoded or if it moved to another size tier.
+
+        :param callback: optional function called once the document has
+            been updated.
+        """
+        path = self.path
+        tier = None
+        for size_tier in self.size_tiers:
+            if os.path.getsize(path) >= size_tier.min_size:
+                tier = size_tier
+        content = None
+        if tier is self._tier:
+            try:
+                content = self._read(path, self.encoding)
+            except (UnicodeDecodeError, UnicodeError):
+                pass
+        if content is None:
+            # let open handle the decoding errors and the size tiers
+            self.open(path)
+            if callback:
+                callback()
+            return
+        if self.replace_tabs_by_spaces and not (
+                tier is not None and tier.fast_path):
+            content = self._replace_tabs(content)
+        document = self.editor.document()
+        self._diff_request = path, document.revision(), callback
+        if document.blockCount() > self.backend_diff_threshold:
+            from pyqode.core.backend import NotRunning
+            from pyqode.core.backend.workers import diff_lines
+            try:
+                self.editor.backend.send_request(
+                    diff_lines, {'old': self.editor.toPlainText(),
+                                 'new': content}, self._on_diff_received)
+            except (NotRunning, AttributeError):
+                pass
+            else:
+                return
+        from pyqode.core.backend.workers import line_hunks
+        self._on_diff_received(line_hunks(
+            self.editor.toPlainText().split('\n'), content.split('\n')))
+
+    def _on_diff_received(self, hunks):
+        if self._diff_request is None or self.editor is None:
+            return
+        path, revision, callback = self._diff_request
+        self._diff_request = None
+        if path != self.path:
+            # another file has been opened in the meantime
+            return
+        if self.editor.document().revision() != revision:
+            # the document changed while the diff was computed
+            self.open(path)
+        else:
+            self._apply_hunks(hunks)
+        if callback:
+            callback()
+
+    def _apply_hunks(self, hunks):
+        """
+        Applies a list of hunks computed by
+        :func:`pyqode.core.backend.workers.line_hunks` to the document, as a
+        single edit block.
+        """
+        document = self.editor.document()
+        cursor = QtGui.QTextCursor(document)
+        cursor.beginEditBlock()
+        # last hunks first, the line numbers of the first ones do not change
+        for first, last, lines in reversed(hunks):
+            text = '\n'.join(lines)
+            if first < document.blockCount():
+                start = document.findBlockByNumber(first).position()
+                if last < document.blockCount():
+                    end = document.findBlockByNumber(last).position()
+                    if lines:
+                        text += '\n'
+                else:
+                    end = document.characterCount() - 1
+            else:
+                # lines appended after the last line
+                start = end = document.characterCount() - 1
+                text = '\n' + text
+            if not lines and last >= document.blockCount() and first:
+                # last lines removed, remove the preceding line break too
+                start -= 1
+            cursor.setPosition(start)
+            cursor.setPosition(end, cursor.KeepAnchor)
+            cursor.insertText(text)
+        cursor.endEditBlock()
+        document.setModified(False)
+        _logger().debug('file reloaded: %s, %d hunks', self.path, len(hunks))
+
     @staticmethod
     def _rm(tmp_path):
         if os.path.exists(tmp_path):
@@ -446,3 +698,4 @@ class FileManager(Manager):
         self.safe_save = original.replace_tabs_by_spaces
         self.clean_trailing_whitespaces = original.clean_trailing_whitespaces
         self.restore_cursor = original.restore_cursor
+        self.backend_diff_threshold = original.backend_diff_threshold
@@ -8,6 +8,7 @@ from .autoindent import AutoIndentMode
 from .backspace import SmartBackSpaceMode
 from .caret_line_highlight import CaretLineHighlighterMode
 from .case_converter import CaseConverterMode
+from .checker import CheckerCoordinatorMode
 from .checker import CheckerMode
 from .checker import CheckerMessage
 from .checker import CheckerMessages
@@ -34,6 +35,7 @@ __all__ = [
     'AutoIndentMode',
     'CaretLineHighlighterMode',
     'CaseConverterMode',
+    'CheckerCoordinatorMode',
     'CheckerMode',
     'CheckerMessage',
     'CheckerMessages',
@@ -3,10 +3,10 @@
 This module contains the checker mode, a base class for code checker modes.
 """
 import logging
-from pyqode.core.api import TextBlockUserData
-from pyqode.core.api.decoration import TextDecoration
+from pyqode.core.api.decoration import TextDecoration, ViewportDecorations
 from pyqode.core.api.mode import Mode
 from pyqode.core.backend import NotRunning
+from pyqode.core.backend.workers import run_checkers, worker_name
 from pyqode.core.api.utils import DelayJobRunner
 from pyqode.qt import QtCore, QtGui
 
@@ -28,6 +28,10 @@ class CheckerMessage(object):
     Holds data for a message displayed by the
     :class:`pyqode.core.modes.CheckerMode`.
     """
+    # a checker may report thousands of messages
+    __slots__ = ('description', 'status', 'line', 'col', 'color',
+                 'decoration', 'path', 'block')
+
     #: Default colors foreach message status
     COLORS = {CheckerMessages.INFO: "#4040DD",
               CheckerMessages.WARNING: "#DDDD40",
@@ -86,23 +90,69 @@ class CheckerMessage(object):
         self.color = color
         if self.color is None:
             self.color = self.COLORS[status]
+        #: Unused, decorations are created per line by the checker mode. Kept
+        #: for backward compatibility.
         self.decoration = None
         self.path = path
-        #: store a reference to the associated QTextBlock, for quick acces
+        #: The QTextBlock of the message, set by the checker mode. :attr:`line`
+        #: and :attr:`block` follow the text when it is edited, see
+        #: :meth:`pyqode.core.modes.CheckerMode.update_lines`.
         self.block = None
 
+    @property
+    def key(self):
+        """
+        Identity of the message: (line, col, status, description). Two
+        messages with the same key are considered equal.
+        """
+        return self.line, self.col, self.status, self.description
+
     def __str__(self):
         return "{0} l{1}".format(self.description, self.line)
 
     def __eq__(self, other):
-        return (self.block == other.block and
-                self.description == other.description)
+        try:
+            return self.key == other.key
+        except AttributeError:
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key)
 
 
 def _logger(klass):
     return logging.getLogger('%s [%s]' % (__name__, klass.__name__))
 
 
+class _AnchorRanges(object):
+    """
+    The decorated ranges of a checker mode (one empty range at the start of
+    each line that has messages), computed from the line anchors so that they
+    follow the text. See :class:`pyqode.core.api.ViewportDecorations`.
+    """
+    def __init__(self, mode):
+        self._mode = mode
+
+    def __len__(self):
+        return len(self._mode._anchors)
+
+    def between(self, start, end):
+        mode = self._mode
+        anchors = mode._anchors
+        i = mode._anchor_index(start)
+        previous = None
+        while i < len(anchors) and anchors[i].position() <= end:
+            # edits may have moved several anchors into the same block
+            position = anchors[i].block().position()
+            if position != previous:
+                previous = position
+                yield position, position
+            i += 1
+
+
 class CheckerMode(Mode, QtCore.QObject):
     """
     Performs a user defined code analysis job using the backend and
@@ -137,6 +187,12 @@ class CheckerMode(Mode, QtCore.QObject):
 
     Messages are displayed as text decorations on the editor. A checker panel
     will take care of display message icons next to each line.
+
+    Messages are indexed by line (see :meth:`messages_at_line`) and text
+    decorations are only created for the lines that are close to the
+    viewport, so there is no need to limit the number of messages. Each line
+    that has messages is anchored by a text cursor: the messages follow the
+    text when it is edited, without any work per edit.
     """
     @property
     def messages(self):
@@ -145,6 +201,14 @@ class CheckerMode(Mode, QtCore.QObject):
         """
         return self._messages
 
+    @property
+    def revision(self):
+        """
+        Revision of the list of messages, incremented each time messages are
+        added or removed.
+        """
+        return self._revision
+
     def __init__(self, worker,
                  delay=500,
                  show_tooltip=True):
@@ -158,17 +222,29 @@ class CheckerMode(Mode, QtCore.QObject):
         """
         Mode.__init__(self)
         QtCore.QObject.__init__(self)
-        # max number of messages to keep good performances
-        self.limit = 200
+        #: Max number of messages, None (default) to keep all messages.
+        self.limit = None
         self.ignore_rules = []
         self._job_runner = DelayJobRunner(delay=delay)
         self._messages = []
+        #: one cursor at the start of each line that has messages, sorted by
+        #: position. Cursors follow the text, so edits keep them sorted.
+        self._anchors = []
+        #: messages of each anchor
+        self._anchor_messages = []
+        self._ranges = _AnchorRanges(self)
+        self._revision = 0
+        self._decorations = None
         self._worker = worker
         self._mutex = QtCore.QMutex()
         self._show_tooltip = show_tooltip
-        self._pending_msg = []
         self._finished = True
 
+    def on_install(self, editor):
+        self._decorations = ViewportDecorations(
+            editor, self._create_decoration)
+        super(CheckerMode, self).on_install(editor)
+
     def set_ignore_rules(self, rules):
         """
         Sets the ignore rules for the linter.
@@ -178,79 +254,67 @@ class CheckerMode(Mode, QtCore.QObject):
         """
         self.ignore_rules = rules
 
-    def add_messages(self, messages):
+    def messages_at_line(self, line):
         """
-        Adds a message or a list of message.
+        Returns the list of messages of a line.
 
-        :param messages: A list of messages or a single message
+        :param line: line number (0 based)
         """
-        # remove old messages
-        if len(messages) > self.limit:
-            messages = messages[:self.limit]
-        _logger(self.__class__).log(5, 'adding %s messages' % len(messages))
-        self._finished = False
-        self._new_messages = messages
-        self._to_check = list(self._messages)
-        self._pending_msg = messages
-        # start removing messages, new message won't be added until we
-        # checked all message that need to be removed
-        QtCore.QTimer.singleShot(1, self._remove_batch)
-
-    def _remove_batch(self):
-        if self.editor is None:
-            return
-        for i in range(100):
-            if not len(self._to_check):
-                # all messages checker, start adding messages now
-                QtCore.QTimer.singleShot(1, self._add_batch)
-                self.editor.repaint()
-                return False
-            msg = self._to_check.pop(0)
-            if msg.block is None:
-                msg.block = self.editor.document().findBlockByNumber(msg.line)
-            if msg not in self._new_messages:
-                self.remove_message(msg)
-        self.editor.repaint()
-        QtCore.QTimer.singleShot(1, self._remove_batch)
+        if not self._anchors:
+            return []
+        block = self.editor.document().findBlockByNumber(line)
+        if not block.isValid():
+            return []
+        return self._block_messages(block)
+
+    def update_lines(self):
+        """
+        Updates :attr:`CheckerMessage.line` and :attr:`CheckerMessage.block`
+        from the line anchors, i.e. moves the messages with the text that has
+        been edited since they were added.
+        """
+        for anchor, messages in zip(self._anchors, self._anchor_messages):
+            block = anchor.block()
+            line = block.blockNumber()
+            for msg in messages:
+                msg.line = line
+                msg.block = block
+
+    def add_messages(self, messages):
+        """
+        Adds a list of messages.
+
+        The new list of messages is compared with the current one using the
+        message keys (see :attr:`CheckerMessage.key`): messages that are not
+        in the new list are removed, messages that are not displayed yet are
+        added and the other ones are left untouched. The editor decorations
+        are updated only once.
 
-    def _add_batch(self):
+        :param messages: A list of messages
+        """
         if self.editor is None:
             return
-        for i in range(10):
-            if not len(self._pending_msg):
-                # all pending message added
-                self._finished = True
-                _logger(self.__class__).log(5, 'finished')
-                self.editor.repaint()
-                return False
-            message = self._pending_msg.pop(0)
-            if message.line >= 0:
-                try:
-                    usd = message.block.userData()
-                except AttributeError:
-                    message.block = self.editor.document().findBlockByNumber(message.line)
-                    usd = message.block.userData()
-                if usd is None:
-                    usd = TextBlockUserData()
-                    message.block.setUserData(usd)
-                # check if the same message already exists
-                if message in usd.messages:
-                    continue
-                self._messages.append(message)
-                usd.messages.append(message)
-                tooltip = None
-                if self._show_tooltip:
-                    tooltip = message.description
-                message.decoration = TextDecoration(
-                    self.editor.textCursor(), start_line=message.line,
-                    tooltip=tooltip, draw_order=3)
-                message.decoration.set_full_width()
-                message.decoration.set_as_error(color=QtGui.QColor(
-                    message.color))
-                self.editor.decorations.append(message.decoration)
-        QtCore.QTimer.singleShot(1, self._add_batch)
+        if self.limit is not None and len(messages) > self.limit:
+            messages = messages[:self.limit]
+        _logger(self.__class__).log(5, 'adding %s messages' % len(messages))
+        # the new messages have been computed on the current text
+        self.update_lines()
+        new_keys = set(msg.key for msg in messages)
+        current_keys = set(msg.key for msg in self._messages)
+        kept = [msg for msg in self._messages if msg.key in new_keys]
+        changed = len(kept) != len(self._messages)
+        self._messages = kept
+        for msg in messages:
+            if msg.key not in current_keys and msg.line >= 0:
+                # also skips duplicates of the new list
+                current_keys.add(msg.key)
+                self._messages.append(msg)
+                changed = True
+        if changed:
+            self._update_index()
+        self._finished = True
+        _logger(self.__class__).log(5, 'finished')
         self.editor.repaint()
-        return True
 
     def remove_message(self, message):
         """
@@ -258,30 +322,88 @@ class CheckerMode(Mode, QtCore.QObject):
 
         :param message: Message to remove
         """
-        import time
         _logger(self.__class__).log(5, 'removing message %s' % message)
-        t = time.time()
-        usd = message.block.userData()
-        if usd:
-            try:
-                usd.messages.remove(message)
-            except (AttributeError, ValueError):
-                pass
-        if message.decoration:
-            self.editor.decorations.remove(message.decoration)
+        self.update_lines()
         self._messages.remove(message)
+        self._update_index()
 
     def clear_messages(self):
         """
         Clears all messages.
         """
-        while len(self._messages):
-            msg = self._messages.pop(0)
-            usd = msg.block.userData()
-            if usd and hasattr(usd, 'messages'):
-                usd.messages[:] = []
-            if msg.decoration:
-                self.editor.decorations.remove(msg.decoration)
+        self._messages = []
+        self._anchors = []
+        self._anchor_messages = []
+        self._revision += 1
+        if self._decorations is not None:
+            self._decorations.clear()
+
+    def _update_index(self):
+        """
+        Rebuilds the line anchors and the decorated ranges (one per line).
+        """
+        self._revision += 1
+        lines = {}
+        for msg in self._messages:
+            lines.setdefault(msg.line, []).append(msg)
+        self._anchors = []
+        self._anchor_messages = []
+        if self.editor is None:
+            return
+        doc = self.editor.document()
+        for line in sorted(lines.keys()):
+            block = doc.findBlockByNumber(line)
+            if not block.isValid():
+                block = doc.lastBlock()
+            for msg in lines[line]:
+                msg.block = block
+            self._anchors.append(QtGui.QTextCursor(block))
+            self._anchor_messages.append(lines[line])
+        self._decorations.set_ranges(self._ranges)
+
+    def _anchor_index(self, position):
+        """
+        Returns the index of the first anchor that is not before
+        ``position``.
+        """
+        anchors = self._anchors
+        lo, hi = 0, len(anchors)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if anchors[mid].position() < position:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _block_messages(self, block):
+        """
+        Returns the messages of the anchors that are in ``block``.
+        """
+        anchors = self._anchors
+        end = block.position() + block.length() - 1
+        messages = []
+        i = self._anchor_index(block.position())
+        while i < len(anchors) and anchors[i].position() <= end:
+            messages += self._anchor_messages[i]
+            i += 1
+        return messages
+
+    def _create_decoration(self, start, end):
+        messages = self._block_messages(
+            self.editor.document().findBlock(start))
+        if not messages:
+            return None
+        # use the color of the most severe message
+        message = max(messages, key=lambda msg: msg.status)
+        tooltip = None
+        if self._show_tooltip:
+            tooltip = '\n'.join(msg.description for msg in messages)
+        deco = TextDecoration(self.editor.document(), start_pos=start,
+                              tooltip=tooltip, draw_order=3)
+        deco.set_full_width()
+        deco.set_as_error(color=QtGui.QColor(message.color))
+        return deco
 
     def on_state_changed(self, state):
         if state:
@@ -306,8 +428,6 @@ class CheckerMode(Mode, QtCore.QObject):
             msg = CheckerMessage(*msg)
             if msg.line >= self.editor.blockCount():
                 msg.line = self.editor.blockCount() - 1
-            block = self.editor.document().findBlockByNumber(msg.line)
-            msg.block = block
             messages.append(msg)
         self.add_messages(messages)
 
@@ -331,17 +451,15 @@ class CheckerMode(Mode, QtCore.QObject):
         except (TypeError, RuntimeError):
             return
         try:
-            max_line_length = self.editor.modes.get(
-                'RightMarginMode').position
+            coordinator = self.editor.modes.get(CheckerCoordinatorMode)
         except KeyError:
-            max_line_length = 79
-        request_data = {
-            'code': self.editor.toPlainText(),
-            'path': self.editor.file.path,
-            'encoding': self.editor.file.encoding,
-            'ignore_rules': self.ignore_rules,
-            'max_line_length': max_line_length,
-        }
+            coordinator = None
+        if coordinator is not None and coordinator.enabled:
+            coordinator.request_analysis(self)
+            self._finished = False
+            return
+        request_data = _request_data(self.editor)
+        request_data['ignore_rules'] = self.ignore_rules
         try:
             self.editor.backend.send_request(
                 self._worker, request_data, on_receive=self._on_work_finished)
@@ -349,3 +467,106 @@ class CheckerMode(Mode, QtCore.QObject):
         except NotRunning:
             # retry later
             QtCore.QTimer.singleShot(100, self._request)
+
+
+def _request_data(editor):
+    """
+    Returns the request data that is common to all checkers.
+    """
+    try:
+        max_line_length = editor.modes.get('RightMarginMode').position
+    except KeyError:
+        max_line_length = 79
+    return {
+        'code': editor.toPlainText(),
+        'path': editor.file.path,
+        'encoding': editor.file.encoding,
+        'max_line_length': max_line_length,
+    }
+
+
+class CheckerCoordinatorMode(Mode):
+    """
+    Merges the analysis requests of all the checker modes installed on the
+    editor into a single backend request.
+
+    When this mode is installed (and enabled), a
+    :class:`pyqode.core.modes.CheckerMode` does not send its own request
+    anymore: the coordinator waits for the other checkers for a short
+    ``delay``, serializes the document once and runs all the checker workers
+    with :func:`pyqode.core.backend.workers.run_checkers`. The results are
+    then dispatched back to each checker.
+
+    .. code-block:: python
+
+        editor.modes.append(CheckerCoordinatorMode())
+        editor.modes.append(PyFlakesChecker())
+        editor.modes.append(PEP8CheckerMode())
+    """
+    def __init__(self, delay=100):
+        """
+        :param delay: Time to wait for the requests of the other checkers
+            before sending the merged request (ms).
+        """
+        super(CheckerCoordinatorMode, self).__init__()
+        self._job_runner = DelayJobRunner(delay=delay)
+        self._pending_checkers = []
+        #: checkers of the requests waiting for their results, by request id
+        self._running_requests = {}
+        self._request_id = 0
+
+    def request_analysis(self, checker):
+        """
+        Schedules the analysis of the document by a checker mode.
+
+        :param checker: the CheckerMode that requests an analysis.
+        """
+        if checker not in self._pending_checkers:
+            self._pending_checkers.append(checker)
+        self._job_runner.request_job(self._send_request)
+
+    def on_state_changed(self, state):
+        if not state:
+            self._job_runner.cancel_requests()
+            for checker in self._pending_checkers:
+                checker._finished = True
+            self._pending_checkers[:] = []
+
+    def _send_request(self):
+        if self.editor is None or not self._pending_checkers:
+            return
+        self._request_id += 1
+        request_data = _request_data(self.editor)
+        request_data['request_id'] = self._request_id
+        request_data['checkers'] = [
+            {'worker': worker_name(checker._worker),
+             'ignore_rules': checker.ignore_rules}
+            for checker in self._pending_checkers]
+        self._running_requests[self._request_id] = self._pending_checkers
+        try:
+            self.editor.backend.send_request(
+                run_checkers, request_data,
+                on_receive=self._on_work_finished)
+        except NotRunning:
+            # retry later
+            del self._running_requests[self._request_id]
+            QtCore.QTimer.singleShot(100, self._send_request)
+        else:
+            self._pending_checkers = []
+
+    def _on_work_finished(self, results):
+        try:
+            checkers = self._running_requests.pop(results['request_id'])
+        except (KeyError, TypeError):
+            # the worker failed
+            _logger(self.__class__).warning('invalid results: %r', results)
+            for checkers in self._running_requests.values():
+                for checker in checkers:
+                    checker._finished = True
+            self._running_requests.clear()
+            return
+        for checker, checker_results in zip(checkers, results['results']):
+            if checker.editor is not None and checker.enabled:
+                checker._on_work_finished(checker_results)
+            else:
+                checker._finished = True
@@ -2,10 +2,11 @@
 """
 Contains the mode that control the external changes of file.
 """
+import codecs
 import os
 from pyqode.core.api import TextHelper
 from pyqode.core.api.mode import Mode
-from pyqode.qt import QtCore, QtWidgets
+from pyqode.qt import QtCore, QtGui, QtWidgets
 from pyqode.core.cache import Cache
 
 
@@ -14,6 +15,9 @@ class FileWatcherMode(Mode, QtCore.QObject):
 
     FileWatcher mode, check if the opened file has changed externally.
 
+    Growing files (e.g. logs) can be followed like ``tail -f``, see
+    :attr:`follow`.
+
     """
     #: Signal emitted when the file has been deleted. The Signal is emitted
     #: with the current editor instance so that user have a chance to close
@@ -23,6 +27,12 @@ class FileWatcherMode(Mode, QtCore.QObject):
     #: Signal emitted when the file has been reloaded in the editor.
     file_reloaded = QtCore.Signal()
 
+    #: Signal emitted when the text appended to the file has been appended to
+    #: the editor (see :attr:`follow`). Parameter: the appended text.
+    text_appended = QtCore.Signal(str)
+
+    _OFFSET_PROPERTY = 'pyqode_follow_offset'
+
     @property
     def auto_reload(self):
         """
@@ -54,20 +64,46 @@ class FileWatcherMode(Mode, QtCore.QObject):
         self._mtime = 0
         self._notification_pending = False
         self._processing = False
+        #: Follows the file like ``tail -f``: when the file grows, only the
+        #: new bytes are decoded and appended at the end of the document,
+        #: instead of reloading the whole file. The file is reloaded as usual
+        #: if it shrinks (e.g. log rotation) or if the document has been
+        #: modified. The appended text is a single undo step.
+        self.follow = False
+        #: Mime types of the files that are always followed (e.g.
+        #: ``['text/x-log']``), empty by default.
+        self.follow_mimetypes = []
+        #: Scrolls to the end of the document when text is appended, if the
+        #: end of the document was visible.
+        self.auto_scroll = True
+        #: Maximum number of lines of a followed file, the first lines are
+        #: removed from the document when text is appended (the document
+        #: then does not contain the whole file anymore). 0 means unlimited.
+        self.max_line_count = 0
+        #: Reloads a changed file by applying the differences between the
+        #: document and the file (see
+        #: :meth:`pyqode.core.managers.FileManager.reload_changes`) instead
+        #: of opening it again. Unchanged lines keep their state (folds,
+        #: decorations,...) and the undo history is preserved.
+        self.diff_reload = True
 
     def on_state_changed(self, state):
         if state:
             self.editor.new_text_set.connect(self._update_mtime)
             self.editor.new_text_set.connect(self._timer.start)
+            self.editor.new_text_set.connect(self._on_new_text_set)
             self.editor.text_saving.connect(self._cancel_next_change)
             self.editor.text_saved.connect(self._update_mtime)
+            self.editor.text_saved.connect(self._reset_offset)
             self.editor.text_saved.connect(self._restart_monitoring)
             self.editor.focused_in.connect(self._check_for_pending)
         else:
             self._timer.stop()
             self.editor.new_text_set.connect(self._update_mtime)
             self.editor.new_text_set.connect(self._timer.start)
+            self.editor.new_text_set.disconnect(self._on_new_text_set)
             self.editor.text_saving.disconnect(self._cancel_next_change)
+            self.editor.text_saved.disconnect(self._reset_offset)
             self.editor.text_saved.disconnect(self._restart_monitoring)
             self.editor.focused_in.disconnect(self._check_for_pending)
             self._timer.stop()
@@ -122,6 +158,15 @@ class FileWatcherMode(Mode, QtCore.QObject):
         if self.editor and self.editor.file.path:
             if not os.path.exists(self.editor.file.path) and self._mtime:
                 self._notify_deleted_file()
+            elif (self._following() and
+                    not self.editor.document().isModified()):
+                mtime = os.path.getmtime(self.editor.file.path)
+                if (mtime > self._mtime or
+                        os.path.getsize(self.editor.file.path) !=
+                        self._offset):
+                    self._mtime = mtime
+                    if not self._append_new_text():
+                        self._notify_change()
             else:
                 mtime = os.path.getmtime(self.editor.file.path)
                 if mtime > self._mtime:
@@ -131,6 +176,100 @@ class FileWatcherMode(Mode, QtCore.QObject):
                 writeable = os.access(self.editor.file.path, os.W_OK)
                 self.editor.setReadOnly(not writeable)
 
+    def _following(self):
+        return self.follow or \
+            self.editor.file.mimetype in self.follow_mimetypes
+
+    @property
+    def _offset(self):
+        """
+        Offset of the end of the text of the file that is in the document.
+        It is stored in the document, which is shared with the clones.
+        """
+        return self.editor.document().property(self._OFFSET_PROPERTY) or 0
+
+    @_offset.setter
+    def _offset(self, value):
+        self.editor.document().setProperty(self._OFFSET_PROPERTY, value)
+
+    def _on_new_text_set(self):
+        if self.editor.file.opening:
+            # the file may have grown since it was read
+            self._offset = self.editor.file.read_size
+        else:
+            self._reset_offset()
+
+    def _reset_offset(self):
+        """ The whole file has been read (or written) """
+        try:
+            self._offset = os.path.getsize(self.editor.file.path)
+        except (OSError, TypeError, AttributeError):
+            self._offset = 0
+
+    def _append_new_text(self):
+        """
+        Appends the text that has been appended to the file since it was
+        read.
+
+        :return: False if the file did not only grow, it must be reloaded.
+        """
+        path = self.editor.file.path
+        offset = self._offset
+        try:
+            size = os.path.getsize(path)
+            if size < offset:
+                return False
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read(size - offset)
+        except (IOError, OSError):
+            return False
+        decoder = codecs.getincrementaldecoder(
+            self.editor.file.encoding)('replace')
+        text = decoder.decode(data)
+        # an incomplete multi-byte sequence at the end of the data is kept
+        # by the decoder, it will be read again with the rest of the sequence
+        consumed = len(data) - len(decoder.getstate()[0])
+        if text.endswith('\r'):
+            # might be the first half of a \r\n, read it again next time
+            text = text[:-1]
+            # encoded size of '\r' (without the BOM of utf-16/32)
+            encoding = self.editor.file.encoding
+            consumed -= (len('\r\r'.encode(encoding)) -
+                         len('\r'.encode(encoding)))
+        self._offset = offset + consumed
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        tier = self.editor.file.size_tier
+        if self.editor.file.replace_tabs_by_spaces and not (
+                tier is not None and tier.fast_path):
+            # like FileManager.open
+            text = text.replace('\t', ' ' * self.editor.tab_length)
+        if text:
+            self._append(text)
+        return True
+
+    def _append(self, text):
+        editor = self.editor
+        document = editor.document()
+        scroll_bar = editor.verticalScrollBar()
+        at_end = scroll_bar.value() == scroll_bar.maximum()
+        modified = document.isModified()
+        cursor = QtGui.QTextCursor(document)
+        cursor.beginEditBlock()
+        cursor.movePosition(cursor.End)
+        cursor.insertText(text)
+        extra_lines = document.blockCount() - self.max_line_count
+        if self.max_line_count and extra_lines > 0:
+            cursor.movePosition(cursor.Start)
+            cursor.movePosition(cursor.NextBlock, cursor.KeepAnchor,
+                                extra_lines)
+            cursor.removeSelectedText()
+        cursor.endEditBlock()
+        document.setModified(modified)
+        if self.auto_scroll and at_end:
+            scroll_bar.setValue(scroll_bar.maximum())
+        self.text_appended.emit(text)
+
     def _notify(self, title, message, expected_action=None):
         """
         Notify user from external event
@@ -164,8 +303,11 @@ class FileWatcherMode(Mode, QtCore.QObject):
                 self.editor.file.path,
                 self.editor.textCursor().position())
             if os.path.exists(self.editor.file.path):
-                self.editor.file.open(self.editor.file.path)
-                self.file_reloaded.emit()
+                if self.diff_reload:
+                    self.editor.file.reload_changes(self._on_file_reloaded)
+                else:
+                    self.editor.file.open(self.editor.file.path)
+                    self.file_reloaded.emit()
             else:
                 # file moved just after a change, see OpenCobolIDE/OpenCobolIDE#337
                 self._notify_deleted_file()
@@ -181,6 +323,12 @@ class FileWatcherMode(Mode, QtCore.QObject):
             self._notification_pending = True
             self._data = (args, kwargs)
 
+    def _on_file_reloaded(self):
+        if self.editor is None:
+            return
+        self._offset = self.editor.file.read_size
+        self.file_reloaded.emit()
+
     def _check_for_pending(self, *args, **kwargs):
         """
         Checks if a notification is pending.
@@ -202,3 +350,8 @@ class FileWatcherMode(Mode, QtCore.QObject):
 
     def clone_settings(self, original):
         self.auto_reload = original.auto_reload
+        self.follow = original.follow
+        self.follow_mimetypes = list(original.follow_mimetypes)
+        self.auto_scroll = original.auto_scroll
+        self.max_line_count = original.max_line_count
+        self.diff_reload = original.diff_reload
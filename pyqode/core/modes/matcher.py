@@ -120,8 +120,7 @@ class SymbolMatcherMode(Mode):
         self._unmatch_foreground = QtGui.QColor('red')
 
     def _clear_decorations(self):
-        for deco in self._decorations:
-            self.editor.decorations.remove(deco)
+        self.editor.decorations.remove_many(self._decorations)
         self._decorations[:] = []
 
     def symbol_pos(self, cursor, character_type=OPEN, symbol_type=PAREN):
@@ -149,15 +148,16 @@ class SymbolMatcherMode(Mode):
         return retval
 
     def _refresh_decorations(self):
-        for deco in self._decorations:
-            self.editor.decorations.remove(deco)
-            if deco.match:
-                deco.set_foreground(self._match_foreground)
-                deco.set_background(self._match_background)
-            else:
-                deco.set_foreground(self._unmatch_foreground)
-                deco.set_background(self._unmatch_background)
-            self.editor.decorations.append(deco)
+        with self.editor.decorations.batch():
+            self.editor.decorations.remove_many(self._decorations)
+            for deco in self._decorations:
+                if deco.match:
+                    deco.set_foreground(self._match_foreground)
+                    deco.set_background(self._match_background)
+                else:
+                    deco.set_foreground(self._unmatch_foreground)
+                    deco.set_background(self._unmatch_background)
+            self.editor.decorations.append_many(self._decorations)
 
     def on_state_changed(self, state):
         if state:
@@ -230,12 +230,13 @@ class SymbolMatcherMode(Mode):
         """
         Performs symbols matching.
         """
-        self._clear_decorations()
-        current_block = self.editor.textCursor().block()
-        data = get_block_symbol_data(self.editor, current_block)
-        pos = self.editor.textCursor().block().position()
-        for symbol in [PAREN, SQUARE, BRACE]:
-            self._match(symbol, data, pos)
+        with self.editor.decorations.batch():
+            self._clear_decorations()
+            current_block = self.editor.textCursor().block()
+            data = get_block_symbol_data(self.editor, current_block)
+            pos = self.editor.textCursor().block().position()
+            for symbol in [PAREN, SQUARE, BRACE]:
+                self._match(symbol, data, pos)
 
     def _create_decoration(self, pos, match=True):
         cursor = self.editor.textCursor()
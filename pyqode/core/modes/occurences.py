@@ -3,6 +3,8 @@ This module contains the occurrences highlighter mode.
 """
 from pyqode.qt import QtGui
 from pyqode.core.api import Mode, DelayJobRunner, TextHelper, TextDecoration
+from pyqode.core.api import ViewportDecorations
+from pyqode.core.api.utils import get_block_words
 from pyqode.core.backend import NotRunning
 from pyqode.core.backend.workers import findall
 
@@ -10,7 +12,10 @@ from pyqode.core.backend.workers import findall
 class OccurrencesHighlighterMode(Mode):
     """ Highlights occurrences of the word under the text text cursor.
 
-    The ``delay`` before searching for occurrences is configurable.
+    The occurrences found in the visible lines (plus a configurable
+    ``margin``) are highlighted immediately, using the word index cached in
+    the block user data. The whole document is then searched by the backend,
+    after a configurable ``delay``.
     """
     @property
     def delay(self):
@@ -90,6 +95,25 @@ class OccurrencesHighlighterMode(Mode):
                     # this should never happen since we're working with clones
                     pass
 
+    @property
+    def margin(self):
+        """
+        Number of lines, above and below the visible lines, that are searched
+        immediately (without waiting for the backend). Default is 100.
+        """
+        return self._margin
+
+    @margin.setter
+    def margin(self, value):
+        self._margin = value
+        if self.editor:
+            for clone in self.editor.clones:
+                try:
+                    clone.modes.get(self.__class__).margin = value
+                except KeyError:
+                    # this should never happen since we're working with clones
+                    pass
+
     @property
     def case_sensitive(self):
         return self._case_sensitive
@@ -97,19 +121,29 @@ class OccurrencesHighlighterMode(Mode):
     @case_sensitive.setter
     def case_sensitive(self, value):
         self._case_sensitive = value
+        self._sub = None
         self._request_highlight()
 
     def __init__(self):
         super(OccurrencesHighlighterMode, self).__init__()
-        self._decorations = []
+        self._decorations = None
         #: Timer used to run the search request with a specific delay
         self.timer = DelayJobRunner(delay=1000)
         self._sub = None
+        self._request_sub = None
+        self._margin = 100
         self._background = QtGui.QColor('#CCFFCC')
         self._foreground = None
         self._underlined = False
         self._case_sensitive = False
 
+    def on_install(self, editor):
+        # decorations are only created for the occurrences that are close to
+        # the visible blocks, there is no need to limit the number of results.
+        self._decorations = ViewportDecorations(
+            editor, self._create_decoration)
+        super(OccurrencesHighlighterMode, self).on_install(editor)
+
     def on_state_changed(self, state):
         if state:
             self.editor.cursorPositionChanged.connect(self._request_highlight)
@@ -117,31 +151,69 @@ class OccurrencesHighlighterMode(Mode):
             self.editor.cursorPositionChanged.disconnect(
                 self._request_highlight)
             self.timer.cancel_requests()
+            self._clear_decos()
 
     def _clear_decos(self):
-        for d in self._decorations:
-            self.editor.decorations.remove(d)
-        self._decorations[:] = []
+        self._decorations.clear()
 
     def _request_highlight(self):
         if self.editor is not None:
             sub = TextHelper(self.editor).word_under_cursor(
                 select_whole_word=True).selectedText()
             if sub != self._sub:
+                self._sub = sub
+                self._request_sub = None
                 self._clear_decos()
-                if len(sub) > 1:
+                self.timer.cancel_requests()
+                cursor = self.editor.textCursor()
+                if len(sub) > 1 and (not cursor.hasSelection() or
+                                     cursor.selectedText() == sub):
+                    results = self._find_near_viewport(sub)
+                    if len(results) > 1:
+                        self._decorations.set_ranges(results)
                     self.timer.request_job(self._send_request)
 
+    def _find_near_viewport(self, sub):
+        """
+        Finds the occurrences of ``sub`` in the visible lines and in the
+        lines that are within :attr:`margin`.
+        """
+        first, last = TextHelper(self.editor).visible_line_range()
+        doc = self.editor.document()
+        block = doc.findBlockByNumber(max(0, first - self._margin))
+        last = min(doc.blockCount() - 1, last + self._margin)
+        if not self._case_sensitive:
+            sub = sub.lower()
+        results = []
+        while block.isValid() and block.blockNumber() <= last:
+            words = get_block_words(self.editor, block)
+            if self._case_sensitive:
+                columns = words.get(sub, [])
+            else:
+                columns = sorted(
+                    column for word, word_columns in words.items()
+                    if word.lower() == sub for column in word_columns)
+            start = block.position()
+            for column in columns:
+                results.append((start + column, start + column + len(sub)))
+            block = block.next()
+        return results
+
     def _send_request(self):
         if self.editor is None:
             return
         cursor = self.editor.textCursor()
-        self._sub = TextHelper(self.editor).word_under_cursor(
+        sub = TextHelper(self.editor).word_under_cursor(
             select_whole_word=True).selectedText()
-        if not cursor.hasSelection() or cursor.selectedText() == self._sub:
+        if sub != self._sub:
+            # word changed since the request was scheduled
+            self._request_highlight()
+            return
+        if not cursor.hasSelection() or cursor.selectedText() == sub:
+            self._request_sub = sub
             request_data = {
                 'string': self.editor.toPlainText(),
-                'sub': self._sub,
+                'sub': sub,
                 'regex': False,
                 'whole_word': True,
                 'case_sensitive': self.case_sensitive
@@ -150,34 +222,34 @@ class OccurrencesHighlighterMode(Mode):
                 self.editor.backend.send_request(findall, request_data,
                                                  self._on_results_available)
             except NotRunning:
-                self._request_highlight()
+                self.timer.request_job(self._send_request)
 
     def _on_results_available(self, results):
-        if len(results) > 500:
-            # limit number of results (on very big file where a lots of
-            # occurrences can be found, this would totally freeze the editor
-            # during a few seconds, with a limit of 500 we can make sure
-            # the editor will always remain responsive).
-            results = results[:500]
-        current = self.editor.textCursor().position()
+        if self._request_sub is None or self._request_sub != self._sub:
+            # results of an outdated request
+            return
+        self._request_sub = None
         if len(results) > 1:
-            for start, end in results:
-                if start <= current <= end:
-                    continue
-                deco = TextDecoration(self.editor.textCursor(),
-                                      start_pos=start, end_pos=end)
-                if self.underlined:
-                    deco.set_as_underlined(self._background)
-                else:
-                    deco.set_background(QtGui.QBrush(self._background))
-                    if self._foreground is not None:
-                        deco.set_foreground(self._foreground)
-                deco.draw_order = 3
-                self.editor.decorations.append(deco)
-                self._decorations.append(deco)
+            self._decorations.set_ranges(results)
+
+    def _create_decoration(self, start, end):
+        current = self.editor.textCursor().position()
+        if start <= current <= end:
+            return None
+        deco = TextDecoration(self.editor.textCursor(),
+                              start_pos=start, end_pos=end)
+        if self.underlined:
+            deco.set_as_underlined(self._background)
+        else:
+            deco.set_background(QtGui.QBrush(self._background))
+            if self._foreground is not None:
+                deco.set_foreground(self._foreground)
+        deco.draw_order = 3
+        return deco
 
     def clone_settings(self, original):
         self.delay = original.delay
         self.background = original.background
         self.foreground = original.foreground
         self.underlined = original.underlined
+        self.margin = original.margin
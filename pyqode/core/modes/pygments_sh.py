@@ -5,25 +5,30 @@ on pygments.
 
 .. note: This code is taken and adapted from the IPython project.
 """
+import fnmatch
+import importlib
 import logging
 import mimetypes
+import os
 import sys
+import time
 
 from pygments.formatters.html import HtmlFormatter
 from pygments.lexer import Error, RegexLexer, Text, _TokenType
-from pygments.lexers import get_lexer_for_filename, get_lexer_for_mimetype
 from pygments.lexers.agile import PythonLexer
-from pygments.lexers.compiled import CLexer, CppLexer
-from pygments.lexers.dotnet import CSharpLexer
 from pygments.lexers.special import TextLexer
 from pygments.styles import get_style_by_name, get_all_styles
-from pygments.token import Whitespace, Comment, Token
+from pygments.token import Whitespace, string_to_tokentype
 from pygments.util import ClassNotFound
-from pyqode.qt import QtGui
+from pyqode.qt import QtCore
 from pyqode.qt.QtCore import QRegExp
 
 from pyqode.core.api.syntax_highlighter import (
-    SyntaxHighlighter, ColorScheme, TextBlockUserData)
+    SyntaxHighlighter, ColorScheme, FormatTable)
+from pyqode.core.api.utils import DelayJobRunner, TextBlockHelper
+from pyqode.core.backend import NotRunning
+from pyqode.core.backend.workers import (
+    is_regex_lexer, patch_lexers, replace_pattern, tokenize)
 
 
 def _logger():
@@ -100,31 +105,199 @@ RegexLexer.get_tokens_unprocessed = get_tokens_unprocessed
 
 
 # Even with the above monkey patch to store state, multiline comments do not
-# work since they are stateless (Pygments uses a single multiline regex for
-# these comments, but Qt lexes by line). So we need to append a state for
-# comments # to the C and C++ lexers. This means that nested multiline
-# comments will appear to be valid C/C++, but this is better than the
-# alternative for now.
-def replace_pattern(tokens, new_pattern):
-    """ Given a RegexLexer token dictionary 'tokens', replace all patterns that
-        match the token specified in 'new_pattern' with 'new_pattern'.
+# work since they are stateless (see patch_lexers). The backend applies the
+# same patch before lexing, see pyqode.core.backend.workers.tokenize.
+patch_lexers()
+
+
+class LexerResolver(object):
     """
-    for state in tokens.values():
-        for index, pattern in enumerate(state):
-            if isinstance(pattern, tuple) and pattern[1] == new_pattern[1]:
-                state[index] = new_pattern
-
-# More monkeypatching!
-COMMENT_START = (r'/\*', Comment.Multiline, 'comment')
-COMMENT_STATE = [(r'[^*/]', Comment.Multiline),
-                 (r'/\*', Comment.Multiline, '#push'),
-                 (r'\*/', Comment.Multiline, '#pop'),
-                 (r'[*/]', Comment.Multiline)]
-replace_pattern(CLexer.tokens, COMMENT_START)
-replace_pattern(CppLexer.tokens, COMMENT_START)
-CLexer.tokens['comment'] = COMMENT_STATE
-CppLexer.tokens['comment'] = COMMENT_STATE
-CSharpLexer.tokens['comment'] = COMMENT_STATE
+    Resolves the pygments lexer of a file name or of a mime type.
+
+    Pygments scans its whole registry (and the plugins) each time a lexer is
+    looked up. The resolver caches the results, process wide, in an index
+    that maps a file name pattern (e.g. ``*.c``) or a mime type to the
+    qualified name of a lexer class. The lexer classes are only imported when
+    they are needed.
+
+    The index can be saved by the application (:meth:`index`) and loaded
+    again at startup (:meth:`load_index`), so that the registry is not
+    scanned again::
+
+        LexerResolver.load_index(json.load(f))
+    """
+    #: maps 'filename:<pattern>' and 'mimetype:<mimetype>' to the qualified
+    #: name of a lexer class (None if there is no lexer)
+    _index = {}
+    #: maps qualified names to lexer classes
+    _classes = {}
+    #: file name patterns of the registry that are not simple extensions
+    _patterns = None
+
+    @classmethod
+    def lexer_for_filename(cls, filename, **options):
+        """
+        Returns a lexer for a file name.
+
+        :param filename: file name or path
+        :param options: lexer options
+        :raises: ClassNotFound if there is no lexer for the file name.
+        """
+        filename = os.path.basename(filename)
+        key = 'filename:%s' % cls._filename_pattern(filename)
+        try:
+            name = cls._index[key]
+        except KeyError:
+            from pygments.lexers import get_lexer_for_filename
+            try:
+                name = cls._qualified_name(get_lexer_for_filename(filename))
+            except ClassNotFound:
+                name = None
+            cls._index[key] = name
+        return cls._lexer(name, filename, options)
+
+    @classmethod
+    def lexer_for_mimetype(cls, mimetype, **options):
+        """
+        Returns a lexer for a mime type.
+
+        :param mimetype: mime type
+        :param options: lexer options
+        :raises: ClassNotFound if there is no lexer for the mime type.
+        """
+        key = 'mimetype:%s' % mimetype
+        try:
+            name = cls._index[key]
+        except KeyError:
+            from pygments.lexers import get_lexer_for_mimetype
+            try:
+                name = cls._qualified_name(get_lexer_for_mimetype(mimetype))
+            except ClassNotFound:
+                name = None
+            cls._index[key] = name
+        return cls._lexer(name, mimetype, options)
+
+    @classmethod
+    def index(cls):
+        """
+        Returns a copy of the index (a dict that can be serialized to json).
+        """
+        return dict(cls._index)
+
+    @classmethod
+    def load_index(cls, index):
+        """
+        Loads an index previously returned by :meth:`index`.
+
+        :param index: index to load, its entries replace the cached ones.
+        """
+        cls._index.update(index)
+
+    @classmethod
+    def clear(cls):
+        """
+        Clears the cache.
+        """
+        cls._index.clear()
+        cls._classes.clear()
+
+    @classmethod
+    def _filename_pattern(cls, filename):
+        if cls._patterns is None:
+            from pygments.lexers._mapping import LEXERS
+            patterns = set()
+            for lexer in LEXERS.values():
+                for pattern in lexer[3]:
+                    if not pattern.startswith('*.') or \
+                            set('.*?[') & set(pattern[2:]):
+                        patterns.add(pattern)
+            cls._patterns = sorted(patterns)
+        for pattern in cls._patterns:
+            if fnmatch.fnmatchcase(filename, pattern):
+                # e.g. Makefile, CMakeLists.txt, *.html.j2
+                return filename
+        ext = os.path.splitext(filename)[1]
+        return '*' + ext if ext else filename
+
+    @staticmethod
+    def _qualified_name(lexer):
+        lexer = type(lexer)
+        return '%s.%s' % (lexer.__module__, lexer.__name__)
+
+    @classmethod
+    def _lexer(cls, name, key, options):
+        if name is None:
+            raise ClassNotFound('no lexer for %r' % key)
+        try:
+            lexer_class = cls._classes[name]
+        except KeyError:
+            module, class_name = name.rsplit('.', 1)
+            lexer_class = getattr(importlib.import_module(module), class_name)
+            cls._classes[name] = lexer_class
+        return lexer_class(**options)
+
+
+class LexerStates(object):
+    """
+    Interns the state stacks of a pygments lexer as small integers, that can
+    be stored in the 16 bits of the block user state reserved to the syntax
+    highlighter (see :class:`pyqode.core.api.TextBlockHelper`).
+
+    There is one table per lexer class, shared by all the highlighters: each
+    distinct stack is stored once, blocks only store its id. Id 0 is the
+    initial state (``('root',)``).
+    """
+    #: Maximum number of states of a lexer class
+    MAX_STATES = 0xFFFF
+
+    _tables = {}
+
+    @classmethod
+    def for_lexer(cls, lexer):
+        """
+        Returns the state table of a lexer.
+
+        :param lexer: pygments lexer instance
+        """
+        try:
+            return cls._tables[lexer.__class__]
+        except KeyError:
+            table = cls._tables[lexer.__class__] = cls()
+            return table
+
+    def __init__(self):
+        self._ids = {('root',): 0}
+        self._stacks = [('root',)]
+
+    def intern(self, stack):
+        """
+        Returns the id of a state stack.
+
+        :param stack: list of state names, None for the initial state
+        """
+        if stack is None:
+            return 0
+        stack = tuple(stack)
+        try:
+            return self._ids[stack]
+        except KeyError:
+            if len(self._stacks) >= self.MAX_STATES:
+                _logger().warning('too many lexer states, using the initial '
+                                  'state instead')
+                return 0
+            state = self._ids[stack] = len(self._stacks)
+            self._stacks.append(stack)
+            return state
+
+    def stack(self, state):
+        """
+        Returns the state stack (a tuple) of a state id.
+
+        :param state: state id, -1 (no state) gives the initial state
+        """
+        if 0 < state < len(self._stacks):
+            return self._stacks[state]
+        return self._stacks[0]
 
 
 class PygmentsSH(SyntaxHighlighter):
@@ -137,13 +310,33 @@ class PygmentsSH(SyntaxHighlighter):
     namespace packages to see what other languages are available (at the time
     of writing, only python has specialised support).
 
-    .. warning:: There are some issues with multi-line comments, they are not
-                 properly highlighted until a full re-highlight is triggered.
-                 The text is automatically re-highlighted on save.
+    The state of the lexer at the end of each block is stored in the block
+    user state (see :class:`LexerStates`), so that after an edit the
+    following blocks are highlighted again only until the lexer state is the
+    same as before (e.g. when a multi-line string is opened or closed).
+
+    When :attr:`backend_lexing` is enabled, the document is lexed by the
+    backend process, see :attr:`backend_lexing`.
+
+    The highlighting of a file can be stored in and restored from a
+    :class:`pyqode.core.cache.HighlightCache`, see
+    :meth:`use_highlight_cache`.
     """
     #: Mode description
     DESCRIPTION = "Apply syntax highlighting to the editor using pygments"
 
+    #: Delay (ms) before the document is lexed again by the backend, after
+    #: an edit. See :attr:`backend_lexing`.
+    BACKEND_LEXING_DELAY = 300
+
+    #: Maximum time (s) progressive highlighting waits for the results of the
+    #: backend before lexing the document itself.
+    BACKEND_LEXING_TIMEOUT = 2
+
+    #: Version of the highlighting, part of the key of the entries of the
+    #: highlight cache. Bump it when the highlighting of a document changes.
+    CACHE_VERSION = 1
+
     @property
     def pygments_style(self):
         """
@@ -158,6 +351,31 @@ class PygmentsSH(SyntaxHighlighter):
         # triggers a rehighlight
         self.color_scheme = ColorScheme(value)
 
+    @property
+    def backend_lexing(self):
+        """
+        Lexes the document in the backend process (see
+        :func:`pyqode.core.backend.workers.tokenize`) instead of the GUI
+        thread. Default is False.
+
+        The whole document is lexed in one pass and the tokens of each block
+        are sent back as runs of (length, token type), the highlighter only
+        has to apply the corresponding formats. After an edit, the edited
+        blocks are lexed locally and the end of the document is lexed again
+        by the backend after :attr:`BACKEND_LEXING_DELAY` ms.
+        """
+        return self._backend_lexing
+
+    @backend_lexing.setter
+    def backend_lexing(self, value):
+        self._backend_lexing = value
+        self._runs = []
+        self._tokenize_runner.cancel_requests()
+        self._tokenize_from = None
+        if value and self.editor is not None:
+            self._tokenize_from = 0
+            self._request_tokens()
+
     def __init__(self, document, lexer=None, color_scheme=None):
         super(PygmentsSH, self).__init__(document, color_scheme=color_scheme)
         self._pygments_style = self.color_scheme.name
@@ -165,10 +383,24 @@ class PygmentsSH(SyntaxHighlighter):
         self._formatter = HtmlFormatter(nowrap=True)
         self._lexer = lexer if lexer else PythonLexer()
 
-        self._brushes = {}
-        self._formats = {}
+        self._format_table = None
         self._init_style()
-        self._prev_block = None
+        # backend lexing: one (runs, token types, state) tuple per block
+        self._backend_lexing = False
+        self._runs = []
+        self._runs_lexer = None
+        self._tokenize_from = None
+        self._tokenize_runner = DelayJobRunner(
+            delay=self.BACKEND_LEXING_DELAY)
+        self._request_id = 0
+        self._received_id = 0
+        self._requested_lexer = None
+        self._request_time = 0
+        # highlight cache
+        self._highlight_cache = None
+        self._dump = None
+        self._dump_id = 0
+        self.highlighting_progress.connect(self._on_highlighting_progress)
 
     def _init_style(self):
         """ Init pygments style """
@@ -178,7 +410,6 @@ class PygmentsSH(SyntaxHighlighter):
         """
         :type editor: pyqode.code.api.CodeEdit
         """
-        self._clear_caches()
         self._update_style()
         super(PygmentsSH, self).on_install(editor)
 
@@ -207,7 +438,7 @@ class PygmentsSH(SyntaxHighlighter):
     def set_lexer_from_filename(self, filename):
         """
         Change the lexer based on the filename (actually only the extension is
-        needed)
+        needed). Lexers are resolved by :class:`LexerResolver`.
 
         :param filename: Filename or extension
         """
@@ -215,15 +446,15 @@ class PygmentsSH(SyntaxHighlighter):
         if filename.endswith("~"):
             filename = filename[0:len(filename) - 1]
         try:
-            self._lexer = get_lexer_for_filename(filename)
+            self._lexer = LexerResolver.lexer_for_filename(filename)
         except (ClassNotFound, ImportError):
-            print('class not found for url', filename)
+            _logger().debug('no lexer for filename %s, trying its '
+                            'mimetype', filename)
             try:
-                m = mimetypes.guess_type(filename)
-                print(m)
-                self._lexer = get_lexer_for_mimetype(m[0])
-            except (ClassNotFound, IndexError, ImportError):
-                self._lexer = get_lexer_for_mimetype('text/plain')
+                mimetype = mimetypes.guess_type(filename)[0]
+                self._lexer = LexerResolver.lexer_for_mimetype(mimetype)
+            except (ClassNotFound, ImportError):
+                self._lexer = LexerResolver.lexer_for_mimetype('text/plain')
         if self._lexer is None:
             _logger().warning('failed to get lexer from filename: %s, using '
                               'plain text instead...', filename)
@@ -236,7 +467,7 @@ class PygmentsSH(SyntaxHighlighter):
         :param mime: mime type
         :param options: optional addtional options.
         """
-        self._lexer = get_lexer_for_mimetype(mime, **options)
+        self._lexer = LexerResolver.lexer_for_mimetype(mime, **options)
         _logger().debug('lexer for mimetype (%s): %r', mime, self._lexer)
 
     def highlight_block(self, text, block):
@@ -250,36 +481,34 @@ class PygmentsSH(SyntaxHighlighter):
             self._pygments_style = self.color_scheme.name
             self._update_style()
         original_text = text
-        if self.editor and self._lexer and self.enabled:
-            if block.blockNumber():
-                prev_data = self._prev_block.userData()
-                if prev_data:
-                    if hasattr(prev_data, "syntax_stack"):
-                        self._lexer._saved_state_stack = prev_data.syntax_stack
-                    elif hasattr(self._lexer, '_saved_state_stack'):
-                        del self._lexer._saved_state_stack
+        if self.editor and self._lexer and self.enabled and \
+                not self._apply_runs(text, block):
+            # restore the lexer state at the end of the previous block
+            states = LexerStates.for_lexer(self._lexer)
+            previous = block.previous()
+            if previous.isValid():
+                state = TextBlockHelper.get_state(previous)
+            else:
+                state = 0
+            self._lexer._saved_state_stack = states.stack(state)
 
             # Lex the text using Pygments
             index = 0
-            usd = block.userData()
-            if usd is None:
-                usd = TextBlockUserData()
-                block.setUserData(usd)
             tokens = list(self._lexer.get_tokens(text))
             for token, text in tokens:
                 length = len(text)
-                fmt = self._get_format(token)
-                if token in [Token.Literal.String, Token.Literal.String.Doc,
-                             Token.Comment]:
-                    fmt.setObjectType(fmt.UserObject)
-                self.setFormat(index, length, fmt)
+                self._set_token_format(index, length, token)
                 index += length
 
-            if hasattr(self._lexer, '_saved_state_stack'):
-                setattr(usd, "syntax_stack", self._lexer._saved_state_stack)
+            # store the state at the end of the block: if it did not change,
+            # QSyntaxHighlighter does not need to highlight the next blocks
+            stack = getattr(self._lexer, '_saved_state_stack', None)
+            if stack is not None:
                 # Clean up for the next go-round.
                 del self._lexer._saved_state_stack
+            TextBlockHelper.set_state(block, states.intern(stack))
 
+        if self.editor and self._lexer and self.enabled:
             # spaces
             text = original_text
             expression = QRegExp(r'\s+')
@@ -290,94 +519,280 @@ class PygmentsSH(SyntaxHighlighter):
                 self.setFormat(index, length, self._get_format(Whitespace))
                 index = expression.indexIn(text, index + length)
 
-            self._prev_block = block
+    def _set_token_format(self, index, length, token):
+        self.setFormat(index, length, self._get_format(token))
+
+    def _apply_runs(self, text, block):
+        """
+        Highlights a block using the token runs computed by the backend.
+
+        :return: False if there are no valid runs for the block.
+        """
+        if not self._runs or self._runs_lexer is not type(self._lexer):
+            return False
+        try:
+            line = self._runs[block.blockNumber()]
+        except IndexError:
+            return False
+        if line is None:
+            return False
+        runs, token_types, state = line
+        if sum(runs[::2]) != len(text):
+            return False
+        index = 0
+        for i in range(0, len(runs), 2):
+            length = runs[i]
+            self._set_token_format(index, length, token_types[runs[i + 1]])
+            index += length
+        TextBlockHelper.set_state(block, state)
+        return True
+
+    def highlighter_id(self):
+        """
+        Returns a string that identifies the highlighting of a document: the
+        lexer, the fold detector and the versions of pygments and of the
+        highlighter. Used to compute the key of the highlight cache entries.
+        """
+        import pygments
+        lexer = type(self._lexer)
+        if self.fold_detector is not None:
+            detector = type(self.fold_detector)
+            detector = '%s.%s' % (detector.__module__, detector.__name__)
+        else:
+            detector = ''
+        return '%s.%s:%s:%s:%d' % (lexer.__module__, lexer.__name__,
+                                   pygments.__version__, detector,
+                                   self.CACHE_VERSION)
+
+    def use_highlight_cache(self, cache):
+        """
+        Uses a highlight cache for the next text that is set on the document
+        (e.g. by :meth:`pyqode.core.managers.FileManager.open`).
+
+        If the cache has an entry for the text, the tokens and the fold levels
+        of the blocks are restored from the entry (no lexing is needed).
+        Otherwise, the document is lexed by the backend and the result is
+        stored in the cache once the document is highlighted.
+
+        :param cache: pyqode.core.cache.HighlightCache
+        """
+        self._highlight_cache = cache
+
+    def _on_contents_change(self, position, removed, added):
+        # the runs of the changed blocks (and of the blocks after them,
+        # whose numbers may have changed) are not valid anymore
+        document = self.document()
+        first = max(0, document.findBlock(position).blockNumber())
+        del self._runs[first:]
+        # the highlighting that is being dumped to the cache is outdated
+        self._dump = None
+        cache = self._highlight_cache
+        if (cache is not None and position == 0 and added and
+                added >= document.characterCount() - 1):
+            # new text (setPlainText first clears the document), its
+            # highlighting might be in the cache
+            self._highlight_cache = None
+            self._restore_highlighting(cache)
+        if self._backend_lexing:
+            if self._tokenize_from is None or first < self._tokenize_from:
+                self._tokenize_from = first
+            self._request_time = time.time()
+            self._tokenize_runner.request_job(self._request_tokens)
+        super(PygmentsSH, self)._on_contents_change(position, removed, added)
+
+    def _request_tokens(self):
+        """
+        Requests the backend to lex the document, from the first block that
+        changed to the end of the document.
+        """
+        first = self._tokenize_from
+        if first is None or not self._backend_lexing or self.editor is None:
+            return
+        if not is_regex_lexer(self._lexer):
+            # the backend cannot track the lexer states (e.g. CLexer), the
+            # blocks could not be lexed again locally after an edit
+            self._tokenize_from = None
+            return
+        document = self.document()
+        block = document.findBlockByNumber(first)
+        if not block.isValid():
+            self._tokenize_from = None
+            return
+        states = LexerStates.for_lexer(self._lexer)
+        previous = block.previous()
+        if previous.isValid():
+            stack = states.stack(TextBlockHelper.get_state(previous))
+        else:
+            stack = states.stack(0)
+        self._request_id += 1
+        self._requested_lexer = type(self._lexer)
+        data = {
+            'code': document.toPlainText()[block.position():],
+            'lexer': '%s.%s' % (self._requested_lexer.__module__,
+                                self._requested_lexer.__name__),
+            'stack': list(stack),
+            'request_id': self._request_id,
+            'first_line': first
+        }
+        try:
+            self.editor.backend.send_request(
+                tokenize, data, on_receive=self._on_tokens_received)
+        except NotRunning:
+            # retry later
+            QtCore.QTimer.singleShot(100, self._request_tokens)
+        else:
+            self._tokenize_from = None
+            self._request_time = time.time()
+
+    def _set_runs(self, first, results):
+        """
+        Sets the runs of the blocks, starting at block ``first``, from the
+        results of :func:`pyqode.core.backend.workers.tokenize`.
+        """
+        del self._runs[first:]
+        if results['states'] is None:
+            # the lexer states are unknown, the blocks are lexed locally
+            return
+        token_types = [string_to_tokentype(name)
+                       for name in results['token_types']]
+        table = LexerStates.for_lexer(self._lexer)
+        stacks = [table.intern(stack) for stack in results['stacks']]
+        states = results['states']
+        self._runs.extend([None] * (first - len(self._runs)))
+        for runs, state in zip(results['runs'], states):
+            self._runs.append((runs, token_types, stacks[state]))
+        self._runs_lexer = type(self._lexer)
+
+    def _restore_highlighting(self, cache):
+        """
+        Restores the runs and the fold levels of the blocks from the highlight
+        cache, before the new text is highlighted. If there is no entry, the
+        highlighting will be dumped to the cache.
+        """
+        document = self.document()
+        key = cache.key(document.toPlainText(), self.highlighter_id())
+        entry = cache.get(key)
+        if (entry is None or entry['states'] is None or
+                len(entry['runs']) != document.blockCount()):
+            self._dump_highlighting(cache, key)
+            return
+        _logger().debug('highlighting restored from cache: %s', key)
+        self._set_runs(0, entry)
+        if self.fold_detector is not None:
+            block = document.firstBlock()
+            for fold in entry['folds']:
+                TextBlockHelper.set_fold_lvl(block, fold & 0x3FF)
+                TextBlockHelper.set_fold_trigger(block, bool(fold & 0x400))
+                block = block.next()
+
+    def _dump_highlighting(self, cache, key):
+        """
+        Requests the backend to lex the whole document, the tokens are stored
+        in the cache with the fold levels once the document is highlighted.
+        """
+        if self.editor is None or not is_regex_lexer(self._lexer):
+            return
+        self._dump_id += 1
+        lexer = type(self._lexer)
+        data = {
+            'code': self.document().toPlainText(),
+            'lexer': '%s.%s' % (lexer.__module__, lexer.__name__),
+            'stack': ['root'],
+            'request_id': self._dump_id,
+            'first_line': 0
+        }
+        self._dump = [cache, key, self._dump_id, None]
+        try:
+            self.editor.backend.send_request(
+                tokenize, data, on_receive=self._on_dump_tokens_received)
+        except NotRunning:
+            # no cache entry this time
+            self._dump = None
+
+    def _on_dump_tokens_received(self, results):
+        if self._dump is None or results['request_id'] != self._dump[2]:
+            # the document changed since the request was sent
+            return
+        self._dump[3] = results
+        if not self.highlighting:
+            self._store_dump()
+
+    def _on_highlighting_progress(self, done, total):
+        if done == total and self._dump is not None and \
+                self._dump[3] is not None:
+            self._store_dump()
+
+    def _store_dump(self):
+        cache, key, _, results = self._dump
+        self._dump = None
+        folds = []
+        if self.fold_detector is not None:
+            block = self.document().firstBlock()
+            while block.isValid():
+                fold = TextBlockHelper.get_fold_lvl(block)
+                if TextBlockHelper.is_fold_trigger(block):
+                    fold |= 0x400
+                folds.append(fold)
+                block = block.next()
+        cache.set(key, {
+            'token_types': results['token_types'],
+            'runs': results['runs'],
+            'stacks': results['stacks'],
+            'states': results['states'],
+            'folds': folds
+        })
+
+    def _on_tokens_received(self, results):
+        self._received_id = results['request_id']
+        if (results['request_id'] != self._request_id or
+                self._tokenize_from is not None or self.editor is None or
+                not self._backend_lexing or
+                type(self._lexer) is not self._requested_lexer):
+            # the document changed since the request was sent
+            return
+        first = results['first_line']
+        self._set_runs(first, results)
+        document = self.document()
+        if (self.highlighting or document.blockCount() - first >
+                self.PROGRESSIVE_THRESHOLD):
+            self.rehighlight()
+        else:
+            block = document.findBlockByNumber(first)
+            while block.isValid():
+                self.rehighlightBlock(block)
+                block = block.next()
+
+    def _highlight_slice(self):
+        if (self._backend_lexing and
+                (self._tokenize_from is not None or
+                 self._received_id != self._request_id) and
+                time.time() - self._request_time <
+                self.BACKEND_LEXING_TIMEOUT):
+            # the backend is lexing the document, wait for its results
+            # instead of lexing the document here.
+            self._slice_timer.start(50)
+            return
+        super(PygmentsSH, self)._highlight_slice()
 
     def _update_style(self):
         """ Sets the style to the specified Pygments style.
         """
         try:
-            self._style = get_style_by_name(self._pygments_style)
+            get_style_by_name(self._pygments_style)
         except ClassNotFound:
             # unknown style, also happen with plugins style when used from a
             # frozen app.
-            if self._pygments_style == 'qt':
-                from pyqode.core.styles import QtStyle
-                self._style = QtStyle
-            elif self._pygments_style == 'darcula':
-                from pyqode.core.styles import DarculaStyle
-                self._style = DarculaStyle
-            else:
-                self._style = get_style_by_name('default')
+            if self._pygments_style not in ['qt', 'darcula']:
                 self._pygments_style = 'default'
-        self._clear_caches()
-
-    def _clear_caches(self):
-        """ Clear caches for brushes and formats.
-        """
-        self._brushes.clear()
-        self._formats.clear()
+        self._format_table = FormatTable.for_style(self._pygments_style)
+        self._style = self._format_table.style
 
     def _get_format(self, token):
         """ Returns a QTextCharFormat for token or None.
+
+        Formats come from the :class:`pyqode.core.api.FormatTable` of the
+        style, shared by all the highlighters.
         """
         if token == Whitespace:
             return self.editor.whitespaces_foreground
-
-        if token in self._formats:
-            return self._formats[token]
-
-        result = self._get_format_from_style(token, self._style)
-
-        self._formats[token] = result
-        return result
-
-    def _get_format_from_style(self, token, style):
-        """ Returns a QTextCharFormat for token by reading a Pygments style.
-        """
-        result = QtGui.QTextCharFormat()
-        try:
-            style = style.style_for_token(token)
-        except KeyError:
-            # fallback to plain text
-            style = style.style_for_token(Text)
-        for key, value in list(style.items()):
-            if value:
-                if key == 'color':
-                    result.setForeground(self._get_brush(value))
-                elif key == 'bgcolor':
-                    result.setBackground(self._get_brush(value))
-                elif key == 'bold':
-                    result.setFontWeight(QtGui.QFont.Bold)
-                elif key == 'italic':
-                    result.setFontItalic(True)
-                elif key == 'underline':
-                    result.setUnderlineStyle(
-                        QtGui.QTextCharFormat.SingleUnderline)
-                elif key == 'sans':
-                    result.setFontStyleHint(QtGui.QFont.SansSerif)
-                elif key == 'roman':
-                    result.setFontStyleHint(QtGui.QFont.Times)
-                elif key == 'mono':
-                    result.setFontStyleHint(QtGui.QFont.TypeWriter)
-        return result
-
-    def _get_brush(self, color):
-        """ Returns a brush for the color.
-        """
-        result = self._brushes.get(color)
-        if result is None:
-            qcolor = self._get_color(color)
-            result = QtGui.QBrush(qcolor)
-            self._brushes[color] = result
-        return result
-
-    @staticmethod
-    def _get_color(color):
-        """ Returns a QColor built from a Pygments color string.
-        """
-        color = str(color).replace("#", "")
-        qcolor = QtGui.QColor()
-        qcolor.setRgb(int(color[:2], base=16),
-                      int(color[2:4], base=16),
-                      int(color[4:6], base=16))
-        return qcolor
+        return self._format_table.token_format(token)
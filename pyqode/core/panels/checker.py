@@ -8,7 +8,7 @@ Checker panels:
 from pyqode.core import icons
 from pyqode.core.api import DelayJobRunner, TextHelper, CodeEdit
 from pyqode.core.api.panel import Panel, _logger
-from pyqode.core.modes.checker import CheckerMessages
+from pyqode.core.modes.checker import CheckerMessages, CheckerMode
 from pyqode.qt import QtCore, QtGui, QtWidgets
 
 
@@ -38,14 +38,16 @@ class CheckerPanel(Panel):
 
         :param line: The marker line.
 
-        :return: Marker of None
-        :rtype: pyqode.core.Marker
+        :return: list of checker messages
         """
-        block = self.editor.document().findBlockByNumber(line)
-        try:
-            return block.userData().messages
-        except AttributeError:
-            return []
+        messages = []
+        for mode in self._checker_modes():
+            messages += mode.messages_at_line(line)
+        return messages
+
+    def _checker_modes(self):
+        return [mode for mode in self.editor.modes
+                if isinstance(mode, CheckerMode)]
 
     def sizeHint(self):
         """
@@ -64,10 +66,10 @@ class CheckerPanel(Panel):
     def paintEvent(self, event):
         super(CheckerPanel, self).paintEvent(event)
         painter = QtGui.QPainter(self)
+        checker_modes = self._checker_modes()
         for top, block_nbr, block in self.editor.visible_blocks:
-            user_data = block.userData()
-            if user_data and user_data.messages:
-                for msg in user_data.messages:
+            for mode in checker_modes:
+                for msg in mode.messages_at_line(block_nbr):
                     icon = self._icon_from_message(msg)
                     if icon:
                         rect = QtCore.QRect()
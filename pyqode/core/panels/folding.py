@@ -408,8 +408,7 @@ class FoldingPanel(Panel):
         Clear scope decorations (on the editor)
 
         """
-        for deco in self._scope_decos:
-            self.editor.decorations.remove(deco)
+        self.editor.decorations.remove_many(self._scope_decos)
         self._scope_decos[:] = []
 
     def _get_scope_highlight_color(self):
@@ -575,7 +574,6 @@ class FoldingPanel(Panel):
         widget).
         """
         deco = TextDecoration(block)
-        deco.signals.clicked.connect(self._on_fold_deco_clicked)
         deco.tooltip = region.text(max_lines=25)
         deco.draw_order = 1
         deco.block = block
@@ -618,7 +616,8 @@ class FoldingPanel(Panel):
         """
         Unfold a folded block that has just been clicked by the user
         """
-        self.toggle_fold_trigger(deco.block)
+        if deco in self._block_decos:
+            self.toggle_fold_trigger(deco.block)
 
     def on_state_changed(self, state):
         """
@@ -631,6 +630,8 @@ class FoldingPanel(Panel):
                     self._highlight_caret_scope)
                 self._block_nbr = -1
             self.editor.new_text_set.connect(self._clear_block_deco)
+            self.editor.decorations.clicked.connect(
+                self._on_fold_deco_clicked)
         else:
             self.editor.key_pressed.disconnect(self._on_key_pressed)
             if self._highlight_caret:
@@ -638,6 +639,8 @@ class FoldingPanel(Panel):
                     self._highlight_caret_scope)
                 self._block_nbr = -1
             self.editor.new_text_set.disconnect(self._clear_block_deco)
+            self.editor.decorations.clicked.disconnect(
+                self._on_fold_deco_clicked)
 
     def _on_key_pressed(self, event):
         """
@@ -695,13 +698,13 @@ class FoldingPanel(Panel):
         cursor = self.editor.textCursor()
         if (self._prev_cursor is None or force or
                 self._prev_cursor.blockNumber() != cursor.blockNumber()):
-            for deco in self._block_decos:
-                self.editor.decorations.remove(deco)
-            for deco in self._block_decos:
-                deco.set_outline(drift_color(
-                    self._get_scope_highlight_color(), 110))
-                deco.set_background(self._get_scope_highlight_color())
-                self.editor.decorations.append(deco)
+            with self.editor.decorations.batch():
+                self.editor.decorations.remove_many(self._block_decos)
+                for deco in self._block_decos:
+                    deco.set_outline(drift_color(
+                        self._get_scope_highlight_color(), 110))
+                    deco.set_background(self._get_scope_highlight_color())
+                self.editor.decorations.append_many(self._block_decos)
         self._prev_cursor = cursor
 
     def _refresh_editor_and_scrollbars(self):
@@ -751,8 +754,7 @@ class FoldingPanel(Panel):
         """
         Clear the folded block decorations.
         """
-        for deco in self._block_decos:
-            self.editor.decorations.remove(deco)
+        self.editor.decorations.remove_many(self._block_decos)
         self._block_decos[:] = []
 
     def expand_all(self):
@@ -12,11 +12,15 @@ class GlobalCheckerPanel(Panel):
 
     The user can click on a marker to quickly go the the error line.
 
+    The markers are rendered in a pixmap that is only rebuilt when the
+    messages, the number of lines or the size of the panel changed.
     """
 
     def __init__(self):
         super(GlobalCheckerPanel, self).__init__()
         self.scrollable = True
+        self._pixmap = None
+        self._pixmap_key = None
 
     def _draw_messages(self, painter):
         """
@@ -29,16 +33,45 @@ class GlobalCheckerPanel(Panel):
         for m in self.editor.modes:
             if isinstance(m, modes.CheckerMode):
                 checker_modes.append(m)
+        key = (self.editor.blockCount(), self.editor.viewport().height(),
+               self.size(), [(id(m), m.revision) for m in checker_modes])
+        if self._pixmap is None or key != self._pixmap_key:
+            self._pixmap = self._render_messages(checker_modes)
+            self._pixmap_key = key
+        painter.drawPixmap(0, 0, self._pixmap)
+
+    def _render_messages(self, checker_modes):
+        """
+        Renders the markers of all messages in a pixmap. Messages are bucketed
+        by pixel row, only the most severe message of a row is drawn.
+        """
+        pixmap = QtGui.QPixmap(self.size())
+        pixmap.fill(QtCore.Qt.transparent)
+        marker_height = self.get_marker_height()
+        rows = {}
         for checker_mode in checker_modes:
+            checker_mode.update_lines()
             for msg in checker_mode.messages:
-                block = msg.block
-                color = QtGui.QColor(msg.color)
-                brush = QtGui.QBrush(color)
-                rect = QtCore.QRect()
-                rect.setX(self.sizeHint().width() / 4)
-                rect.setY(block.blockNumber() * self.get_marker_height())
-                rect.setSize(self.get_marker_size())
-                painter.fillRect(rect, brush)
+                row = int(msg.line * marker_height)
+                try:
+                    if rows[row].status >= msg.status:
+                        continue
+                except KeyError:
+                    pass
+                rows[row] = msg
+        painter = QtGui.QPainter(pixmap)
+        size = self.get_marker_size()
+        x = self.sizeHint().width() // 4
+        brushes = {}
+        for row, msg in rows.items():
+            try:
+                brush = brushes[msg.color]
+            except KeyError:
+                brush = brushes[msg.color] = QtGui.QBrush(
+                    QtGui.QColor(msg.color))
+            painter.fillRect(QtCore.QRect(QtCore.QPoint(x, row), size), brush)
+        painter.end()
+        return pixmap
 
     def _draw_visible_area(self, painter):
         """
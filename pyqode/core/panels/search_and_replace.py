@@ -9,7 +9,8 @@ from pyqode.qt import QtCore, QtGui, QtWidgets
 
 from pyqode.core import icons
 from pyqode.core._forms.search_panel_ui import Ui_SearchPanel
-from pyqode.core.api.decoration import TextDecoration
+from pyqode.core.api.decoration import TextDecoration, TextRanges, \
+    ViewportDecorations
 from pyqode.core.api.panel import Panel
 from pyqode.core.api.utils import DelayJobRunner, TextHelper
 from pyqode.core.backend import NotRunning
@@ -83,13 +84,6 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
     #: Signal emitted when a search operation finished
     search_finished = QtCore.Signal()
 
-    #: Define the maximum number of occurences that can be highlighted
-    #: in the document.
-    #:
-    #: .. note:: The search operation itself is fast but the creation of all
-    #:    the extra selection used to highlight search result can be slow.
-    MAX_HIGHLIGHTED_OCCURENCES = 500
-
     @property
     def background(self):
         """ Text decoration background """
@@ -139,9 +133,15 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
         self.cpt_occurences = 0
         self._previous_stylesheet = ""
         self._separator = None
-        self._decorations = []
-        self._occurrences = []
+        self._decorations = None
+        self._occurrences = TextRanges()
         self._current_occurrence_index = 0
+        self._offset = 0
+        # (sub, flags, document revision, scope) of the last search whose
+        # results are displayed and of the last search sent to the backend.
+        self._last_search = None
+        self._pending_search = None
+        self._searches_in_flight = 0
         self._bg = None
         self._fg = None
         self._update_buttons(txt="")
@@ -211,13 +211,14 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
         super(SearchAndReplacePanel, self).on_install(editor)
         self.hide()
         self.text_helper = TextHelper(editor)
+        # only the occurrences that are close to the visible blocks get a
+        # decoration, this lets us highlight an unlimited number of results.
+        self._decorations = ViewportDecorations(
+            editor, self._create_decoration)
 
     def _refresh_decorations(self):
-        for deco in self._decorations:
-            self.editor.decorations.remove(deco)
-            deco.set_background(QtGui.QBrush(self.background))
-            deco.set_outline(self._outline)
-            self.editor.decorations.append(deco)
+        if self._decorations is not None:
+            self._decorations.refresh(force=True)
 
     def on_state_changed(self, state):
         super(SearchAndReplacePanel, self).on_state_changed(state)
@@ -263,6 +264,7 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
             # internal updates slots
             self.lineEditReplace.textChanged.disconnect(self._update_buttons)
             self.search_finished.disconnect(self._on_search_finished)
+            self._clear_decorations()
 
     def close_panel(self):
         """
@@ -325,10 +327,14 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
         if txt is None or isinstance(txt, int):
             txt = self.lineEditSearch.text()
         if txt:
-            self.job_runner.request_job(
-                self._exec_search, txt, self._search_flags())
+            flags = self._search_flags()
+            if self._refine_search(txt, flags):
+                self.job_runner.cancel_requests()
+            else:
+                self.job_runner.request_job(self._exec_search, txt, flags)
         else:
             self.job_runner.cancel_requests()
+            self._last_search = None
             self._clear_occurrences()
             self._on_search_finished()
 
@@ -356,11 +362,12 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
 
     def get_occurences(self):
         """
-        Returns the list of text occurrences.
+        Returns the text occurrences.
 
         An occurrence is a tuple that contains start and end positions.
 
-        :return: List of tuple(int, int)
+        :return: Sorted sequence of tuple(int, int)
+        :rtype: pyqode.core.api.TextRanges
         """
         return self._occurrences
 
@@ -474,6 +481,7 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
             cursor.insertText(text)
             self.editor.setTextCursor(cursor)
             self._remove_occurrence(current_occurences, offset)
+            self._decorations.set_ranges(self._occurrences)
             current_occurences -= 1
             self._set_current_occurrence(current_occurences)
             self.select_next()
@@ -490,15 +498,67 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
         """
         Replaces all occurrences in the editor's document.
 
+        The new text is computed in a single pass over the occurrences and
+        applied as one undoable edit, decorations and the matches counter are
+        updated once at the end.
+
         :param text: The replacement text. If None, the content of the lineEdit
                      replace will be used instead
         """
-        cursor = self.editor.textCursor()
-        cursor.beginEditBlock()
-        remains = self.replace(text=text)
-        while remains:
-            remains = self.replace(text=text)
-        cursor.endEditBlock()
+        if text is None or isinstance(text, bool):
+            text = self.lineEditReplace.text()
+        occurrences = self.get_occurences()
+        if not occurrences:
+            return
+        start = occurrences[0][0]
+        end = max(occ_end for _, occ_end in occurrences)
+        new_text = self._replace_occurrences(
+            self.editor.toPlainText()[start:end], occurrences, start, text)
+        # prevent search request due to editor textChanged
+        try:
+            self.editor.textChanged.disconnect(self.request_search)
+        except (RuntimeError, TypeError):
+            # already disconnected
+            pass
+        try:
+            cursor = self.editor.textCursor()
+            cursor.beginEditBlock()
+            cursor.setPosition(start)
+            cursor.setPosition(end, cursor.KeepAnchor)
+            cursor.insertText(new_text)
+            cursor.endEditBlock()
+            self.editor.setTextCursor(cursor)
+        finally:
+            self.editor.textChanged.connect(self.request_search)
+        self._clear_occurrences()
+        self._clear_decorations()
+        self._set_current_occurrence(-1)
+        self.cpt_occurences = 0
+        self._update_label_matches()
+        self._update_buttons()
+
+    @staticmethod
+    def _replace_occurrences(text, occurrences, offset, replacement):
+        """
+        Returns ``text`` with every occurrence replaced by ``replacement``.
+
+        :param text: text to process, starting at position ``offset`` in the
+            document.
+        :param occurrences: sorted sequence of (start, end) document positions.
+        :param offset: document position of the first character of ``text``.
+        :param replacement: replacement text
+        """
+        chunks = []
+        previous_end = offset
+        for start, end in occurrences:
+            if start < previous_end:
+                # overlapping occurrence, already replaced
+                continue
+            chunks.append(text[previous_end - offset:start - offset])
+            chunks.append(replacement)
+            previous_end = end
+        chunks.append(text[previous_end - offset:])
+        return ''.join(chunks)
 
     def eventFilter(self, obj, event):
         if event.type() == QtCore.QEvent.KeyPress:
@@ -531,13 +591,69 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
                 self.checkBoxWholeWords.isChecked(),
                 self.checkBoxInSelection.isChecked())
 
+    def _search_scope(self, flags):
+        """
+        Returns the (start, end) positions of the selection the search is
+        restricted to, or None if the whole document is searched.
+        """
+        tc = self.editor.textCursor()
+        if flags[3] and tc.hasSelection():
+            return tc.selectionStart(), tc.selectionEnd()
+        return None
+
+    def _refine_search(self, sub, flags):
+        """
+        Narrows down the displayed occurrences locally when ``sub`` extends
+        the previous plain text search (same flags, same document revision,
+        same scope).
+
+        Every occurrence of ``sub`` is also an occurrence of the previous
+        search text, so we just need to check the characters that follow each
+        previous occurrence, instead of searching the whole document again.
+
+        :returns: True if the search could be refined, False if a full search
+            is needed.
+        """
+        if self._last_search is None or self._searches_in_flight:
+            return False
+        prev_sub, prev_flags, revision, scope = self._last_search
+        regex, case_sensitive, whole_word, in_selection = flags
+        doc = self.editor.document()
+        if (regex or whole_word or flags != prev_flags or
+                revision != doc.revision() or
+                scope != self._search_scope(flags) or
+                len(sub) <= len(prev_sub)):
+            return False
+        if not case_sensitive:
+            sub = sub.lower()
+            prev_sub = prev_sub.lower()
+        if not sub.startswith(prev_sub):
+            return False
+        suffix = sub[len(prev_sub):]
+        limit = scope[1] if scope else doc.characterCount() - 1
+        occurrences = []
+        for start, end in self._occurrences:
+            new_end = end + len(suffix)
+            if new_end > limit:
+                break
+            chars = ''.join(doc.characterAt(i) for i in range(end, new_end))
+            if not case_sensitive:
+                chars = chars.lower()
+            if chars == suffix:
+                occurrences.append((start, new_end))
+        self._occurrences = TextRanges(occurrences)
+        self._last_search = (sub, flags, revision, scope)
+        self._on_search_finished()
+        return True
+
     def _exec_search(self, sub, flags):
         if self.editor is None:
             return
         regex, case_sensitive, whole_word, in_selection = flags
         tc = self.editor.textCursor()
         assert isinstance(tc, QtGui.QTextCursor)
-        if in_selection and tc.hasSelection():
+        scope = self._search_scope(flags)
+        if scope:
             text = tc.selectedText()
             self._offset = tc.selectionStart()
         else:
@@ -550,17 +666,29 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
             'whole_word': whole_word,
             'case_sensitive': case_sensitive
         }
+        self._pending_search = (
+            sub, flags, self.editor.document().revision(), scope)
+        self._searches_in_flight += 1
         try:
             self.editor.backend.send_request(findall, request_data,
                                              self._on_results_available)
         except AttributeError:
             self._on_results_available(findall(request_data))
         except NotRunning:
+            self._searches_in_flight -= 1
             QtCore.QTimer.singleShot(100, self.request_search)
 
     def _on_results_available(self, results):
-        self._occurrences = [(start + self._offset, end + self._offset)
-                             for start, end in results]
+        self._searches_in_flight = max(0, self._searches_in_flight - 1)
+        if self._searches_in_flight:
+            # we can't tell which request those results belong to, don't
+            # try to refine them.
+            self._last_search = None
+        else:
+            self._last_search = self._pending_search
+        self._occurrences = TextRanges(
+            (start + self._offset, end + self._offset)
+            for start, end in results)
         self._on_search_finished()
 
     def _update_label_matches(self):
@@ -573,15 +701,9 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
             self.labelMatches.clear()
 
     def _on_search_finished(self):
-        self._clear_decorations()
-        all_occurences = self.get_occurences()
-        occurrences = all_occurences[:self.MAX_HIGHLIGHTED_OCCURENCES]
-        for i, occurrence in enumerate(occurrences):
-            deco = self._create_decoration(occurrence[0],
-                                           occurrence[1])
-            self._decorations.append(deco)
-            self.editor.decorations.append(deco)
-        self.cpt_occurences = len(all_occurences)
+        occurrences = self.get_occurences()
+        self._decorations.set_ranges(occurrences)
+        self.cpt_occurences = len(occurrences)
         if not self.cpt_occurences:
             self._current_occurrence_index = -1
         else:
@@ -594,7 +716,7 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
         return ret_val
 
     def _clear_occurrences(self):
-        self._occurrences[:] = []
+        self._occurrences = TextRanges()
 
     def _create_decoration(self, selection_start, selection_end):
         """ Creates the text occurences decoration """
@@ -608,24 +730,14 @@ class SearchAndReplacePanel(Panel, Ui_SearchPanel):
 
     def _clear_decorations(self):
         """ Remove all decorations """
-        for deco in self._decorations:
-            self.editor.decorations.remove(deco)
-        self._decorations[:] = []
+        if self._decorations is not None:
+            self._decorations.clear()
 
     def _set_current_occurrence(self, current_occurence_index):
         self._current_occurrence_index = current_occurence_index
 
     def _remove_occurrence(self, i, offset=0):
-        self._occurrences.pop(i)
-        if offset:
-            updated_occurences = []
-            for j, occ in enumerate(self._occurrences):
-                if j >= i:
-                    updated_occurences.append(
-                        (occ[0] + offset, occ[1] + offset))
-                else:
-                    updated_occurences.append((occ[0], occ[1]))
-            self._occurrences = updated_occurences
+        self._occurrences.remove(i, offset)
 
     def _update_buttons(self, txt=""):
         enable = self.cpt_occurences > 1
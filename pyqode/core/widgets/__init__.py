@@ -11,8 +11,14 @@ pyqode applications:
       the compiler output,...
     - CodeEditTabWidget: tab widget made to handle CodeEdit instances (or
       any other object that have the same interface).
-    - ErrorsTable: a QTableWidget specialised to show CheckerMessage.
+    - ErrorsTable: a QTableView specialised to show CheckerMessage.
+    - FindInFilesWidget: a widget that searches a text in all the files of a
+      directory and shows the results.
+    - LargeFileViewer: a read-only viewer for files that are too big to be
+      opened in a CodeEdit.
     - OutlineTreeWidget: a widget that show the outline of an editor.
+    - ProjectChecker: checks all the files of a project in the background and
+      shows the messages in an ErrorsTable.
 
 
 """
@@ -21,7 +27,9 @@ from pyqode.core.widgets.encodings import (EncodingsComboBox, EncodingsMenu,
                                            EncodingsContextMenu)
 from pyqode.core.widgets.errors_table import ErrorsTable
 from pyqode.core.widgets.file_icons_provider import FileIconProvider
+from pyqode.core.widgets.find_in_files import FindInFilesWidget
 from pyqode.core.widgets.interactive import InteractiveConsole  # Deprecated
+from pyqode.core.widgets.large_file_viewer import LargeFileViewer
 from pyqode.core.widgets.menu_recents import MenuRecentFiles
 from pyqode.core.widgets.menu_recents import RecentFilesManager
 from pyqode.core.widgets.preview import HtmlPreviewWidget
@@ -29,6 +37,7 @@ from pyqode.core.widgets.tabs import TabWidget
 from pyqode.core.widgets.tab_bar import TabBar
 from pyqode.core.widgets.prompt_line_edit import PromptLineEdit
 from pyqode.core.widgets.outline import OutlineTreeWidget
+from pyqode.core.widgets.project_checker import ProjectChecker
 from pyqode.core.widgets.splittable_tab_widget import (
     SplittableTabWidget, SplittableCodeEditTabWidget)
 from pyqode.core.widgets.filesystem_treeview import FileSystemTreeView
@@ -43,7 +52,9 @@ __all__ = [
     'FileSystemContextMenu',
     'FileSystemTreeView',
     'InteractiveConsole',
+    'LargeFileViewer',
     'FileIconProvider',
+    'FindInFilesWidget',
     'FileSystemHelper',
     'MenuRecentFiles',
     'RecentFilesManager',
@@ -55,6 +66,7 @@ __all__ = [
     'GenericCodeEdit',
     'PromptLineEdit',
     'OutlineTreeWidget',
+    'ProjectChecker',
     'SplittableTabWidget',
     'SplittableCodeEditTabWidget',
     'TabBar',
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 """
-Contains a custom QTableWidget for easier displaying of CheckerMessages
+Contains a custom QTableView for easier displaying of CheckerMessages
 """
+import os
+from array import array
+
 from pyqode.core.api.utils import memoized
 from pyqode.core.modes import CheckerMessage, CheckerMessages
 from pyqode.qt import QtCore, QtWidgets, QtGui
@@ -13,15 +16,273 @@ COL_LINE_NBR = 2
 COL_MSG = 3
 
 
-class ErrorsTable(QtWidgets.QTableWidget):
+class ErrorsTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model that holds the messages shown by an :class:`ErrorsTable`.
+
+    The model keeps a reference to each message (see :meth:`message`) and
+    copies the fields used for sorting and filtering in column arrays (the
+    path is stored as an index in a list of unique paths). Sorting and
+    filtering are done on those arrays, the model maps the displayed rows to
+    the stored messages.
     """
-    Extends a QtWidgets.QTableWidget to easily show
+    HEADERS = ["Type", "File name", "Line", "Description"]
+
+    def __init__(self, parent=None):
+        super(ErrorsTableModel, self).__init__(parent)
+        #: Icons used for the type column, maps a message status to a QIcon
+        self.icons = {}
+        self._statuses = array('b')
+        self._lines = array('l')
+        self._path_ids = array('l')
+        #: the messages, in insertion order
+        self._messages = []
+        #: unique paths and their file names
+        self._paths = []
+        self._file_names = []
+        self._path_index = {}
+        #: ids of the displayed messages, in display order
+        self._rows = array('l')
+        self._sort_column = -1
+        self._sort_order = QtCore.Qt.AscendingOrder
+        self._filter_text = ''
+        self._filter_statuses = None
+
+    # public API
+    # ----------
+    def append(self, messages):
+        """
+        Appends a list of messages.
+
+        If the model is not sorted, the rows are inserted at the end of the
+        table, otherwise the model is reset.
+
+        :param messages: list of CheckerMessage
+        """
+        start = len(self._messages)
+        self._store(messages)
+        new_rows = [i for i in range(start, len(self._messages))
+                    if self._accept(i)]
+        if not new_rows:
+            return
+        if self._sort_column == -1:
+            first = len(self._rows)
+            self.beginInsertRows(QtCore.QModelIndex(), first,
+                                 first + len(new_rows) - 1)
+            self._rows.extend(new_rows)
+            self.endInsertRows()
+        else:
+            self.beginResetModel()
+            self._rows.extend(new_rows)
+            self._sort_rows()
+            self.endResetModel()
+
+    def reset(self, messages=()):
+        """
+        Replaces all the messages of the model.
+
+        :param messages: list of CheckerMessage
+        """
+        self.beginResetModel()
+        self._clear()
+        self._store(messages)
+        self._update_rows()
+        self.endResetModel()
+
+    def remove_path(self, path):
+        """
+        Removes the messages of a file.
+
+        :param path: path of the file.
+        """
+        try:
+            path_id = self._path_index[path]
+        except KeyError:
+            return
+        if path_id not in self._path_ids:
+            return
+        keep = [i for i, pid in enumerate(self._path_ids) if pid != path_id]
+        self.beginResetModel()
+        self._statuses = array('b', (self._statuses[i] for i in keep))
+        self._lines = array('l', (self._lines[i] for i in keep))
+        self._path_ids = array('l', (self._path_ids[i] for i in keep))
+        self._messages = [self._messages[i] for i in keep]
+        self._update_rows()
+        self.endResetModel()
+
+    def set_filter(self, text='', statuses=None):
+        """
+        Shows only the messages whose description or file name contains
+        ``text`` (case insensitive) and whose status is in ``statuses``.
+
+        :param text: text to look for, empty to show all messages.
+        :param statuses: list of message status to show, None to show all
+            status.
+        """
+        self._filter_text = text.lower()
+        self._filter_statuses = None if statuses is None else set(statuses)
+        self.beginResetModel()
+        self._update_rows()
+        self.endResetModel()
+
+    def message(self, row):
+        """
+        Returns the message displayed at ``row``.
+
+        :param row: row number
+        :rtype: pyqode.core.modes.CheckerMessage
+        """
+        return self._messages[self._rows[row]]
+
+    # QAbstractTableModel interface
+    # -----------------------------
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole:
+            if orientation == QtCore.Qt.Horizontal:
+                return self.HEADERS[section]
+            return str(section + 1)
+        return None
+
+    def flags(self, index):
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self._rows[index.row()]
+        column = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if column == COL_TYPE:
+                return CheckerMessage.status_to_string(self._statuses[i])
+            elif column == COL_FILE_NAME:
+                path_id = self._path_ids[i]
+                return '' if path_id == -1 else self._file_names[path_id]
+            elif column == COL_LINE_NBR:
+                line = self._lines[i]
+                return '-' if line < 0 else str(line + 1)
+            return self._messages[i].description
+        elif role == QtCore.Qt.DecorationRole and column == COL_TYPE:
+            return self.icons.get(self._statuses[i])
+        elif role == QtCore.Qt.ToolTipRole and column == COL_FILE_NAME:
+            path_id = self._path_ids[i]
+            return None if path_id == -1 else self._paths[path_id]
+        return None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self._sort_rows()
+        self.layoutChanged.emit()
+
+    # implementation
+    # --------------
+    def _clear(self):
+        self._statuses = array('b')
+        self._lines = array('l')
+        self._path_ids = array('l')
+        self._messages = []
+        self._paths = []
+        self._file_names = []
+        self._path_index = {}
+        self._rows = array('l')
+
+    def _path_id(self, path):
+        if path is None:
+            return -1
+        try:
+            return self._path_index[path]
+        except KeyError:
+            path_id = self._path_index[path] = len(self._paths)
+            self._paths.append(path)
+            self._file_names.append(os.path.basename(path))
+            return path_id
+
+    def _store(self, messages):
+        for msg in messages:
+            self._statuses.append(msg.status)
+            self._lines.append(msg.line)
+            self._path_ids.append(self._path_id(msg.path))
+            self._messages.append(msg)
+
+    def _accept(self, i):
+        if (self._filter_statuses is not None and
+                self._statuses[i] not in self._filter_statuses):
+            return False
+        if self._filter_text:
+            path_id = self._path_ids[i]
+            file_name = '' if path_id == -1 else self._file_names[path_id]
+            return (self._filter_text in
+                    self._messages[i].description.lower() or
+                    self._filter_text in file_name.lower())
+        return True
+
+    def _update_rows(self):
+        nb_messages = len(self._messages)
+        if not self._filter_text and self._filter_statuses is None:
+            self._rows = array('l', range(nb_messages))
+        else:
+            self._rows = array('l', (i for i in range(nb_messages)
+                                     if self._accept(i)))
+        self._sort_rows()
+
+    def _sort_key(self):
+        if self._sort_column == COL_TYPE:
+            return self._statuses.__getitem__
+        elif self._sort_column == COL_FILE_NAME:
+            file_names = self._file_names
+            path_ids = self._path_ids
+            lines = self._lines
+
+            def key(i):
+                path_id = path_ids[i]
+                return ('' if path_id == -1 else file_names[path_id],
+                        lines[i])
+            return key
+        elif self._sort_column == COL_LINE_NBR:
+            return self._lines.__getitem__
+        messages = self._messages
+        return lambda i: messages[i].description
+
+    def _sort_rows(self):
+        if self._sort_column == -1:
+            return
+        self._rows = array('l', sorted(
+            self._rows, key=self._sort_key(),
+            reverse=self._sort_order == QtCore.Qt.DescendingOrder))
+
+
+class ErrorsTable(QtWidgets.QTableView):
+    """
+    Extends a QtWidgets.QTableView to easily show
     :class:`pyqode.core.modes.CheckerMessage`.
 
     You add messages to the table using
-    :meth:`pyqode.core.widgets.ErrorsTable.add_message`.
+    :meth:`pyqode.core.widgets.ErrorsTable.add_message` or
+    :meth:`pyqode.core.widgets.ErrorsTable.add_messages`.
+
+    You clear the table using :meth:`pyqode.core.widgets.ErrorsTable.clear`.
+
+    The messages are stored in an :class:`ErrorsTableModel`, which sorts and
+    filters them on compact arrays: adding, sorting or filtering tens of
+    thousands of messages is fast. Prefer the bulk methods
+    (:meth:`add_messages`, :meth:`set_messages`) to add many messages.
 
-    You clear the table using :meth:`pyqode.core.widgets.ErrorsTable`.
+    .. note:: ErrorsTable used to be a QTableWidget. :meth:`item`,
+        :meth:`currentItem` and :meth:`columnCount` are kept for
+        compatibility: they return copies of the displayed cells, the message
+        is stored in the ``QtCore.Qt.UserRole`` data of the items. Changing
+        those items has no effect on the table.
     """
     #: Signal emitted when a message is activated, the clicked signal is passed
     #: as a parameter
@@ -34,10 +295,11 @@ class ErrorsTable(QtWidgets.QTableWidget):
     }
 
     def __init__(self, parent=None):
-        QtWidgets.QTableWidget.__init__(self, parent)
-        self.setColumnCount(6)
-        self.setHorizontalHeaderLabels(
-            ["Type", "File name", "Line", "Description", 'Details'])
+        QtWidgets.QTableView.__init__(self, parent)
+        self._model = ErrorsTableModel(self)
+        self._model.icons = dict((status, self._make_icon(status))
+                                 for status in self.ICONS)
+        self.setModel(self._model)
         try:
             # pyqt4
             self.horizontalHeader().setResizeMode(
@@ -50,8 +312,10 @@ class ErrorsTable(QtWidgets.QTableWidget):
                 QtWidgets.QHeaderView.ResizeToContents)
             self.horizontalHeader().setSectionResizeMode(
                 COL_MSG, QtWidgets.QHeaderView.Stretch)
+            # only measure the visible rows, not the whole table
+            self.horizontalHeader().setResizeContentsPrecision(0)
         self.setMinimumSize(900, 200)
-        self.itemActivated.connect(self._on_item_activated)
+        self.activated.connect(self._on_item_activated)
         self.setSelectionMode(self.SingleSelection)
         self.setSelectionBehavior(self.SelectRows)
         self.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
@@ -63,14 +327,14 @@ class ErrorsTable(QtWidgets.QTableWidget):
         self.action_copy.triggered.connect(self._copy_cell_text)
         self.context_mnu.addAction(self.action_details)
         self.context_mnu.addAction(self.action_copy)
-        self.clear()
 
     def _copy_cell_text(self):
         """
-        Copies the description of the selected message to the clipboard
+        Copies the text of the selected cell to the clipboard
         """
-        txt = self.currentItem().text()
-        QtWidgets.QApplication.clipboard().setText(txt)
+        txt = self.currentIndex().data()
+        if txt is not None:
+            QtWidgets.QApplication.clipboard().setText(txt)
 
     def _show_context_menu(self, pos):
         """ Shows the context menu """
@@ -80,11 +344,67 @@ class ErrorsTable(QtWidgets.QTableWidget):
         """
         Clears the tables and the message list
         """
-        QtWidgets.QTableWidget.clear(self)
-        self.setRowCount(0)
-        self.setColumnCount(4)
-        self.setHorizontalHeaderLabels(
-            ["Type", "File name", "Line", "Description"])
+        self._model.reset()
+
+    def rowCount(self):
+        """
+        Returns the number of messages shown in the table.
+        """
+        return self._model.rowCount()
+
+    def columnCount(self):
+        """
+        Returns the number of columns of the table.
+        """
+        return self._model.columnCount()
+
+    def message(self, row):
+        """
+        Returns the message displayed at ``row``.
+
+        :param row: row number
+        :rtype: pyqode.core.modes.CheckerMessage
+        """
+        return self._model.message(row)
+
+    def item(self, row, column):
+        """
+        Returns a copy of a cell of the table, as a QTableWidgetItem whose
+        ``QtCore.Qt.UserRole`` data is the message displayed at ``row``.
+
+        Kept for compatibility with the QTableWidget API, prefer
+        :meth:`message` and the model indexes.
+
+        :param row: row number
+        :param column: column number
+        :return: QtWidgets.QTableWidgetItem or None if the cell does not
+            exist.
+        """
+        index = self._model.index(row, column)
+        if not index.isValid():
+            return None
+        item = QtWidgets.QTableWidgetItem(index.data())
+        icon = index.data(QtCore.Qt.DecorationRole)
+        if icon is not None:
+            item.setIcon(icon)
+        tooltip = index.data(QtCore.Qt.ToolTipRole)
+        if tooltip is not None:
+            item.setToolTip(tooltip)
+        item.setFlags(self._model.flags(index))
+        item.setData(QtCore.Qt.UserRole, self._model.message(row))
+        return item
+
+    def currentItem(self):
+        """
+        Returns a copy of the current cell, see :meth:`item`.
+
+        :return: QtWidgets.QTableWidgetItem or None if there is no current
+            cell.
+        """
+        index = self.currentIndex()
+        if not index.isValid():
+            return None
+        return self.item(index.row(), index.column())
 
     @classmethod
     @memoized
@@ -110,50 +430,59 @@ class ErrorsTable(QtWidgets.QTableWidget):
         :param msg: The message to append
         :type msg: pyqode.core.modes.CheckerMessage
         """
-        row = self.rowCount()
-        self.insertRow(row)
-
-        # type
-        item = QtWidgets.QTableWidgetItem(
-            self._make_icon(msg.status), msg.status_string)
-        item.setFlags(QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable)
-        item.setData(QtCore.Qt.UserRole, msg)
-        self.setItem(row, COL_TYPE, item)
-
-        # filename
-        item = QtWidgets.QTableWidgetItem(
-            QtCore.QFileInfo(msg.path).fileName())
-        item.setFlags(QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable)
-        item.setData(QtCore.Qt.UserRole, msg)
-        self.setItem(row, COL_FILE_NAME, item)
-
-        # line
-        if msg.line < 0:
-            item = QtWidgets.QTableWidgetItem("-")
-        else:
-            item = QtWidgets.QTableWidgetItem(str(msg.line + 1))
-        item.setFlags(QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable)
-        item.setData(QtCore.Qt.UserRole, msg)
-        self.setItem(row, COL_LINE_NBR, item)
+        self._model.append([msg])
 
-        # desc
-        item = QtWidgets.QTableWidgetItem(msg.description)
-        item.setFlags(QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable)
-        item.setData(QtCore.Qt.UserRole, msg)
-        self.setItem(row, COL_MSG, item)
+    def add_messages(self, messages):
+        """
+        Adds a list of checker messages to the table (e.g. the messages of a
+        :class:`pyqode.core.modes.CheckerMode`).
+
+        :param messages: The messages to append
+        """
+        self._model.append(messages)
+
+    def set_messages(self, messages):
+        """
+        Replaces the messages of the table.
+
+        :param messages: The new messages
+        """
+        self._model.reset(messages)
+
+    def remove_messages(self, path):
+        """
+        Removes the messages of a file from the table.
+
+        :param path: path of the file.
+        """
+        self._model.remove_path(path)
+
+    def set_filter(self, text='', statuses=None):
+        """
+        Shows only the messages whose description or file name contains
+        ``text`` (case insensitive) and whose status is in ``statuses``.
+
+        :param text: text to look for, empty to show all messages.
+        :param statuses: list of message status to show (see
+            :class:`pyqode.core.modes.CheckerMessages`), None to show all
+            status.
+        """
+        self._model.set_filter(text, statuses)
 
-    def _on_item_activated(self, item):
+    def _on_item_activated(self, index):
         """
         Emits the message activated signal
         """
-        msg = item.data(QtCore.Qt.UserRole)
-        self.msg_activated.emit(msg)
+        self.msg_activated.emit(self._model.message(index.row()))
 
     def showDetails(self):
         """
         Shows the error details.
         """
-        msg = self.currentItem().data(QtCore.Qt.UserRole)
+        index = self.currentIndex()
+        if not index.isValid():
+            return
+        msg = self._model.message(index.row())
         desc = msg.description
         desc = desc.replace('\r\n', '\n').replace('\r', '\n')
         desc = desc.replace('\n', '<br/>')
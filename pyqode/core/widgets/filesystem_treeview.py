@@ -42,11 +42,14 @@ class FileSystemTreeView(QtWidgets.QTreeView):
         Excludes :attr:`ignored_directories` and :attr:`ignored_extensions`
         from the file system model.
         """
+        #: The default list of ignore patterns
+        DEFAULT_IGNORED_PATTERNS = [
+            '*.pyc', '*.pyo', '*.coverage', '.DS_Store', '__pycache__']
+
         def __init__(self):
             super(FileSystemTreeView.FilterProxyModel, self).__init__()
             #: The list of file extension to exclude
-            self.ignored_patterns = [
-                '*.pyc', '*.pyo', '*.coverage', '.DS_Store', '__pycache__']
+            self.ignored_patterns = list(self.DEFAULT_IGNORED_PATTERNS)
             self._ignored_unused = []
 
         def set_root_path(self, path):
@@ -167,6 +170,20 @@ class FileSystemTreeView(QtWidgets.QTreeView):
         for ext in extensions:
             self.add_ignore_patterns('*%s' % ext)
 
+    @property
+    def ignore_patterns(self):
+        """
+        Returns the complete list of ignore patterns: the default patterns of
+        the filter model and the patterns added with
+        :meth:`add_ignore_patterns`.
+
+        This list can be passed to
+        :meth:`pyqode.core.widgets.FindInFilesWidget.search` to search the
+        same files as the ones shown in the tree view.
+        """
+        return (self.FilterProxyModel.DEFAULT_IGNORED_PATTERNS +
+                self._ignored_patterns)
+
     def clear_ignore_patterns(self):
         """
         Clears the list of ignore patterns
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains the widget used to display the results of a project
+wide search (find in files).
+
+"""
+import os
+import uuid
+from pyqode.core.api import TextHelper
+from pyqode.core.backend import NotRunning
+from pyqode.core.backend.workers import FindInFilesWorker
+from pyqode.core.cache import Cache
+from pyqode.qt import QtCore, QtWidgets
+
+
+class FindInFilesWidget(QtWidgets.QTreeWidget):
+    """
+    Searches a text in all the files of a directory and displays the hits,
+    grouped by file.
+
+    The search is performed by :class:`pyqode.core.backend.FindInFilesWorker`
+    in the backend process (files are scanned by a pool of processes) and the
+    hits are streamed back to the widget in batches, while the search is
+    still running.
+
+    Hits can be opened in a
+    :class:`pyqode.core.widgets.SplittableCodeEditTabWidget` by setting
+    :attr:`tab_widget`::
+
+        widget = FindInFilesWidget()
+        widget.tab_widget = tab_widget
+        widget.search(editor.backend, '/path/to/project', 'TODO',
+                      ignore_patterns=tree_view.ignore_patterns)
+    """
+    #: Signal emitted when a hit has been activated.
+    #: Parameters: path (str), line (int, 0 based), column (int, 0 based)
+    hit_activated = QtCore.Signal(str, int, int)
+
+    #: Signal emitted when a batch of hits has been received.
+    #: Parameters: number of hits so far, number of files scanned so far.
+    progress = QtCore.Signal(int, int)
+
+    #: Signal emitted when the search finished. Parameter: the number of hits
+    search_finished = QtCore.Signal(int)
+
+    #: Delay between two requests for new results (ms)
+    POLL_DELAY = 100
+
+    @property
+    def nb_hits(self):
+        """ Number of hits found by the current search """
+        return self._nb_hits
+
+    @property
+    def running(self):
+        """ Tells whether a search is running """
+        return self._search_id is not None
+
+    def __init__(self, parent=None):
+        super(FindInFilesWidget, self).__init__(parent)
+        #: The SplittableCodeEditTabWidget used to open hits, optional.
+        self.tab_widget = None
+        self._backend = None
+        self._root = ''
+        self._search_id = None
+        #: identifies the widget in the backend, starting a search cancels
+        #: the previous searches of the widget
+        self._client_id = str(uuid.uuid4())
+        self._file_items = {}
+        self._nb_hits = 0
+        self._poll_timer = QtCore.QTimer()
+        self._poll_timer.setSingleShot(True)
+        self._poll_timer.setInterval(self.POLL_DELAY)
+        self._poll_timer.timeout.connect(self._poll)
+        self.setHeaderHidden(True)
+        self.itemActivated.connect(self._on_item_activated)
+
+    def search(self, backend, root, sub, regex=False, case_sensitive=False,
+               whole_word=False, ignore_patterns=None, encodings=None,
+               max_file_size=None):
+        """
+        Starts searching ``sub`` in all the files found under ``root``.
+
+        Any running search is cancelled and the previous results are cleared.
+
+        :param backend: the BackendManager used to run the search (e.g.
+            ``editor.backend``).
+        :param root: root directory.
+        :param sub: text (or regular expression) to search.
+        :param regex: True to search using a regular expression.
+        :param case_sensitive: True to match case.
+        :param whole_word: True to match whole words only.
+        :param ignore_patterns: list of ignore patterns, see
+            :attr:`pyqode.core.widgets.FileSystemTreeView.ignore_patterns`.
+        :param encodings: list of encodings to try when reading a file.
+            Default is to try utf-8 first, then the preferred encodings of
+            the cache.
+        :param max_file_size: files that are bigger (in bytes) are skipped.
+
+        :raises: NotRunning if the backend process is not running.
+        """
+        self.cancel()
+        self.clear()
+        if encodings is None:
+            encodings = ['utf_8'] + [e for e in Cache().preferred_encodings
+                                     if e != 'utf_8']
+        self._backend = backend
+        self._root = root
+        self._search_id = str(uuid.uuid4())
+        data = {
+            'action': 'start',
+            'search_id': self._search_id,
+            'client_id': self._client_id,
+            'root': root,
+            'sub': sub,
+            'regex': regex,
+            'case_sensitive': case_sensitive,
+            'whole_word': whole_word,
+            'ignore_patterns': ignore_patterns or [],
+            'encodings': encodings,
+            'max_file_size': max_file_size
+        }
+        try:
+            backend.send_request(FindInFilesWorker, data,
+                                 self._on_results_available)
+        except NotRunning:
+            self._search_id = None
+            raise
+
+    def cancel(self):
+        """
+        Cancels the running search, if any. Results found so far are kept.
+        """
+        self._poll_timer.stop()
+        if self._search_id is not None:
+            try:
+                self._backend.send_request(
+                    FindInFilesWorker,
+                    {'action': 'cancel', 'search_id': self._search_id})
+            except NotRunning:
+                pass
+            self._search_id = None
+
+    def clear(self):
+        """
+        Clears the results.
+        """
+        super(FindInFilesWidget, self).clear()
+        self._file_items.clear()
+        self._nb_hits = 0
+
+    def _poll(self):
+        if self._search_id is None:
+            return
+        try:
+            self._backend.send_request(
+                FindInFilesWorker,
+                {'action': 'poll', 'search_id': self._search_id},
+                self._on_results_available)
+        except NotRunning:
+            self._poll_timer.start()
+
+    def _on_results_available(self, results):
+        if results['search_id'] != self._search_id:
+            # results of a cancelled search
+            return
+        self._add_hits(results['hits'])
+        self.progress.emit(self._nb_hits, results['nb_files'])
+        if results['finished']:
+            self._search_id = None
+            self.search_finished.emit(self._nb_hits)
+        else:
+            self._poll_timer.start()
+
+    def _add_hits(self, hits):
+        for path, line, column, preview in hits:
+            try:
+                file_item = self._file_items[path]
+            except KeyError:
+                file_item = QtWidgets.QTreeWidgetItem(self)
+                file_item.setToolTip(0, path)
+                file_item.setData(0, QtCore.Qt.UserRole, (path, -1, -1))
+                self._file_items[path] = file_item
+            item = QtWidgets.QTreeWidgetItem(file_item)
+            item.setText(0, '%d: %s' % (line + 1, preview.strip()))
+            item.setData(0, QtCore.Qt.UserRole, (path, line, column))
+        self._nb_hits += len(hits)
+        for path in set(hit[0] for hit in hits):
+            file_item = self._file_items[path]
+            file_item.setText(0, '%s (%d)' % (
+                os.path.relpath(path, self._root), file_item.childCount()))
+
+    def _on_item_activated(self, item):
+        path, line, column = item.data(0, QtCore.Qt.UserRole)
+        if line == -1:
+            return
+        self.hit_activated.emit(path, line, column)
+        if self.tab_widget is not None:
+            editor = self.tab_widget.open_document(path)
+            TextHelper(editor).goto_line(line, column)
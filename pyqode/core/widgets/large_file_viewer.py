@@ -0,0 +1,598 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains a read-only viewer for the files that are too big to be
+opened in a CodeEdit (e.g. multi-gigabyte log files).
+
+"""
+import bisect
+import logging
+import mmap
+import os
+import threading
+from array import array
+from pyqode.core.backend.workers import find_in_large_file
+from pyqode.qt import QtCore, QtGui, QtWidgets
+
+
+def _logger():
+    return logging.getLogger(__name__)
+
+
+def _is_ascii_compatible(encoding):
+    """
+    Tells whether the ascii characters are encoded as themselves (lines are
+    split on b'\\n' and search patterns are escaped once encoded).
+    """
+    text = '\r\n\\.*+?()[]{}|^$ azAZ09'
+    try:
+        return text.encode(encoding) == text.encode('ascii')
+    except (LookupError, UnicodeError):
+        return False
+
+
+class LineIndex(object):
+    """
+    Sparse index of the lines of a memory mapped file.
+
+    Only the offset of the first line of each chunk of :attr:`CHUNK_SIZE`
+    bytes is stored, the offset of any other line is found by scanning the
+    file from the closest indexed line.
+
+    The index is built by :meth:`build`, usually in a background thread, and
+    can be used while it is being built.
+    """
+    #: Size of the chunks of the file (in bytes) whose first line is indexed
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, mm):
+        """
+        :param mm: the memory mapped file, None for an empty file.
+        """
+        self._mm = mm
+        #: Size of the file
+        self.size = len(mm) if mm is not None else 0
+        # line numbers and offsets of the indexed lines, offsets are always
+        # appended first.
+        self._lines = array('q', [0])
+        self._offsets = array('q', [0])
+        #: Number of lines indexed so far (the number of lines of the file
+        #: once the index is complete).
+        self.line_count = 0
+        #: True when the whole file has been indexed
+        self.complete = self._mm is None
+        self._stop = False
+
+    def build(self):
+        """
+        Indexes the whole file.
+        """
+        mm = self._mm
+        size = self.size
+        line = offset = 0
+        while not self._stop and not self.complete:
+            target = offset + self.CHUNK_SIZE
+            newline = mm.find(b'\n', target) if target < size else -1
+            if newline == -1:
+                line += self._count(offset, size)
+                if mm[size - 1:size] != b'\n':
+                    # last line without EOL
+                    line += 1
+                self.line_count = line
+                self.complete = True
+                return
+            line += self._count(offset, newline + 1)
+            offset = newline + 1
+            self._offsets.append(offset)
+            self._lines.append(line)
+            self.line_count = line
+
+    def stop(self):
+        """
+        Stops building the index.
+        """
+        self._stop = True
+
+    def offset(self, line):
+        """
+        Returns the offset of a line, None if there is no such line.
+
+        :param line: line number (0 based)
+        """
+        if self._mm is None:
+            return None
+        i = bisect.bisect_right(self._lines, line) - 1
+        current, offset = self._lines[i], self._offsets[i]
+        while current < line:
+            newline = self._mm.find(b'\n', offset)
+            if newline == -1:
+                return None
+            offset = newline + 1
+            current += 1
+        if offset >= self.size:
+            return None
+        return offset
+
+    def line_of(self, offset):
+        """
+        Returns the number of the line that contains an offset.
+
+        :param offset: byte offset
+        """
+        if self._mm is None:
+            return 0
+        i = bisect.bisect_right(self._offsets, offset) - 1
+        i = min(i, len(self._lines) - 1)
+        return self._lines[i] + self._count(self._offsets[i], offset)
+
+    def read_lines(self, first, count, max_length):
+        """
+        Reads the (encoded) content of some lines, without their EOL.
+
+        :param first: first line to read
+        :param count: number of lines to read
+        :param max_length: lines longer than max_length bytes are truncated.
+        :return: list of bytes
+        """
+        offset = self.offset(first)
+        lines = []
+        if offset is None:
+            return lines
+        while len(lines) < count and offset < self.size:
+            newline = self._mm.find(b'\n', offset)
+            end = self.size if newline == -1 else newline
+            line = self._mm[offset:min(end, offset + max_length)]
+            if line.endswith(b'\r'):
+                line = line[:-1]
+            lines.append(line)
+            offset = end + 1
+        return lines
+
+    def _count(self, start, end):
+        """ Counts the newlines between two offsets """
+        count = 0
+        while start < end:
+            stop = min(start + self.CHUNK_SIZE, end)
+            count += self._mm[start:stop].count(b'\n')
+            start = stop
+        return count
+
+
+class LargeFileViewer(QtWidgets.QAbstractScrollArea):
+    """
+    Read-only viewer for files that are too big to be opened in a CodeEdit,
+    see :attr:`pyqode.core.managers.FileManager.size_tiers`.
+
+    The file is memory mapped and indexed (see :class:`LineIndex`) in a
+    background thread, the file can be browsed while it is being indexed.
+    Only the lines around the visible lines (:attr:`WINDOW_SIZE`) are read
+    and decoded, the vertical scroll bar is mapped to the line numbers.
+
+    Searches are run by :func:`pyqode.core.backend.workers.find_in_large_file`
+    in the backend process::
+
+        viewer = LargeFileViewer()
+        viewer.open('/var/log/huge.log')
+        viewer.goto_line(150000)
+        viewer.search(editor.backend, 'Traceback')
+        viewer.find_next()
+    """
+    #: Signal emitted while the file is being indexed. Parameter: number of
+    #: lines indexed so far.
+    indexing_progress = QtCore.Signal(int)
+
+    #: Signal emitted when the whole file has been indexed. Parameter: number
+    #: of lines.
+    indexing_finished = QtCore.Signal(int)
+
+    #: Signal emitted when a search request finished. Parameters: line and
+    #: column of the match, -1 if there is no match.
+    search_finished = QtCore.Signal(int, int)
+
+    #: Number of lines that are read around the visible lines.
+    WINDOW_SIZE = 1000
+
+    #: Lines longer than this (in bytes) are truncated.
+    MAX_LINE_LENGTH = 4096
+
+    #: Maximum number of matches returned by a search request.
+    MAX_HITS = 1000
+
+    #: Delay between two updates of the indexing progress (ms)
+    POLL_DELAY = 100
+
+    @property
+    def path(self):
+        """ Path of the file """
+        return self._path
+
+    @property
+    def encoding(self):
+        """ Encoding of the file """
+        return self._encoding
+
+    @property
+    def line_count(self):
+        """
+        Number of lines of the file (number of lines indexed so far while the
+        file is being indexed).
+        """
+        if self._index is None:
+            return 0
+        return self._index.line_count
+
+    @property
+    def indexing(self):
+        """ Tells whether the file is being indexed """
+        return self._index is not None and not self._index.complete
+
+    @property
+    def current_line(self):
+        """ The current line number (0 based) """
+        return self._current_line
+
+    def __init__(self, parent=None):
+        super(LargeFileViewer, self).__init__(parent)
+        self._path = ''
+        self._encoding = 'utf-8'
+        self._file = None
+        self._mm = None
+        self._index = None
+        self._thread = None
+        # first line and decoded lines of the window, None if no window has
+        # been read yet
+        self._window = None
+        self._max_length = 0
+        self._current_line = 0
+        # (line, start column, end column) of the current match
+        self._match = None
+        self._backend = None
+        self._search = None
+        self._search_id = 0
+        self._hits = []
+        self._hit = -1
+        self._next = None
+        self._wrapped = False
+        # offset where the search started, the wrapped search stops there
+        self._search_start = 0
+        # offset where the current batch of hits has been searched from
+        self._batch_start = 0
+        # True once an occurrence has been found
+        self._found = False
+        # True while waiting for the results of a request
+        self._pending = False
+        self._poll_timer = QtCore.QTimer()
+        self._poll_timer.setSingleShot(True)
+        self._poll_timer.setInterval(self.POLL_DELAY)
+        self._poll_timer.timeout.connect(self._poll)
+        font = QtGui.QFont('monospace')
+        font.setStyleHint(QtGui.QFont.TypeWriter)
+        self.setFont(font)
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)
+
+    def open(self, path, encoding='utf-8'):
+        """
+        Opens a file and starts indexing it.
+
+        :param path: path of the file to open.
+        :param encoding: encoding of the file, it must be ascii compatible
+            (e.g. utf-16 is not supported).
+
+        :raises: ValueError if the encoding is not supported.
+        """
+        if not _is_ascii_compatible(encoding):
+            raise ValueError('encoding not supported: %s' % encoding)
+        self.close_file()
+        self._path = path
+        self._encoding = encoding
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._mm = mmap.mmap(self._file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+        self._index = LineIndex(self._mm)
+        if not self._index.complete:
+            self._thread = threading.Thread(target=self._index.build)
+            self._thread.daemon = True
+            self._thread.start()
+            self._poll_timer.start()
+        self._update_scroll_bars()
+        self.viewport().update()
+
+    def close_file(self):
+        """
+        Closes the file.
+        """
+        self._poll_timer.stop()
+        if self._thread is not None:
+            self._index.stop()
+            self._thread.join()
+            self._thread = None
+        self._index = None
+        self._window = None
+        self._max_length = 0
+        self._current_line = 0
+        self._match = None
+        self._search = None
+        self._hits = []
+        self._pending = False
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._path = ''
+        self._update_scroll_bars()
+        self.viewport().update()
+
+    def line_text(self, line):
+        """
+        Returns the text of a line (truncated to :attr:`MAX_LINE_LENGTH`).
+
+        :param line: line number (0 based)
+        """
+        lines = self._lines(line, 1)
+        return lines[0] if lines else ''
+
+    def goto_line(self, line):
+        """
+        Makes a line the current line and scrolls to it.
+
+        :param line: line number (0 based)
+        """
+        self._current_line = max(0, line)
+        scroll_bar = self.verticalScrollBar()
+        first = max(0, line - self._visible_line_count() // 2)
+        if first > scroll_bar.maximum():
+            # not indexed yet
+            scroll_bar.setMaximum(first)
+        scroll_bar.setValue(first)
+        self.viewport().update()
+
+    def search(self, backend, sub, regex=False, case_sensitive=False,
+               whole_word=False):
+        """
+        Searches the first occurrence of ``sub`` after the current line, the
+        result is given by :attr:`search_finished`. Use :meth:`find_next` to
+        go to the next occurrence.
+
+        :param backend: the BackendManager used to run the search (e.g.
+            ``editor.backend``).
+        :param sub: text (or regular expression) to search.
+        :param regex: True to search using a regular expression.
+        :param case_sensitive: True to match case.
+        :param whole_word: True to match whole words only.
+
+        :raises: NotRunning if the backend process is not running.
+        """
+        self._backend = backend
+        self._search = {
+            'path': self._path,
+            'sub': sub,
+            'regex': regex,
+            'case_sensitive': case_sensitive,
+            'whole_word': whole_word,
+            'encoding': self._encoding,
+            'max_hits': self.MAX_HITS
+        }
+        self._hits = []
+        self._hit = -1
+        self._next = None
+        self._wrapped = False
+        self._found = False
+        start = None
+        if self._index is not None:
+            start = self._index.offset(self._current_line)
+        self._search_start = start or 0
+        self._request_hits(self._search_start)
+
+    def find_next(self):
+        """
+        Goes to the next occurrence of the last search.
+
+        :raises: NotRunning if the backend process is not running.
+        """
+        if self._search is None or self._pending:
+            return
+        if self._hit + 1 < len(self._hits):
+            self._select_hit(self._hit + 1)
+        elif self._next is not None:
+            self._request_hits(self._next)
+        elif not self._wrapped and self._search_start:
+            self._wrap()
+        elif (self._hits and not self._wrapped and
+                self._batch_start == self._search_start == 0):
+            # the whole file has been searched in one batch
+            self._select_hit(0)
+        else:
+            self._restart()
+
+    def copy(self):
+        """
+        Copies the current line to the clipboard.
+        """
+        QtWidgets.QApplication.clipboard().setText(
+            self.line_text(self._current_line))
+
+    def _wrap(self):
+        # search from the start of the file up to where the search started
+        self._wrapped = True
+        self._request_hits(0)
+
+    def _restart(self):
+        # all the occurrences have been found, start again from the first one
+        self._wrapped = False
+        self._request_hits(self._search_start)
+
+    def _request_hits(self, start):
+        self._search_id += 1
+        self._batch_start = start
+        self._pending = True
+        data = dict(self._search)
+        data['start'] = start
+        if self._wrapped:
+            data['end'] = self._search_start
+        data['request_id'] = self._search_id
+        self._backend.send_request(find_in_large_file, data,
+                                   self._on_hits_available)
+
+    def _on_hits_available(self, results):
+        if self._search is None or results['request_id'] != self._search_id:
+            # results of a previous search
+            return
+        self._pending = False
+        self._hits = results['hits']
+        self._next = results['next']
+        self._hit = -1
+        if self._hits:
+            self._found = True
+            self._select_hit(0)
+        elif self._next is not None:
+            self._request_hits(self._next)
+        elif not self._wrapped and self._search_start:
+            self._wrap()
+        elif self._found:
+            self._restart()
+        else:
+            self._match = None
+            self.viewport().update()
+            self.search_finished.emit(-1, -1)
+
+    def _select_hit(self, i):
+        self._hit = i
+        start, end = self._hits[i]
+        line = self._index.line_of(start)
+        offset = self._index.offset(line)
+        prefix = self._mm[offset:start].decode(self._encoding, 'replace')
+        text = self._mm[start:end].decode(self._encoding, 'replace')
+        column = len(prefix)
+        self._match = line, column, column + len(text)
+        self.goto_line(line)
+        self.search_finished.emit(line, column)
+
+    def _poll(self):
+        if self._index is None:
+            return
+        self._update_scroll_bars()
+        if self._index.complete:
+            self._thread = None
+            self.indexing_finished.emit(self._index.line_count)
+        else:
+            self.indexing_progress.emit(self._index.line_count)
+            self._poll_timer.start()
+
+    def _lines(self, first, count):
+        """
+        Returns the decoded text of some lines, reading a new window if
+        needed.
+        """
+        if self._index is None:
+            return []
+        if self._window is None:
+            start, lines = first, None
+        else:
+            start, lines = self._window
+            end = start + len(lines)
+            at_eof = len(lines) < self.WINDOW_SIZE
+        if lines is None or first < start or \
+                (first + count > end and not at_eof) or \
+                (at_eof and first > end):
+            start = max(0, first - self.WINDOW_SIZE // 4)
+            lines = [
+                line.decode(self._encoding, 'replace').expandtabs()
+                for line in self._index.read_lines(
+                    start, self.WINDOW_SIZE, self.MAX_LINE_LENGTH)]
+            self._window = start, lines
+            self._max_length = max([len(line) for line in lines] + [0])
+            self._update_horizontal_scroll_bar()
+        return lines[first - start:first - start + count]
+
+    def _line_height(self):
+        return self.fontMetrics().height()
+
+    def _visible_line_count(self):
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _gutter_width(self):
+        digits = len(str(max(1, self.line_count)))
+        return 10 + self.fontMetrics().width('9') * digits
+
+    def _update_scroll_bars(self):
+        visible = self._visible_line_count()
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setRange(0, max(0, self.line_count - visible))
+        scroll_bar.setPageStep(visible)
+        scroll_bar.setSingleStep(1)
+        self._update_horizontal_scroll_bar()
+
+    def _update_horizontal_scroll_bar(self):
+        width = self.fontMetrics().width('9') * self._max_length
+        available = self.viewport().width() - self._gutter_width()
+        scroll_bar = self.horizontalScrollBar()
+        scroll_bar.setRange(0, max(0, width - available + 10))
+        scroll_bar.setPageStep(max(1, available))
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super(LargeFileViewer, self).resizeEvent(event)
+        self._update_scroll_bars()
+
+    def paintEvent(self, event):
+        viewport = self.viewport()
+        painter = QtGui.QPainter(viewport)
+        palette = self.palette()
+        painter.fillRect(event.rect(), palette.base())
+        metrics = self.fontMetrics()
+        height = self._line_height()
+        gutter = self._gutter_width()
+        width = viewport.width()
+        first = self.verticalScrollBar().value()
+        lines = self._lines(first, self._visible_line_count() + 1)
+        x = gutter + 4 - self.horizontalScrollBar().value()
+        painter.setClipRect(gutter, 0, width - gutter, viewport.height())
+        for i, text in enumerate(lines):
+            line = first + i
+            y = i * height
+            if line == self._current_line:
+                painter.fillRect(gutter, y, width - gutter, height,
+                                 palette.alternateBase())
+            if self._match is not None and self._match[0] == line:
+                _, start, end = self._match
+                left = x + metrics.width(text[:start])
+                painter.fillRect(
+                    left, y, metrics.width(text[start:end]) or 2, height,
+                    palette.highlight())
+            painter.setPen(palette.text().color())
+            painter.drawText(x, y + metrics.ascent(), text)
+        painter.setClipping(False)
+        painter.fillRect(0, 0, gutter, viewport.height(), palette.window())
+        painter.setPen(palette.windowText().color())
+        for i in range(len(lines)):
+            painter.drawText(
+                QtCore.QRect(0, i * height, gutter - 5, height),
+                QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter,
+                str(first + i + 1))
+
+    def mousePressEvent(self, event):
+        super(LargeFileViewer, self).mousePressEvent(event)
+        line = self.verticalScrollBar().value() + \
+            event.pos().y() // self._line_height()
+        if line < self.line_count:
+            self._current_line = line
+            self.viewport().update()
+
+    def keyPressEvent(self, event):
+        ctrl = event.modifiers() & QtCore.Qt.ControlModifier
+        if ctrl and event.key() == QtCore.Qt.Key_Home:
+            self.goto_line(0)
+        elif ctrl and event.key() == QtCore.Qt.Key_End:
+            self.goto_line(max(0, self.line_count - 1))
+        elif event.matches(QtGui.QKeySequence.Copy):
+            self.copy()
+        else:
+            super(LargeFileViewer, self).keyPressEvent(event)
+
+    def closeEvent(self, event):
+        self.close_file()
+        super(LargeFileViewer, self).closeEvent(event)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+This module contains the ProjectChecker, which checks all the files of a
+project in the background and streams the messages to an ErrorsTable.
+
+"""
+import uuid
+from pyqode.core.backend import NotRunning
+from pyqode.core.backend.workers import LintWorker, worker_name
+from pyqode.core.cache import Cache
+from pyqode.core.modes import CheckerMessage
+from pyqode.qt import QtCore
+
+
+class ProjectChecker(QtCore.QObject):
+    """
+    Runs checker workers on all the files of a project, using
+    :class:`pyqode.core.backend.LintWorker`, and shows the messages in an
+    :class:`pyqode.core.widgets.ErrorsTable`.
+
+    Files are checked in the backend process by a pool of processes and the
+    messages are streamed back while the analysis is running. Unchanged files
+    are not checked again when the analysis is restarted.
+
+    Editors can be watched so that saving a file re-checks only that file::
+
+        checker = ProjectChecker(errors_table)
+        checker.check(editor.backend, [pyflakes_analysis], root='/path')
+        checker.watch(editor)
+    """
+    #: Signal emitted when the messages of a file are available.
+    #: Parameters: path (str), list of CheckerMessage
+    messages_available = QtCore.Signal(str, list)
+
+    #: Signal emitted when results have been received. Parameter: number of
+    #: files checked so far by the last project analysis.
+    progress = QtCore.Signal(int)
+
+    #: Signal emitted when the analysis of the project is finished.
+    finished = QtCore.Signal()
+
+    #: Delay between two requests for new results (ms)
+    POLL_DELAY = 100
+
+    @property
+    def running(self):
+        """ Tells whether an analysis is running """
+        return bool(self._running)
+
+    def __init__(self, errors_table=None, parent=None):
+        """
+        :param errors_table: the ErrorsTable where messages are shown,
+            optional.
+        """
+        super(ProjectChecker, self).__init__(parent)
+        self.errors_table = errors_table
+        self._backend = None
+        self._options = None
+        self._project_lint_id = None
+        #: ids of the running analyses
+        self._running = set()
+        self._poll_timer = QtCore.QTimer()
+        self._poll_timer.setSingleShot(True)
+        self._poll_timer.setInterval(self.POLL_DELAY)
+        self._poll_timer.timeout.connect(self._poll)
+
+    def check(self, backend, checkers, root=None, paths=None,
+              ignore_patterns=None, ignore_rules=None, max_line_length=79,
+              encodings=None, max_file_size=None, processes=None):
+        """
+        Starts checking all the files found under ``root`` (or the list of
+        ``paths``). Any running analysis is cancelled and the errors table is
+        cleared.
+
+        :param backend: the BackendManager used to run the analysis (e.g.
+            ``editor.backend``).
+        :param checkers: list of checker workers (functions, classes or fully
+            qualified names), see :class:`pyqode.core.modes.CheckerMode`.
+        :param root: root directory.
+        :param paths: list of files to check, used instead of root.
+        :param ignore_patterns: list of ignore patterns, see
+            :attr:`pyqode.core.widgets.FileSystemTreeView.ignore_patterns`.
+        :param ignore_rules: ignore rules passed to the checkers.
+        :param max_line_length: max line length passed to the checkers.
+        :param encodings: list of encodings to try when reading a file.
+            Default is to try utf-8 first, then the preferred encodings of
+            the cache.
+        :param max_file_size: files that are bigger (in bytes) are skipped.
+        :param processes: size of the process pool, None to use the number
+            of cpu.
+
+        :raises: NotRunning if the backend process is not running.
+        """
+        self.cancel()
+        if self.errors_table is not None:
+            self.errors_table.clear()
+        if encodings is None:
+            encodings = ['utf_8'] + [e for e in Cache().preferred_encodings
+                                     if e != 'utf_8']
+        self._backend = backend
+        self._options = {
+            'checkers': [worker_name(c) for c in checkers],
+            'root': root,
+            'paths': paths,
+            'ignore_patterns': ignore_patterns or [],
+            'ignore_rules': ignore_rules or [],
+            'max_line_length': max_line_length,
+            'encodings': encodings,
+            'max_file_size': max_file_size,
+            'processes': processes
+        }
+        self._project_lint_id = self._start(self._options)
+
+    def check_file(self, path):
+        """
+        Checks a single file again, with the settings of the last call to
+        :meth:`check`, and replaces its messages. Does nothing if no
+        analysis has been started.
+
+        :param path: path of the file to check.
+        """
+        if self._options is None:
+            return
+        options = dict(self._options)
+        options['paths'] = [path]
+        try:
+            self._start(options)
+        except NotRunning:
+            pass
+
+    def watch(self, editor):
+        """
+        Re-checks the file of an editor each time it is saved.
+
+        :param editor: CodeEdit instance
+        """
+        editor.text_saved.connect(self.check_file)
+
+    def cancel(self):
+        """
+        Cancels the running analyses, if any.
+        """
+        self._poll_timer.stop()
+        for lint_id in self._running:
+            try:
+                self._backend.send_request(
+                    LintWorker, {'action': 'cancel', 'lint_id': lint_id})
+            except NotRunning:
+                pass
+        self._running.clear()
+        self._project_lint_id = None
+
+    def _start(self, options):
+        lint_id = str(uuid.uuid4())
+        data = dict(options)
+        data['action'] = 'start'
+        data['lint_id'] = lint_id
+        self._running.add(lint_id)
+        try:
+            self._backend.send_request(LintWorker, data,
+                                       self._on_results_available)
+        except NotRunning:
+            self._running.discard(lint_id)
+            raise
+        return lint_id
+
+    def _poll(self):
+        for lint_id in list(self._running):
+            try:
+                self._backend.send_request(
+                    LintWorker, {'action': 'poll', 'lint_id': lint_id},
+                    self._on_results_available)
+            except NotRunning:
+                self._poll_timer.start()
+                return
+
+    def _on_results_available(self, results):
+        lint_id = results['lint_id']
+        if lint_id not in self._running:
+            # results of a cancelled analysis
+            return
+        for path, messages in results['results']:
+            messages = [CheckerMessage(*msg) for msg in messages]
+            if self.errors_table is not None:
+                self.errors_table.remove_messages(path)
+                self.errors_table.add_messages(messages)
+            self.messages_available.emit(path, messages)
+        if lint_id == self._project_lint_id:
+            self.progress.emit(results['nb_files'])
+        if results['finished']:
+            self._running.discard(lint_id)
+            if lint_id == self._project_lint_id:
+                self._project_lint_id = None
+                self.finished.emit()
+        if self._running and not self._poll_timer.isActive():
+            self._poll_timer.start()
@@ -3,7 +3,8 @@
 This module tests the extension frontend module
 (pyqode.core.api.decoration and pyqode.core.managers.TextDecorationManager)
 """
-from pyqode.core.api import TextHelper, TextDecoration
+from pyqode.core.api import TextHelper, TextDecoration, TextRanges
+from pyqode.core.api import ViewportDecorations
 from pyqode.qt import QtGui
 from ..helpers import editor_open
 
@@ -74,3 +75,57 @@ def test_formats(editor):
     deco.set_as_error(QtGui.QColor('#FF0000'))
     deco.set_as_error()
     deco.set_as_warning()
+
+
+def test_text_ranges():
+    ranges = TextRanges([(0, 5), (10, 15), (20, 25)])
+    assert len(ranges) == 3
+    assert ranges[1] == (10, 15)
+    assert list(ranges) == [(0, 5), (10, 15), (20, 25)]
+    assert ranges.index_after(12) == 1
+    assert list(ranges.intersecting(6, 21)) == [1, 2]
+    assert list(ranges.intersecting(6, 9)) == []
+    ranges.remove(0, offset=-2)
+    assert ranges == [(8, 13), (18, 23)]
+
+
+@editor_open(__file__)
+def test_viewport_decorations(editor):
+    def factory(start, end):
+        return TextDecoration(editor.document(), start, end)
+
+    doc = editor.document()
+    ranges = [(doc.findBlockByNumber(i).position(),
+               doc.findBlockByNumber(i).position() + 1)
+              for i in range(doc.blockCount())]
+    nb_editor_decos = len(editor.decorations)
+    decorations = ViewportDecorations(editor, factory, margin=0)
+    decorations.set_ranges(ranges)
+    assert len(decorations.ranges) == doc.blockCount()
+    nb_decos = len(decorations.decorations)
+    assert 0 < nb_decos < doc.blockCount()
+    for deco in decorations.decorations:
+        assert deco in editor.decorations
+    decorations.clear()
+    assert not decorations.decorations
+    assert len(editor.decorations) == nb_editor_decos
+
+
+def test_line_decoration(editor):
+    editor.setPlainText('foo\nbar\nspam\n', '', 'utf-8')
+    deco = TextDecoration(editor.document(), start_line=1, end_line=2)
+    assert deco.cursor.selectionStart() == 4
+    assert deco.cursor.selectionEnd() == 8
+    deco = TextDecoration(editor.document(), start_line=2, end_line=10)
+    assert deco.cursor.selectionEnd() == 13
+
+
+def test_clicked_signal(editor):
+    clicked = []
+    deco = TextDecoration(editor.document(), start_line=0, end_line=0)
+    assert deco._signals is None
+    editor.decorations.clicked.connect(clicked.append)
+    deco.signals.clicked.connect(clicked.append)
+    editor.decorations.clicked.emit(deco)
+    editor.decorations.clicked.disconnect(clicked.append)
+    assert clicked == [deco, deco]
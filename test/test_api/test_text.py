@@ -308,3 +308,32 @@ def test_matched_selection(editor):
     cursor = editor.textCursor()
     assert cursor.hasSelection()
     assert text in cursor.selectedText()
+
+
+def test_preproc_is_not_comment(editor):
+    editor.syntax_highlighter.set_mime_type('text/x-csrc')
+    try:
+        editor.setPlainText(
+            '#include <stdio.h>\n#define FOO bar(x)\n/* comment */\n',
+            'text/x-csrc', 'utf-8')
+        QTest.qWait(100)
+        helper = TextHelper(editor)
+        cursor = editor.textCursor()
+        for position in (3, 12, 30):
+            cursor.setPosition(position)
+            assert not helper.is_comment_or_string(cursor)
+        cursor.setPosition(42)
+        assert helper.is_comment_or_string(cursor)
+    finally:
+        editor.syntax_highlighter.set_mime_type('text/x-python')
+
+
+def test_is_comment_or_string(editor):
+    editor.setPlainText('a = 1  # comment\nb = "string"\n', '', 'utf-8')
+    QTest.qWait(100)
+    helper = TextHelper(editor)
+    cursor = editor.textCursor()
+    cursor.setPosition(10)
+    assert helper.is_comment_or_string(cursor)
+    cursor.setPosition(2)
+    assert not helper.is_comment_or_string(cursor)
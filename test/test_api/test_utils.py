@@ -106,3 +106,12 @@ def test_block_helper():
     assert utils.TextBlockHelper.is_fold_trigger(block) is True
     assert utils.TextBlockHelper.get_fold_lvl(block) == 1023
     assert utils.TextBlockHelper.get_state(block) == 26
+
+
+def test_get_block_words(editor):
+    editor.setPlainText('foo bar(foo)', '', 'utf-8')
+    block = editor.document().firstBlock()
+    words = utils.get_block_words(editor, block)
+    assert words == {'foo': [0, 8], 'bar': [4]}
+    # cached until the block changes
+    assert utils.get_block_words(editor, block) is words
@@ -1,3 +1,5 @@
+import os
+import time
 import pytest
 from pyqode.core.backend import workers
 
@@ -114,3 +116,206 @@ with open('test/files/foo.py', 'r') as f:
 def test_find_all(data, nb_expected):
     results = workers.findall(data)
     assert len(results) == nb_expected
+
+
+def test_find_in_file():
+    path, hits = workers.find_in_file(('test/files/foo.py', {
+        'sub': 'import', 'regex': False, 'whole_word': False,
+        'case_sensitive': True}))
+    assert path == 'test/files/foo.py'
+    assert len(hits) == 2
+    for line, column, preview in hits:
+        assert preview[column:].startswith('import')
+
+
+def test_find_in_file_line_numbers(tmpdir):
+    path = str(tmpdir.join('foo.txt'))
+    with open(path, 'wb') as f:
+        f.write(b'page 1\x0cstill line 0\r\nline 1\rline 2 foo\n')
+    options = {'sub': 'foo', 'regex': False, 'whole_word': False,
+               'case_sensitive': True}
+    assert workers.find_in_file((path, options))[1] == [(2, 7, 'line 2 foo')]
+
+
+def test_line_hunks():
+    old = ['a', 'b', 'c', 'd', '']
+    assert workers.line_hunks(old, list(old)) == []
+    assert workers.line_hunks(old, ['a', 'x', 'c', 'd', '']) == [
+        (1, 2, ['x'])]
+    assert workers.line_hunks(old, ['a', 'b', 'c', 'd', 'e', '']) == [
+        (4, 4, ['e'])]
+    assert workers.line_hunks(old, ['b', 'c', '']) == [
+        (0, 1, []), (3, 4, [])]
+    assert workers.diff_lines({'old': 'a\nb', 'new': 'a\nb\nc'}) == [
+        (2, 2, ['c'])]
+
+
+def test_find_in_large_file(tmpdir):
+    path = str(tmpdir.join('big.log'))
+    with open(path, 'w') as f:
+        f.write('foo bar\nfoobar FOO\n')
+    data = {'path': path, 'sub': 'foo', 'regex': False, 'whole_word': False,
+            'case_sensitive': False, 'encoding': 'utf-8', 'start': 0,
+            'max_hits': 2, 'request_id': 1}
+    results = workers.find_in_large_file(data)
+    assert results['hits'] == [(0, 3), (8, 11)]
+    assert results['next'] == 15
+    assert results['request_id'] == 1
+    data['start'] = results['next']
+    results = workers.find_in_large_file(data)
+    assert results['hits'] == [(15, 18)]
+    assert results['next'] is None
+    # the search stops at 'end'
+    data.update({'start': 0, 'end': 10})
+    assert workers.find_in_large_file(data)['hits'] == [(0, 3)]
+    del data['end']
+    data['start'] = 0
+    data['whole_word'] = True
+    data['case_sensitive'] = True
+    assert workers.find_in_large_file(data)['hits'] == [(0, 3)]
+    # the pattern is escaped once encoded
+    with open(path, 'wb') as f:
+        f.write(u'a.b axb caf\xe9.\n'.encode('latin-1'))
+    data.update({'sub': u'caf\xe9.', 'encoding': 'latin-1',
+                 'whole_word': False, 'max_hits': 10})
+    assert workers.find_in_large_file(data)['hits'] == [(8, 13)]
+
+
+def test_find_in_files_worker():
+    worker = workers.FindInFilesWorker()
+    results = worker({
+        'action': 'start', 'search_id': 'test', 'root': 'test/files',
+        'sub': 'import', 'regex': False, 'whole_word': True,
+        'case_sensitive': True, 'ignore_patterns': ['*.txt'],
+        'processes': 0})
+    assert not results['finished']
+    hits = []
+    while not results['finished']:
+        time.sleep(0.1)
+        results = workers.FindInFilesWorker()(
+            {'action': 'poll', 'search_id': 'test'})
+        hits += results['hits']
+    assert len(hits) == 2
+    for path, line, column, preview in hits:
+        assert os.path.basename(path) == 'foo.py'
+
+
+def test_find_in_files_worker_jobs():
+    worker = workers.FindInFilesWorker()
+    data = {'action': 'start', 'root': 'test/files', 'sub': 'import',
+            'processes': 0, 'client_id': 'client'}
+    worker(dict(data, search_id='first'))
+    first = worker._jobs['first']
+    # a new search of the same client cancels the previous one
+    worker(dict(data, search_id='second'))
+    assert first.cancelled
+    assert 'first' not in worker._jobs
+    second = worker._jobs['second']
+    assert not second.cancelled
+    # searches that are not polled anymore expire
+    second.last_poll -= worker.JOB_TIMEOUT + 1
+    results = worker({'action': 'poll', 'search_id': 'second'})
+    assert results['finished']
+    assert second.cancelled
+    assert 'second' not in worker._jobs
+
+
+def test_run_checkers():
+    results = workers.run_checkers({
+        'request_id': 3,
+        'code': 'x = 1',
+        'checkers': [
+            {'worker': 'pyqode.core.backend.workers.echo_worker',
+             'ignore_rules': ['E501']},
+            {'worker': 'pyqode.core.backend.workers.no_such_worker',
+             'ignore_rules': []}
+        ]
+    })
+    assert results['request_id'] == 3
+    echo, failed = results['results']
+    assert echo['ignore_rules'] == ['E501']
+    assert echo['code'] == 'x = 1'
+    assert 'checkers' not in echo
+    assert failed == []
+
+
+def count_lines(data):
+    return [('%d lines' % len(data['code'].splitlines()), 1, 0)]
+
+
+def _lint(paths):
+    worker = workers.LintWorker()
+    results = worker({
+        'action': 'start', 'lint_id': 'test', 'paths': paths,
+        'checkers': ['test.test_backend.test_workers.count_lines'],
+        'processes': 0})
+    messages = []
+    while not results['finished']:
+        time.sleep(0.1)
+        results = workers.LintWorker()({'action': 'poll', 'lint_id': 'test'})
+        messages += results['results']
+    return messages
+
+
+def test_lint_worker(tmpdir):
+    path = str(tmpdir.join('foo.py'))
+    with open(path, 'w') as f:
+        f.write('a = 1\nb = 2\n')
+    assert _lint([path]) == [
+        (path, [('2 lines', 1, 0, None, None, None, path)])]
+    cache = workers.LintWorker._cache
+    key = list(k for k in cache if k[0] == path)[0]
+    # unchanged files are not checked again
+    cache[key] = (cache[key][0], cache[key][1], ['cached'])
+    assert _lint([path]) == [(path, ['cached'])]
+    # same content, different mtime: checked but the content hash matches
+    os.utime(path, (0, 0))
+    assert _lint([path]) == [(path, ['cached'])]
+    with open(path, 'w') as f:
+        f.write('a = 1\n')
+    assert _lint([path])[0][1][0][0] == '1 lines'
+
+
+def test_lint_cache():
+    cache = workers._LintCache(max_size=2)
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache.get('a') == 1
+    # the least recently used entry is dropped
+    cache['c'] = 3
+    assert sorted(cache) == ['a', 'c']
+    assert cache.get('b') is None
+
+
+def test_tokenize():
+    code = 'a = 1\n"""\nfoo\n"""\nb = 2'
+    results = workers.tokenize({
+        'code': code, 'lexer': 'pygments.lexers.python.PythonLexer',
+        'request_id': 3, 'first_line': 10})
+    assert results['request_id'] == 3
+    assert results['first_line'] == 10
+    runs = results['runs']
+    assert len(runs) == len(code.splitlines())
+    for line, line_runs in zip(code.splitlines(), runs):
+        assert sum(line_runs[::2]) == len(line)
+    token_types = results['token_types']
+    assert token_types[runs[1][1]] == 'Literal.String.Doc'
+    assert len(results['states']) == len(runs)
+    # start in a given lexer state
+    results = workers.tokenize({
+        'code': 'foo"""\nb = 2', 'lexer': 'pygments.lexers.python.PythonLexer',
+        'stack': ['root', 'tdqs']})
+    assert results['token_types'][results['runs'][0][1]] == \
+        'Literal.String.Double'
+    assert results['stacks'][results['states'][0]] == ['root']
+    # lexers that do not use the RegexLexer loop
+    results = workers.tokenize({
+        'code': 'int a;\n/* b\nc */', 'lexer': 'pygments.lexers.c_cpp.CLexer'})
+    assert len(results['runs']) == 3
+    assert results['states'] is None
+    # multiline comments are lexed line by line, like in the GUI
+    results = workers.tokenize({
+        'code': 'int a;\n/* b\nc */',
+        'lexer': 'pygments.lexers.dotnet.CSharpLexer'})
+    assert results['stacks'][results['states'][1]][-1] == 'comment'
+
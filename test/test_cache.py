@@ -5,7 +5,7 @@ import os
 import locale
 import pytest
 from pyqode.core.api import convert_to_codec_key
-from pyqode.core.cache import Cache
+from pyqode.core.cache import Cache, HighlightCache
 
 
 def test_preferred_encodings():
@@ -31,3 +31,29 @@ def test_cached_encodings():
     s.set_file_encoding(__file__, 'utf_16')
     s = Cache(suffix='-pytest')
     assert s.get_file_encoding(__file__) == 'utf_16'
+
+
+def test_highlight_cache(tmpdir):
+    cache = HighlightCache(str(tmpdir), max_size=1024)
+    key = cache.key('a = 1\n', 'lexer')
+    assert key != cache.key('a = 1\n', 'other lexer')
+    assert cache.get(key) is None
+    cache.set(key, {'runs': [[1, 0]]})
+    assert cache.get(key) == {'runs': [[1, 0]]}
+    # least recently used entries are removed when the cache is too big
+    keys = [cache.key(str(i), 'lexer') for i in range(10)]
+    for i, k in enumerate(keys):
+        cache.set(k, {'runs': [os.urandom(16).hex()]})
+        t = 1000000 + i
+        os.utime(os.path.join(cache.directory, k), (t, t))
+    assert sum(os.path.getsize(os.path.join(cache.directory, name))
+               for name in os.listdir(cache.directory)) <= 1024
+    assert cache.get(keys[-1]) is not None
+    # only entries are removed, not the other files of the directory
+    for name in ('notes.txt', 'entry.tmp'):
+        with open(os.path.join(cache.directory, name), 'wb') as f:
+            f.write(os.urandom(2048))
+    cache.set(keys[0], {'runs': []})
+    cache.clear()
+    assert cache.get(keys[-1]) is None
+    assert sorted(os.listdir(cache.directory)) == ['entry.tmp', 'notes.txt']
@@ -0,0 +1,155 @@
+import random
+from pyqode.qt.QtTest import QTest
+from pyqode.core.api import TextDecoration, TextHelper
+
+
+def _decorations(editor, count, draw_order=0):
+    decos = []
+    for i in range(count):
+        deco = TextDecoration(editor.textCursor(), start_pos=0, end_pos=1)
+        deco.draw_order = draw_order
+        decos.append(deco)
+    return decos
+
+
+def test_append_remove(editor):
+    manager = editor.decorations
+    nb = len(manager)
+    high = _decorations(editor, 2, draw_order=10)
+    low = _decorations(editor, 2, draw_order=-10)
+    assert manager.append(high[0])
+    assert not manager.append(high[0])
+    assert manager.append_many(high + low) == 3
+    assert len(manager) == nb + 4
+    assert high[1] in manager
+    # sorted by draw order, insertion order is kept for equal draw orders
+    decorations = list(manager)
+    assert decorations[:2] == low
+    assert decorations[-2:] == high
+    assert len(editor.extraSelections()) == nb + 4
+    assert manager.remove(low[0])
+    assert not manager.remove(low[0])
+    assert manager.remove_many(high + low) == 3
+    assert len(manager) == nb
+    assert len(editor.extraSelections()) == nb
+
+
+def test_batch(editor):
+    manager = editor.decorations
+    nb = len(editor.extraSelections())
+    decos = _decorations(editor, 10)
+    with manager.batch():
+        for deco in decos:
+            manager.append(deco)
+        with manager.batch():
+            manager.remove(decos[0])
+        # the editor is updated when the outermost batch ends
+        assert len(editor.extraSelections()) == nb
+        assert len(manager) == nb + 9
+    assert len(editor.extraSelections()) == nb + 9
+    manager.remove_many(decos)
+    assert len(editor.extraSelections()) == nb
+
+
+def test_intersecting(editor):
+    manager = editor.decorations
+    editor.setPlainText('foo\nbar\nspam\neggs', '', 'utf-8')
+    line = TextDecoration(editor.document(), start_line=1, end_line=2)
+    line.draw_order = 5
+    word = TextDecoration(editor.textCursor(), start_pos=5, end_pos=7)
+    word.draw_order = 1
+    first = TextDecoration(editor.textCursor(), start_pos=0, end_pos=2)
+    manager.append_many([line, word, first])
+    assert manager.at_position(6)[-2:] == [word, line]
+    assert first in manager.at_position(1)
+    assert word not in manager.at_position(12)
+    assert first not in manager.intersecting_blocks(1, 3)
+    assert word in manager.intersecting_blocks(1, 1)
+    # the index follows the text changes
+    cursor = editor.textCursor()
+    cursor.setPosition(0)
+    cursor.insertText('\n\n')
+    assert first in manager.at_position(3)
+    assert word in manager.at_position(8)
+    assert word not in manager.at_position(6)
+    manager.remove_many([line, word, first])
+    assert word not in manager.at_position(8)
+
+
+def test_interval_tree(editor):
+    manager = editor.decorations
+    editor.setPlainText('foo bar\n' * 500, '', 'utf-8')
+    random.seed(0)
+    decos = []
+    for i in range(300):
+        start = random.randint(0, 3900)
+        deco = TextDecoration(editor.textCursor(), start_pos=start,
+                              end_pos=start + random.randint(0, 20))
+        decos.append(deco)
+    # a long decoration does not make the lookups linear
+    decos.append(TextDecoration(editor.textCursor(), start_pos=0,
+                                end_pos=3999))
+    manager.append_many(decos)
+    try:
+        def check():
+            for i in range(50):
+                start = random.randint(0, 4000)
+                end = start + random.randint(0, 50)
+                expected = set(
+                    deco for deco in decos
+                    if deco.cursor.selectionStart() <= end and
+                    deco.cursor.selectionEnd() >= start)
+                found = manager.intersecting(start, end)
+                assert set(found) & set(decos) == expected
+
+        check()
+        tree = manager._tree
+        # the tree follows the text changes and is updated incrementally
+        cursor = editor.textCursor()
+        for i in range(20):
+            cursor.setPosition(random.randint(0, 3000))
+            if i % 2:
+                cursor.insertText('spam\n' * random.randint(1, 5))
+            else:
+                cursor.movePosition(cursor.Right, cursor.KeepAnchor, 30)
+                cursor.removeSelectedText()
+        check()
+        extra = TextDecoration(editor.textCursor(), start_pos=10, end_pos=12)
+        manager.append(extra)
+        manager.remove_many(decos[:100])
+        decos = decos[100:] + [extra]
+        check()
+        assert manager._tree is tree
+    finally:
+        manager.remove_many(decos)
+
+
+def test_viewport_culling(editor):
+    manager = editor.decorations
+    editor.setPlainText('foo\n' * 2000, '', 'utf-8')
+    manager.CULLING_THRESHOLD = 10
+    manager.margin = 10
+    decos = [TextDecoration(editor.document(), start_line=i,
+                            end_line=i + 1) for i in range(2000)]
+    full_width = TextDecoration(editor.document(), start_line=1999,
+                                end_line=1999, full_width=True)
+    try:
+        manager.append_many(decos + [full_width])
+        assert len(manager) >= 2001
+        nb_selections = len(editor.extraSelections())
+        assert 10 < nb_selections < 200
+        # scrolling out of the window updates the extra selections
+        TextHelper(editor).goto_line(1999)
+        QTest.qWait(100)
+        assert 10 < len(editor.extraSelections()) < 200
+        assert full_width.cursor.position() in [
+            sel.cursor.position() for sel in editor.extraSelections()]
+        manager.CULLING_THRESHOLD = 5000
+        manager.remove_many(decos[10:])
+        assert len(editor.extraSelections()) == len(manager)
+    finally:
+        del manager.CULLING_THRESHOLD
+        manager.margin = 100
+        # only remove our decorations, the modes of the session editor keep
+        # theirs
+        manager.remove_many(decos + [full_width])
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 import os
 import pytest
-from pyqode.core import panels
-from pyqode.core.managers import FileManager
+from pyqode.core import modes, panels
+from pyqode.core.cache import HighlightCache
+from pyqode.core.managers import FileManager, SizeTier
 from pyqode.qt.QtTest import QTest
+from test.helpers import ensure_connected
 
 
 PATH = pth = os.path.join(os.getcwd(), 'test', 'files', 'big5hkscs.txt')
@@ -35,11 +37,142 @@ def test_encodings(editor):
     assert editor.panels.get(panels.EncodingPanel).isVisible() is True
 
 
+@ensure_connected
+def test_highlight_cache(editor, tmpdir):
+    cache = HighlightCache(str(tmpdir))
+    editor.file.highlight_cache = cache
+    mode = editor.modes.get(modes.PygmentsSH)
+    try:
+        # cache miss: the highlighting is stored in the cache
+        editor.file.open(__file__, encoding='utf-8')
+        for i in range(50):
+            QTest.qWait(100)
+            if os.listdir(str(tmpdir)):
+                break
+        assert len(os.listdir(str(tmpdir))) == 1
+        # cache hit: the runs are restored, nothing is lexed
+        lexed = []
+        mode._lexer.get_tokens = lambda text: lexed.append(text) or []
+        try:
+            editor.file.open(__file__, encoding='utf-8')
+            QTest.qWait(100)
+            assert len(mode._runs) == editor.document().blockCount()
+            # (the empty block left by setPlainText clearing the document)
+            assert not [text for text in lexed if text]
+        finally:
+            del mode._lexer.get_tokens
+    finally:
+        editor.file.highlight_cache = None
+
+
+def test_size_tiers(editor, tmpdir):
+    tiers = editor.file.size_tiers
+    path = str(tmpdir.join('big.py'))
+    with open(path, 'w') as f:
+        f.write('def foo():\n\tpass\n' * 100)
+    editor.file.size_tiers = [
+        SizeTier(100, disable=['FoldingPanel', 'CodeCompletionMode']),
+        SizeTier(1000, keep=['LineNumberPanel'], fast_path=True)]
+    folding = editor.panels.get(panels.FoldingPanel)
+    try:
+        editor.file.open(path)
+        assert editor.file.size_tier is editor.file.size_tiers[-1]
+        assert editor.panels.get(panels.LineNumberPanel).enabled
+        assert not editor.modes.get(modes.PygmentsSH).enabled
+        assert not folding.enabled
+        # fast path, tabs are not replaced
+        assert '\t' in editor.toPlainText()
+        editor.file.size_tiers[-1].min_size = 10000
+        editor.file.open(path)
+        assert editor.file.size_tier is editor.file.size_tiers[0]
+        assert editor.modes.get(modes.PygmentsSH).enabled
+        assert not editor.modes.get(modes.CodeCompletionMode).enabled
+        assert not folding.enabled and folding.isHidden()
+        # smaller file, everything is enabled again
+        path = str(tmpdir.join('small.py'))
+        with open(path, 'w') as f:
+            f.write('pass\n')
+        editor.file.open(path)
+        assert editor.file.size_tier is None
+        assert editor.modes.get(modes.CodeCompletionMode).enabled
+        assert folding.enabled and not folding.isHidden()
+    finally:
+        editor.file.size_tiers = tiers
+
+
+def test_file_size_limit(editor):
+    tiers = editor.file.size_tiers
+    try:
+        assert editor.file.file_size_limit == 10000000
+        editor.file.file_size_limit = 5000000
+        assert editor.file.size_tiers[-1].min_size == 5000000
+        editor.file.size_tiers = []
+        assert editor.file.file_size_limit is None
+        editor.file.file_size_limit = 100
+        assert editor.file.file_size_limit == 100
+        assert not editor.file.size_tiers[0].is_enabled(
+            editor.panels.get(panels.LineNumberPanel))
+    finally:
+        editor.file.size_tiers = tiers
+
+
 def test_reload(editor):
     editor.file.open(PATH, encoding='big5hkscs', use_cached_encoding=False)
     editor.file.reload('cp1250')
 
 
+@pytest.mark.parametrize('new_text', [
+    'a\nB\nc\nd\n',
+    'x\na\nb\nc\nd\n',
+    'a\nb\nc\nd\ne\nf',
+    'a\nb\n',
+    'a\nb\nc\nd',
+    'c\nd\n',
+    '',
+])
+def test_reload_changes(editor, tmpdir, new_text):
+    path = str(tmpdir.join('changed.txt'))
+    with open(path, 'w') as f:
+        f.write('a\nb\nc\nd\n')
+    editor.file.open(path)
+    block = editor.document().findBlockByNumber(0)
+    block.setUserState(42)
+    with open(path, 'w') as f:
+        f.write(new_text)
+    reloaded = []
+    editor.file.reload_changes(lambda: reloaded.append(True))
+    assert reloaded
+    assert editor.toPlainText() == new_text
+    assert not editor.document().isModified()
+    if new_text.startswith('a'):
+        # the first line did not change, it kept its state
+        assert editor.document().findBlockByNumber(0).userState() == 42
+    editor.undo()
+    assert editor.toPlainText() == 'a\nb\nc\nd\n'
+
+
+@ensure_connected
+def test_reload_changes_backend(editor, tmpdir):
+    threshold = editor.file.backend_diff_threshold
+    path = str(tmpdir.join('changed.txt'))
+    with open(path, 'w') as f:
+        f.write('a\nb\nc\nd\n')
+    editor.file.open(path)
+    editor.file.backend_diff_threshold = 1
+    try:
+        with open(path, 'w') as f:
+            f.write('a\nB\nc\nd\ne\n')
+        reloaded = []
+        editor.file.reload_changes(lambda: reloaded.append(True))
+        for i in range(50):
+            QTest.qWait(100)
+            if reloaded:
+                break
+        assert editor.toPlainText() == 'a\nB\nc\nd\ne\n'
+    finally:
+        editor.file.backend_diff_threshold = threshold
+
+
 def test_close(editor):
     editor.file.open(__file__)
     editor.file.close()
@@ -3,6 +3,9 @@ from pyqode.qt.QtTest import QTest
 import sys
 import pytest
 from pyqode.core import modes, panels
+from pyqode.core.api import TextHelper
+
+from pyqode.core.backend import workers
 
 from ..helpers import wait_for_connected, editor_open
 from ..helpers import server_path
@@ -46,7 +49,9 @@ def test_add_messages(editor):
     mode.add_messages([modes.CheckerMessage('desc', random.choice(status),
                                             10 + i)
                        for i in range(500)])
-    assert len(mode._messages) < 500
+    # no limit, decorations are only created for the visible lines
+    assert len(mode._messages) == 500
+    assert len(mode._decorations.decorations) < 500
     QTest.qWait(500)
 
 
@@ -59,16 +64,151 @@ def test_remove_message(editor):
               modes.CheckerMessages.INFO]
     mode.add_messages([modes.CheckerMessage('desc', modes.CheckerMessages.ERROR,
                                             10 + i)
-                       for i in range(mode.limit * 2)])
+                       for i in range(400)])
     while not mode._finished:
         QTest.qWait(5000)
-    assert len(mode._messages) == mode.limit
+    assert len(mode._messages) == 400
     QTest.qWait(5000)
     mode.remove_message(mode._messages[10])
     QTest.qWait(5000)
-    assert len(mode._messages) == mode.limit - 1
+    assert len(mode._messages) == 399
+    assert not mode.messages_at_line(20)
+    mode.clear_messages()
+
+
+@editor_open(__file__)
+def test_update_messages(editor):
+    mode = get_mode(editor)
+    mode.clear_messages()
+    messages = [modes.CheckerMessage('desc', modes.CheckerMessages.ERROR,
+                                     10 + i) for i in range(10)]
+    mode.add_messages(messages)
+    assert mode._finished
+    assert len(mode.messages) == 10
+    assert mode.messages_at_line(10) == [messages[0]]
+    decoration = mode._decorations.decorations[0]
+    assert decoration in editor.decorations
+    # same messages (identified by their key) are left untouched, others are
+    # removed and duplicates are ignored
+    new_messages = [modes.CheckerMessage('desc', modes.CheckerMessages.ERROR,
+                                         10 + i) for i in range(5)]
+    new_messages.append(modes.CheckerMessage(
+        'other', modes.CheckerMessages.WARNING, 10))
+    mode.add_messages(new_messages + new_messages)
+    assert len(mode.messages) == 6
+    assert mode.messages[0] is messages[0]
+    # one decoration per line
+    assert len(mode._decorations.ranges) == 5
+    assert len(mode.messages_at_line(10)) == 2
+    assert not mode.messages_at_line(19)
+    mode.clear_messages()
+    assert not mode.messages_at_line(10)
+    assert not mode._decorations.decorations
+
+
+@editor_open(__file__)
+def test_messages_follow_lines(editor):
+    mode = get_mode(editor)
+    editor.setPlainText('\n'.join('line %d' % i for i in range(1000)),
+                        'text/x-plain', 'utf-8')
+    mode.clear_messages()
+
+    def messages(*lines):
+        return [modes.CheckerMessage('desc', modes.CheckerMessages.ERROR, l)
+                for l in lines]
+
+    def decorated_lines():
+        return sorted(deco.cursor.blockNumber()
+                      for deco in mode._decorations.decorations)
+
+    mode.add_messages(messages(10, 500))
+    added = list(mode.messages)
+    # insert a line above the messages: they move with their lines
+    cursor = editor.textCursor()
+    cursor.setPosition(0)
+    cursor.insertText('new line\n')
+    assert not mode.messages_at_line(10)
+    assert mode.messages_at_line(11) == [added[0]]
+    TextHelper(editor).goto_line(501)
+    mode._decorations.refresh(force=True)
+    assert 501 in decorated_lines()
+    assert 500 not in decorated_lines()
+    # the analysis of the new text returns the same messages, they are kept
+    mode.add_messages(messages(11, 501))
+    assert mode.messages == added
+    assert [msg.line for msg in added] == [11, 501]
+    assert added[1].block.blockNumber() == 501
     mode.clear_messages()
 
+    def messages():
+        return [modes.CheckerMessage('desc', modes.CheckerMessages.ERROR, l)
+                for l in (10, 500)]
+
+    def decorated_lines():
+        return sorted(deco.cursor.blockNumber()
+                      for deco in mode._decorations.decorations)
+
+    mode.add_messages(messages())
+    # edit above the messages, the analysis returns the same messages
+    cursor = editor.textCursor()
+    cursor.setPosition(0)
+    cursor.insertText('0123456789')
+    mode.add_messages(messages())
+    TextHelper(editor).goto_line(500)
+    mode._decorations.refresh(force=True)
+    assert 500 in decorated_lines()
+    # the ranges are also updated when no analysis comes back
+    cursor.insertText('0123456789')
+    QTest.qWait(100)
+    mode._decorations.refresh(force=True)
+    assert 500 in decorated_lines()
+    mode.clear_messages()
+
+
+class CheckerA(modes.CheckerMode):
+    def __init__(self):
+        super(CheckerA, self).__init__(check_a, delay=10)
+
+
+class CheckerB(modes.CheckerMode):
+    def __init__(self):
+        super(CheckerB, self).__init__(check_b, delay=10)
+
+
+@editor_open(__file__)
+def test_coordinator(editor):
+    coordinator = modes.CheckerCoordinatorMode()
+    checker_a = CheckerA()
+    checker_b = CheckerB()
+    editor.modes.append(coordinator)
+    editor.modes.append(checker_a)
+    editor.modes.append(checker_b)
+    try:
+        sent = []
+
+        def send_request(worker, data, on_receive=None):
+            # run the workers in process, test workers cannot be imported by
+            # the test server
+            sent.append(worker)
+            if worker is workers.run_checkers:
+                on_receive(worker(data))
+
+        editor.backend.send_request = send_request
+        checker_a.request_analysis()
+        checker_b.request_analysis()
+        QTest.qWait(1000)
+        # one merged request, results dispatched to each checker
+        assert sent.count(workers.run_checkers) == 1
+        assert check_a not in sent and check_b not in sent
+        assert [msg.description for msg in checker_a.messages] == ['a']
+        assert [msg.description for msg in checker_b.messages] == ['b']
+        assert checker_a._finished and checker_b._finished
+    finally:
+        del editor.backend.send_request
+        editor.modes.remove(CheckerB)
+        editor.modes.remove(CheckerA)
+        editor.modes.remove(modes.CheckerCoordinatorMode)
+
 
 @editor_open(__file__)
 def test_work_finished(editor):
@@ -94,3 +234,11 @@ def check(data):
         return [('desc', i % 3, 10 + i) for i in range(150)]
     else:
         return [('desc', i % 3, 10 + i) for i in range(20)]
+
+
+def check_a(data):
+    return [('a', 0, 1)]
+
+
+def check_b(data):
+    return [('b', 2, 2)]
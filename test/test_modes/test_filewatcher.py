@@ -5,6 +5,8 @@ from pyqode.qt import QtWidgets
 from pyqode.qt.QtTest import QTest
 import datetime
 from pyqode.core import modes
+from pyqode.core.api import TextHelper
+from pyqode.core.managers import FileManager, SizeTier
 from test.helpers import editor_open, preserve_settings
 
 
@@ -88,3 +90,138 @@ def test_non_existing_file_path(editor):
     editor.file._path = '/usr/blah/foo/bar.txt'
     mode._update_mtime()
     editor.file._path = p
+
+
+def test_follow(editor, tmpdir):
+    mode = get_mode(editor)
+    path = str(tmpdir.join('app.log'))
+    with open(path, 'wb') as f:
+        f.write(b'line 1\n')
+    editor.file.open(path, encoding='utf-8', use_cached_encoding=False)
+    mode.follow = True
+    appended = []
+    mode.text_appended.connect(appended.append)
+    try:
+        with open(path, 'ab') as f:
+            # the last character is incomplete, and so is the last EOL
+            f.write(b'line 2\r\nline \xc3\xa9\r\nlast \xc3')
+        mode._check_file()
+        assert editor.toPlainText() == 'line 1\nline 2\nline \xe9\nlast '
+        assert not editor.dirty
+        with open(path, 'ab') as f:
+            f.write(b'\xa9\n')
+        mode._check_file()
+        assert editor.toPlainText() == (
+            'line 1\nline 2\nline \xe9\nlast \xe9\n')
+        assert appended == ['line 2\nline \xe9\nlast ', '\xe9\n']
+        # bounded number of lines
+        mode.max_line_count = 3
+        with open(path, 'ab') as f:
+            f.write(b'new line\n')
+        mode._check_file()
+        assert editor.toPlainText() == 'last \xe9\nnew line\n'
+    finally:
+        mode.text_appended.disconnect(appended.append)
+        mode.max_line_count = 0
+        mode.follow = False
+
+
+def test_follow_growing_while_opened(editor, tmpdir, monkeypatch):
+    mode = get_mode(editor)
+    path = str(tmpdir.join('app.log'))
+    with open(path, 'wb') as f:
+        f.write(b'line 1\n')
+    read = FileManager._read
+
+    def read_and_grow(manager, path, encoding):
+        content = read(manager, path, encoding)
+        # the file grows after it has been read
+        with open(path, 'ab') as f:
+            f.write(b'line 2\n')
+        return content
+
+    monkeypatch.setattr(FileManager, '_read', read_and_grow)
+    editor.file.open(path, encoding='utf-8', use_cached_encoding=False)
+    monkeypatch.undo()
+    mode.follow = True
+    try:
+        assert editor.toPlainText() == 'line 1\n'
+        mode._check_file()
+        assert editor.toPlainText() == 'line 1\nline 2\n'
+    finally:
+        mode.follow = False
+
+
+def test_follow_utf16(editor, tmpdir):
+    mode = get_mode(editor)
+    path = str(tmpdir.join('app.log'))
+    with open(path, 'wb') as f:
+        f.write(u'line 1\r\n'.encode('utf-16-le'))
+    editor.file.open(path, encoding='utf-16-le', use_cached_encoding=False)
+    mode.follow = True
+    try:
+        with open(path, 'ab') as f:
+            f.write(u'line 2\r'.encode('utf-16-le'))
+        mode._check_file()
+        assert editor.toPlainText() == 'line 1\nline 2'
+        with open(path, 'ab') as f:
+            f.write(u'\nline 3\r\n'.encode('utf-16-le'))
+        mode._check_file()
+        assert editor.toPlainText() == 'line 1\nline 2\nline 3\n'
+    finally:
+        mode.follow = False
+
+
+def test_follow_fast_path(editor, tmpdir):
+    mode = get_mode(editor)
+    path = str(tmpdir.join('app.log'))
+    with open(path, 'wb') as f:
+        f.write(b'a\tb\n')
+    tiers = editor.file.size_tiers
+    editor.file.size_tiers = [SizeTier(0, fast_path=True)]
+    try:
+        editor.file.open(path, encoding='utf-8', use_cached_encoding=False)
+        mode.follow = True
+        with open(path, 'ab') as f:
+            f.write(b'c\td\n')
+        mode._check_file()
+        # tabs are kept, like when the file was opened
+        assert editor.toPlainText() == 'a\tb\nc\td\n'
+    finally:
+        mode.follow = False
+        editor.file.size_tiers = tiers
+        editor.file._apply_size_tier(0)
+
+
+def test_follow_modified(editor, tmpdir, monkeypatch):
+    mode = get_mode(editor)
+    path = str(tmpdir.join('app.log'))
+    with open(path, 'wb') as f:
+        f.write(b'line 1\n')
+    editor.file.open(path, encoding='utf-8', use_cached_encoding=False)
+    notified = []
+    monkeypatch.setattr(mode, '_notify_change', lambda: notified.append(1))
+    mode.follow = True
+    try:
+        TextHelper(editor).goto_line(0)
+        editor.textCursor().insertText('edited ')
+        editor.file.save()
+        undo_steps = editor.document().availableUndoSteps()
+        assert undo_steps
+        with open(path, 'ab') as f:
+            f.write(b'line 2\n')
+        mode._check_file()
+        assert editor.toPlainText() == 'edited line 1\nline 2\n'
+        # the undo history is kept
+        assert editor.document().availableUndoSteps() > undo_steps
+        assert not notified
+        # unsaved changes: do not append, ask to reload
+        editor.textCursor().insertText('unsaved ')
+        with open(path, 'ab') as f:
+            f.write(b'line 3\n')
+        mode._check_file()
+        assert 'unsaved ' in editor.toPlainText()
+        assert 'line 3' not in editor.toPlainText()
+        assert notified
+    finally:
+        mode.follow = False
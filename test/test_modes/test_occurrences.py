@@ -57,8 +57,33 @@ def test_occurrences(editor):
         assert editor.backend.running is True
         mode = get_mode(editor)
         mode.underlined = underlined
-        assert len(mode._decorations) == 0
         assert mode.delay == 1000
         TextHelper(editor).goto_line(16, 7)
+        # occurrences close to the viewport are highlighted immediately
+        assert len(mode._decorations.decorations) > 0
         QTest.qWait(2000)
-        assert len(mode._decorations) > 0
+        assert len(mode._decorations.decorations) > 0
+
+
+@ensure_visible
+def test_occurrences_near_viewport(editor):
+    mode = get_mode(editor)
+    editor.setPlainText('foo bar\nfoobar foo\n' * 200 + 'Foo', '', 'utf-8')
+    mode.margin = 1000
+    assert mode.margin == 1000
+    mode._sub = None
+    TextHelper(editor).goto_line(0, 1)
+    mode._request_highlight()
+    # highlighted before the backend answered, the occurrence under the
+    # cursor is not decorated
+    assert len(mode._decorations.ranges) == 401
+    assert 0 < len(mode._decorations.decorations) < 401
+    mode.case_sensitive = True
+    assert len(mode._decorations.ranges) == 400
+    # only the lines that are close to the viewport are searched
+    mode.margin = 10
+    mode._sub = None
+    mode._request_highlight()
+    assert 1 < len(mode._decorations.ranges) < 400
+    mode.margin = 100
+    mode.case_sensitive = False
@@ -1,6 +1,9 @@
+import pygments.lexers
+from pygments.token import Comment, String
 from pyqode.qt.QtTest import QTest
 from pyqode.core import modes
-from test.helpers import editor_open
+from pyqode.core.api import ColorScheme, FormatTable, TextHelper
+from test.helpers import editor_open, ensure_connected
 
 
 def get_mode(editor):
@@ -20,6 +23,51 @@ def test_lexer_from_filename_tmp_file(editor):
     mode.set_lexer_from_filename("file.py~")
 
 
+def test_lexer_resolver(editor):
+    from pyqode.core.modes.pygments_sh import LexerResolver
+    mode = get_mode(editor)
+    LexerResolver.clear()
+    lookups = []
+    get_lexer_for_filename = pygments.lexers.get_lexer_for_filename
+    pygments.lexers.get_lexer_for_filename = \
+        lambda name: lookups.append(name) or get_lexer_for_filename(name)
+    try:
+        mode.set_lexer_from_filename('/path/foo.c')
+        mode.set_lexer_from_filename('bar.c')
+        assert lookups == ['foo.c']
+        assert mode._lexer.name == 'C'
+        mode.set_lexer_from_filename('unknown.xyz')
+        mode.set_lexer_from_filename('unknown.xyz')
+        assert lookups == ['foo.c', 'unknown.xyz']
+        assert mode._lexer.name == 'Text only'
+        # prebuilt index
+        index = LexerResolver.index()
+        LexerResolver.clear()
+        index['filename:*.xyz'] = 'pygments.lexers.python.PythonLexer'
+        LexerResolver.load_index(index)
+        mode.set_lexer_from_filename('unknown.xyz')
+        assert mode._lexer.name == 'Python'
+        mode.set_lexer_from_filename('foo.c')
+        assert lookups == ['foo.c', 'unknown.xyz']
+        assert mode._lexer.name == 'C'
+    finally:
+        pygments.lexers.get_lexer_for_filename = get_lexer_for_filename
+        LexerResolver.clear()
+
+
+def test_shared_format_tables(editor):
+    mode = get_mode(editor)
+    other = modes.PygmentsSH(editor.document())
+    other.pygments_style = mode.pygments_style
+    assert other._format_table is mode._format_table
+    table = FormatTable.for_style('monokai')
+    assert ColorScheme('monokai').table is table
+    assert ColorScheme('monokai').formats == table.scheme_formats
+    fmt = table.token_format(String.Doc)
+    assert fmt.objectType() == fmt.UserObject
+    assert table.token_format(String.Doc) is fmt
+
+
 @editor_open(__file__)
 def test_apply_all_pygments_styles(editor):
     mode = get_mode(editor)
@@ -27,3 +75,156 @@ def test_apply_all_pygments_styles(editor):
         mode.pygments_style = style
         assert mode.pygments_style == style
         QTest.qWait(500)
+
+
+def test_lexer_state_convergence(editor):
+    mode = get_mode(editor)
+    editor.setPlainText('a = 1\n' * 200, 'text/x-python', 'utf-8')
+    # let the highlighter process the whole document
+    QTest.qWait(100)
+    highlighted = []
+    highlight_block = mode.highlight_block
+
+    def count_blocks(text, block):
+        highlighted.append(block.blockNumber())
+        return highlight_block(text, block)
+
+    mode.highlight_block = count_blocks
+    try:
+        helper = TextHelper(editor)
+        # lexer state does not change: only the edited block is highlighted
+        # (and the next one, which QSyntaxHighlighter always highlights)
+        cursor = helper.select_lines(50, 50)
+        cursor.insertText('b = 2')
+        assert highlighted == [50, 51]
+        # opening a multi-line string: all the following blocks are
+        # highlighted again, they are now in a string
+        del highlighted[:]
+        cursor = helper.select_lines(100, 100)
+        cursor.insertText('"""')
+        assert highlighted == list(range(100, 201))
+        block = editor.document().findBlockByNumber(120)
+        fmt = block.layout().additionalFormats()[0].format
+        assert fmt == mode._get_format(String.Double)
+        # closing the string: highlighting stops as soon as the lexer state
+        # is the same as before
+        del highlighted[:]
+        cursor = helper.select_lines(150, 150)
+        cursor.insertText('"""')
+        assert highlighted == list(range(150, 201))
+        # editing inside the string
+        del highlighted[:]
+        cursor = helper.select_lines(120, 120)
+        cursor.insertText('c = 3')
+        assert highlighted == [120, 121]
+    finally:
+        mode.highlight_block = highlight_block
+
+
+def test_progressive_highlighting(editor):
+    mode = get_mode(editor)
+    mode.PROGRESSIVE_THRESHOLD = 500
+    progress = []
+    mode.highlighting_progress.connect(
+        lambda done, total: progress.append((done, total)))
+    editor.setPlainText('a = 1\n' * 1000 + '"""\n' + 'b = 2\n' * 1000,
+                        'text/x-python', 'utf-8')
+    # highlighting is done later, visible blocks first
+    assert mode.highlighting
+    TextHelper(editor).goto_line(1500)
+    mode.rehighlight()
+    QTest.qWait(1)
+    assert progress
+    # edits only queue the edited blocks again
+    done = mode._nb_done
+    assert done
+    cursor = TextHelper(editor).select_lines(0, 0)
+    cursor.insertText('c = 3')
+    assert mode.highlighting
+    assert mode._nb_done >= done - 1
+    # inserting a line shifts the block numbers of the highlighting state
+    done = mode._nb_done
+    cursor = TextHelper(editor).select_lines(10, 10)
+    cursor.insertText('x = 1\ny = 2')
+    assert mode.highlighting
+    assert mode._nb_done >= done - 1
+    assert len(mode._done) == 2003
+    for i in range(100):
+        QTest.qWait(50)
+        if not mode.highlighting:
+            break
+    assert not mode.highlighting
+    assert progress[-1] == (2003, 2003)
+    assert progress[0][0] < 2003
+
+    def block_format(line):
+        block = editor.document().findBlockByNumber(line)
+        return block.layout().additionalFormats()[0].format
+
+    # the lexer state is the same as if the document had been highlighted
+    # from top to bottom
+    assert block_format(1500) == mode._get_format(String.Double)
+    assert block_format(500) != mode._get_format(String.Double)
+    # after highlighting finished, edits are highlighted immediately
+    cursor = TextHelper(editor).select_lines(1001, 1001)
+    cursor.insertText('d = 4')
+    assert not mode.highlighting
+    assert block_format(1500) != mode._get_format(String.Double)
+
+
+@ensure_connected
+def test_backend_lexing(editor):
+    mode = get_mode(editor)
+    editor.setPlainText('a = 1\n"""\nfoo\n"""\nb = 2\n' * 10,
+                        'text/x-python', 'utf-8')
+    QTest.qWait(100)
+    lexed = []
+    mode._lexer.get_tokens = lambda text: lexed.append(text) or []
+    try:
+        mode.backend_lexing = True
+        for i in range(50):
+            QTest.qWait(100)
+            if mode._runs:
+                break
+        # the formats come from the backend
+        assert len(mode._runs) == 51
+        block = editor.document().findBlockByNumber(2)
+        fmt = block.layout().additionalFormats()[0].format
+        assert fmt == mode._get_format(String.Doc)
+        assert not lexed
+        # edited blocks are lexed locally, then by the backend
+        cursor = TextHelper(editor).select_lines(7, 7)
+        cursor.insertText('bar')
+        assert lexed == ['bar', '"""']
+        assert len(mode._runs) == 7
+        for i in range(50):
+            QTest.qWait(100)
+            if len(mode._runs) == 51:
+                break
+        assert len(mode._runs) == 51
+    finally:
+        del mode._lexer.get_tokens
+        mode.backend_lexing = False
+
+
+@ensure_connected
+def test_backend_lexing_states(editor):
+    # the backend cannot track the states of the C lexer, the blocks are
+    # lexed locally so that an edit in a multi-line comment still works
+    mode = get_mode(editor)
+    mode.set_mime_type('text/x-csrc')
+    try:
+        editor.setPlainText('int a;\n/*\nfoo\nbar\n*/\nint b;\n' * 10,
+                            'text/x-csrc', 'utf-8')
+        mode.backend_lexing = True
+        QTest.qWait(1000)
+        assert not mode._runs
+        cursor = TextHelper(editor).select_lines(2, 2)
+        cursor.insertText('baz')
+        QTest.qWait(1000)
+        block = editor.document().findBlockByNumber(2)
+        fmt = block.layout().additionalFormats()[0].format
+        assert fmt == mode._get_format(Comment.Multiline)
+    finally:
+        mode.backend_lexing = False
+        mode.set_mime_type('text/x-python')
@@ -28,3 +28,15 @@ def test_enabled(editor):
 
 def check(data):
     return True, [('desc', i % 3, i + 1) for i in range(20)]
+
+
+@editor_open(__file__)
+def test_marker_for_line(editor):
+    mode = get_mode(editor)
+    panel = get_panel(editor)
+    mode.clear_messages()
+    mode.add_messages([modes.CheckerMessage(
+        'desc', modes.CheckerMessages.WARNING, 5)])
+    assert [msg.description for msg in panel.marker_for_line(5)] == ['desc']
+    assert panel.marker_for_line(6) == []
+    mode.clear_messages()
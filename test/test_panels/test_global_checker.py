@@ -0,0 +1,44 @@
+from pyqode.core import modes
+from pyqode.core import panels
+from pyqode.qt import QtGui
+from test.helpers import editor_open
+
+
+def get_panel(editor):
+    return editor.panels.get(panels.GlobalCheckerPanel)
+
+
+def get_mode(editor):
+    try:
+        mode = editor.modes.get(modes.CheckerMode)
+    except KeyError:
+        mode = modes.CheckerMode(check)
+        editor.modes.append(mode)
+    return mode
+
+
+def check(data):
+    return []
+
+
+@editor_open(__file__)
+def test_cached_pixmap(editor):
+    panel = get_panel(editor)
+    mode = get_mode(editor)
+    mode.clear_messages()
+    mode.add_messages([modes.CheckerMessage(
+        'desc', modes.CheckerMessages.ERROR, i) for i in range(10)])
+    panel.resize(12, 200)
+    pixmap = QtGui.QPixmap(panel.size())
+    painter = QtGui.QPainter(pixmap)
+    panel._draw_messages(painter)
+    cached = panel._pixmap
+    assert cached is not None
+    panel._draw_messages(painter)
+    assert panel._pixmap is cached
+    # rebuilt when the messages changed
+    mode.remove_message(mode.messages[0])
+    panel._draw_messages(painter)
+    assert panel._pixmap is not cached
+    painter.end()
+    mode.clear_messages()
@@ -3,6 +3,7 @@ from pyqode.qt import QtCore, QtGui
 from pyqode.qt.QtTest import QTest
 from pyqode.core.api import TextHelper
 from pyqode.core import panels
+from pyqode.core.backend.workers import findall
 from test.helpers import editor_open, ensure_connected
 
 
@@ -158,3 +159,40 @@ def test_event_filter(editor):
     editor.show()
     QTest.qWait(1000)
     assert not panel.isVisible()
+
+
+def test_replace_all_single_edit(editor):
+    panel = get_panel(editor)
+    editor.setPlainText('foo bar foo\nfoofoo\nbaz foo', '', 'utf-8')
+    panel._on_results_available(findall({
+        'string': editor.toPlainText(), 'sub': 'foo', 'regex': False,
+        'whole_word': False, 'case_sensitive': True}))
+    assert panel.cpt_occurences == 5
+    panel.replace_all('spam')
+    assert editor.toPlainText() == 'spam bar spam\nspamspam\nbaz spam'
+    assert panel.cpt_occurences == 0
+    assert not panel.get_occurences()
+    editor.undo()
+    assert editor.toPlainText() == 'foo bar foo\nfoofoo\nbaz foo'
+
+
+@ensure_connected
+def test_refine_search(editor):
+    panel = get_panel(editor)
+    panel.checkBoxRegex.setChecked(False)
+    panel.checkBoxCase.setChecked(False)
+    panel.checkBoxWholeWords.setChecked(False)
+    panel.checkBoxInSelection.setChecked(False)
+    editor.setPlainText('foo Food fob\nfoo', '', 'utf-8')
+    QTest.qWait(1000)
+    flags = panel._search_flags()
+    panel._exec_search('fo', flags)
+    QTest.qWait(1000)
+    assert panel.cpt_occurences == 4
+    # extending the query narrows the previous results without any delay
+    assert panel._refine_search('foo', flags)
+    assert list(panel.get_occurences()) == [(0, 3), (4, 7), (13, 16)]
+    assert panel._refine_search('food', flags)
+    assert panel.cpt_occurences == 1
+    # shrinking the query requires a full search
+    assert not panel._refine_search('fo', flags)
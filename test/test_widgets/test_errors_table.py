@@ -0,0 +1,75 @@
+from pyqode.qt import QtCore
+from pyqode.core.modes import CheckerMessage, CheckerMessages
+from pyqode.core.widgets import ErrorsTable
+from pyqode.core.widgets.errors_table import COL_LINE_NBR, COL_TYPE
+
+
+def _messages(path, nb):
+    return [CheckerMessage('message %d' % i, i % 3, i, path=path)
+            for i in range(nb)]
+
+
+def test_add_messages():
+    table = ErrorsTable()
+    foo = CheckerMessage('foo', CheckerMessages.ERROR, 10, col=2,
+                         path='/tmp/foo.py', color='#FF0000')
+    table.add_message(foo)
+    table.add_messages(_messages('/tmp/bar.py', 1000))
+    assert table.rowCount() == 1001
+    msg = table.message(0)
+    assert msg is foo
+    assert msg.color == '#FF0000'
+    assert msg.description == 'foo'
+    assert msg.status == CheckerMessages.ERROR
+    assert (msg.line, msg.col, msg.path) == (10, 2, '/tmp/foo.py')
+    assert table.message(1).col is None
+    index = table.model().index(0, 1)
+    assert index.data() == 'foo.py'
+    assert table.model().index(0, COL_LINE_NBR).data() == '11'
+    table.remove_messages('/tmp/bar.py')
+    assert table.rowCount() == 1
+    table.set_messages(_messages('/tmp/bar.py', 10))
+    assert table.rowCount() == 10
+    table.clear()
+    assert table.rowCount() == 0
+
+
+def test_sort_and_filter():
+    table = ErrorsTable()
+    table.add_messages(_messages('/tmp/bar.py', 100))
+    table.sortByColumn(COL_LINE_NBR, QtCore.Qt.DescendingOrder)
+    assert table.message(0).line == 99
+    table.sortByColumn(COL_TYPE, QtCore.Qt.AscendingOrder)
+    assert table.message(0).status == CheckerMessages.INFO
+    assert table.message(99).status == CheckerMessages.ERROR
+    # new messages are sorted too
+    table.add_message(CheckerMessage('new', CheckerMessages.INFO, 0))
+    assert table.message(99).status == CheckerMessages.ERROR
+    table.set_filter(statuses=[CheckerMessages.ERROR])
+    assert table.rowCount() == 33
+    table.set_filter('message 1')
+    assert table.rowCount() == 11
+    table.set_filter()
+    assert table.rowCount() == 101
+
+
+def test_msg_activated():
+    table = ErrorsTable()
+    table.add_messages(_messages('/tmp/bar.py', 3))
+    activated = []
+    table.msg_activated.connect(activated.append)
+    table.activated.emit(table.model().index(2, 0))
+    assert activated == [table.message(2)]
+
+
+def test_table_widget_api():
+    table = ErrorsTable()
+    table.add_messages(_messages('/tmp/bar.py', 3))
+    assert table.columnCount() == 4
+    item = table.item(1, COL_LINE_NBR)
+    assert item.text() == '2'
+    assert item.data(QtCore.Qt.UserRole) is table.message(1)
+    assert table.item(3, 0) is None
+    assert table.currentItem() is None
+    table.setCurrentIndex(table.model().index(2, 0))
+    assert table.currentItem().text() == table.message(2).status_string
@@ -0,0 +1,22 @@
+import os
+from pyqode.qt.QtTest import QTest
+from pyqode.core.widgets import FindInFilesWidget
+from test.helpers import ensure_connected
+
+
+@ensure_connected
+def test_find_in_files(editor):
+    widget = FindInFilesWidget()
+    root = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'files')
+    widget.search(editor.backend, root, 'import', whole_word=True,
+                  ignore_patterns=['*.txt'])
+    assert widget.running
+    for i in range(50):
+        QTest.qWait(100)
+        if not widget.running:
+            break
+    assert not widget.running
+    assert widget.nb_hits == 2
+    assert widget.topLevelItemCount() == 1
+    widget.clear()
+    assert widget.nb_hits == 0
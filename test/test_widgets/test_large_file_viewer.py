@@ -0,0 +1,114 @@
+import pytest
+from pyqode.qt.QtTest import QTest
+from pyqode.core.widgets import LargeFileViewer
+from pyqode.core.widgets.large_file_viewer import LineIndex
+from test.helpers import ensure_connected
+
+
+def write_log(tmpdir, nb_lines=1000):
+    path = str(tmpdir.join('big.log'))
+    with open(path, 'w') as f:
+        for i in range(nb_lines):
+            f.write('line %d%s\n' % (i, ' ERROR' if i % 300 == 299 else ''))
+    return path
+
+
+def wait_indexed(viewer):
+    for i in range(50):
+        if not viewer.indexing:
+            break
+        QTest.qWait(100)
+    assert not viewer.indexing
+
+
+def test_line_index(tmpdir):
+    import mmap
+    path = write_log(tmpdir)
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            index = LineIndex(mm)
+            index.CHUNK_SIZE = 100
+            index.build()
+            assert index.complete
+            assert index.line_count == 1000
+            # sparse index
+            assert 1 < len(index._lines) < 1000
+            assert index.read_lines(500, 2, 100) == [b'line 500', b'line 501']
+            assert index.read_lines(999, 5, 100) == [b'line 999']
+            assert index.read_lines(1000, 5, 100) == []
+            assert index.read_lines(0, 1, 3) == [b'lin']
+            offset = index.offset(642)
+            assert index.line_of(offset) == 642
+            assert index.line_of(offset + 3) == 642
+        finally:
+            mm.close()
+
+
+def test_viewer_first_lines(tmpdir):
+    # a file that fits in the viewport is readable right after open
+    viewer = LargeFileViewer()
+    viewer.open(write_log(tmpdir, 3))
+    assert viewer.line_text(0) == 'line 0'
+    assert viewer._lines(0, 5) == ['line 0', 'line 1', 'line 2']
+    viewer.close_file()
+    assert viewer.line_text(0) == ''
+    with pytest.raises(ValueError):
+        viewer.open(write_log(tmpdir, 3), encoding='utf-16')
+
+
+def test_viewer(tmpdir):
+    viewer = LargeFileViewer()
+    viewer.resize(400, 300)
+    viewer.open(write_log(tmpdir, 5000))
+    wait_indexed(viewer)
+    assert viewer.line_count == 5000
+    assert viewer.line_text(4321) == 'line 4321'
+    viewer.goto_line(3000)
+    assert viewer.current_line == 3000
+    assert viewer.verticalScrollBar().value() <= 3000
+    viewer.show()
+    QTest.qWait(100)
+    viewer.close_file()
+    assert viewer.line_count == 0
+
+
+@ensure_connected
+def test_viewer_search(editor, tmpdir):
+    viewer = LargeFileViewer()
+    # one occurrence per request
+    viewer.MAX_HITS = 1
+    viewer.open(write_log(tmpdir))
+    wait_indexed(viewer)
+    matches = []
+    viewer.search_finished.connect(lambda l, c: matches.append((l, c)))
+
+    def wait_match(count):
+        for i in range(50):
+            QTest.qWait(100)
+            if len(matches) >= count:
+                break
+        return matches[count - 1]
+
+    viewer.goto_line(500)
+    viewer.search(editor.backend, 'error')
+    assert wait_match(1) == (599, 9)
+    viewer.find_next()
+    assert wait_match(2) == (899, 9)
+    # wraps to the start of the file
+    viewer.find_next()
+    assert wait_match(3) == (299, 9)
+    # the wrapped search stops where the search started, then starts again
+    viewer.find_next()
+    assert wait_match(4) == (599, 9)
+    viewer.find_next()
+    assert wait_match(5) == (899, 9)
+    viewer.find_next()
+    assert wait_match(6) == (299, 9)
+    # a new search does not continue from the previous one
+    viewer.goto_line(700)
+    viewer.search(editor.backend, 'error')
+    assert wait_match(7) == (899, 9)
+    viewer.search(editor.backend, 'no match')
+    assert wait_match(8) == (-1, -1)
+    viewer.close_file()
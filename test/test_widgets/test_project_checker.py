@@ -0,0 +1,53 @@
+import os
+from pyqode.qt.QtTest import QTest
+from pyqode.core.modes import CheckerMessages
+from pyqode.core.widgets import ErrorsTable, ProjectChecker
+
+
+class Backend(object):
+    """
+    Runs the workers in process: checkers defined in the test modules cannot
+    be imported by the test server.
+    """
+    def send_request(self, worker, data, on_receive=None):
+        results = worker()(data)
+        if on_receive is not None:
+            on_receive(results)
+
+
+def check(data):
+    return [('%d lines' % len(data['code'].splitlines()),
+             CheckerMessages.WARNING, 0)]
+
+
+def _wait(checker):
+    for i in range(50):
+        QTest.qWait(100)
+        if not checker.running:
+            break
+    assert not checker.running
+
+
+def test_project_checker(tmpdir):
+    for name in ['foo.py', 'bar.py']:
+        with open(str(tmpdir.join(name)), 'w') as f:
+            f.write('a = 1\n')
+    table = ErrorsTable()
+    checker = ProjectChecker(table)
+    checker.check(Backend(), [check], root=str(tmpdir), processes=0)
+    _wait(checker)
+    assert table.rowCount() == 2
+    # only the modified file is checked again
+    path = str(tmpdir.join('foo.py'))
+    with open(path, 'w') as f:
+        f.write('a = 1\nb = 2\n')
+    received = []
+    checker.messages_available.connect(
+        lambda path, messages: received.append(path))
+    checker.check_file(path)
+    _wait(checker)
+    assert received == [path]
+    assert table.rowCount() == 2
+    descriptions = sorted(table.message(row).description
+                          for row in range(2))
+    assert descriptions == ['1 lines', '2 lines']